@@ -0,0 +1,88 @@
+"""
+Пик памяти при источнике быстрее ЛК НПД: неограниченная ``asyncio.Queue``
+против ``Pipeline`` с ``BoundedQueue``. Конвейер из двух стадий: декларация
+и сохранение чека, каждый сотый чек отклоняется.
+
+    PYTHONPATH=. python benchmarks/backpressure.py 20000
+"""
+import asyncio
+import sys
+import tracemalloc
+from time import perf_counter
+
+from npdtools.backpressure import Pipeline
+
+CONCURRENCY = 20
+LATENCY = 0.002
+
+
+def receipt(index: int) -> dict:
+    return {
+        "index": index,
+        "name": f"Заказ {index}",
+        "amount": "1500.00",
+        "payload": bytes(1024),
+    }
+
+
+async def declare(item: dict) -> str:
+    await asyncio.sleep(LATENCY)
+    if item["index"] % 100 == 0:
+        raise ValueError(item["name"])
+    return item["name"]
+
+
+async def save(name: str) -> str:
+    await asyncio.sleep(0)
+    return name
+
+
+async def unbounded(count: int) -> int:
+    queue: asyncio.Queue = asyncio.Queue()
+    for index in range(count):
+        queue.put_nowait(receipt(index))
+
+    done = 0
+
+    async def worker():
+        nonlocal done
+        while not queue.empty():
+            try:
+                await save(await declare(queue.get_nowait()))
+            except ValueError:
+                pass
+            done += 1
+
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return done
+
+
+async def bounded(count: int) -> int:
+    pipeline = Pipeline((receipt(index) for index in range(count)), high_watermark=100)
+    pipeline.stage(declare, concurrency=CONCURRENCY).stage(save, concurrency=2)
+    done = failed = 0
+    async for result in pipeline:
+        done += 1
+        failed += not result.ok
+    assert failed == (count + 99) // 100, failed
+    print(f"  {pipeline.metrics()['stage0']}")
+    return done
+
+
+def measure(name: str, run, count: int) -> None:
+    tracemalloc.start()
+    started = perf_counter()
+    done = asyncio.run(run(count))
+    elapsed = perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:10} {done} in {elapsed:5.2f}s, peak {peak / 2**20:7.2f} MiB")
+
+
+def main(count: int) -> None:
+    measure("unbounded", unbounded, count)
+    measure("pipeline", bounded, count)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
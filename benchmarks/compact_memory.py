@@ -0,0 +1,69 @@
+"""
+Сколько памяти занимает одна запись ``IncomeInfo`` и ``CompactIncome``.
+
+    PYTHONPATH=. python benchmarks/compact_memory.py 20000
+"""
+import gc
+import sys
+import tracemalloc
+
+from npdtools.compact import Interner
+from npdtools.types import IncomeInfo
+
+
+def income_payload(index: int) -> dict:
+    time = f"2026-{index % 12 + 1:02d}-{index % 28 + 1:02d}T10:{index % 60:02d}:00+03:00"
+    return {
+        "approvedReceiptUuid": f"{index:010x}",
+        "name": "Консультация",
+        "services": [{"name": "Консультация", "amount": "1500.00", "quantity": 1}],
+        "operationTime": time,
+        "requestTime": time,
+        "registerTime": time,
+        "taxPeriodId": 202601 + index % 12,
+        "paymentType": "CASH",
+        "incomeType": "FROM_INDIVIDUAL",
+        "totalAmount": "1500.00",
+        "cancellationInfo": None,
+        "sourceDeviceId": "8aqi2c1d5mbdzx4ckavnq",
+        "clientInn": None,
+        "clientDisplayName": None,
+        "clientContactPhone": None,
+        "inn": "123456789012",
+        "profession": "Разработчик",
+        "description": [],
+        "email": "npd@example.com",
+        "phone": "79990000000",
+        "invoiceId": None,
+    }
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    records = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def main(count: int) -> None:
+    payloads = [income_payload(i) for i in range(count)]
+
+    models = measure(lambda: [IncomeInfo.model_validate(p) for p in payloads])
+
+    def build_compact():
+        interner = Interner()
+        return [interner.income(IncomeInfo.model_validate(p)) for p in payloads]
+
+    compact = measure(build_compact)
+
+    print(f"records:       {count}")
+    print(f"IncomeInfo:    {models / count:8.0f} bytes/record")
+    print(f"CompactIncome: {compact / count:8.0f} bytes/record")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
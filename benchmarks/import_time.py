@@ -0,0 +1,45 @@
+"""
+Время импорта npdtools в чистом интерпретаторе.
+
+    PYTHONPATH=. python benchmarks/import_time.py
+"""
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = {
+    "import npdtools": "import npdtools",
+    "from npdtools.types import Service": "from npdtools.types import Service",
+    "from npdtools import NPDTools": "from npdtools import NPDTools",
+    "NPDTools + first validation": (
+        "from npdtools import NPDTools, Service; Service(name='x', amount=1)"
+    ),
+}
+
+CODE = """
+import time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(statement: str, repeat: int) -> float:
+    runs = [
+        float(
+            subprocess.check_output(
+                [sys.executable, "-c", CODE.format(statement=statement)]
+            )
+        )
+        for _ in range(repeat)
+    ]
+    return statistics.median(runs)
+
+
+def main(repeat: int) -> None:
+    for name, statement in STATEMENTS.items():
+        print(f"{name:40} {measure(statement, repeat) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
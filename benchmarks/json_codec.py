@@ -0,0 +1,67 @@
+"""
+Время разбора страницы ``IncomesList`` в модель и кодирования тела запроса каждым кодеком JSON.
+
+    PYTHONPATH=. python benchmarks/json_codec.py 1000
+"""
+import json
+import sys
+from time import perf_counter
+
+from compact_memory import income_payload
+
+from npdtools.codec import CODECS
+from npdtools.types import IncomesList
+
+ROUNDS = 20
+
+
+def timed(func, rounds: int = ROUNDS) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = perf_counter()
+        func()
+        best = min(best, perf_counter() - started)
+    return best
+
+
+def main(page_size: int) -> None:
+    page = json.dumps(
+        {
+            "content": [income_payload(i) for i in range(page_size)],
+            "hasMore": True,
+            "currentOffset": 0,
+            "currentLimit": page_size,
+        },
+        ensure_ascii=False,
+    ).encode()
+    body = {
+        "paymentType": "CASH",
+        "ignoreMaxTotalIncomeRestriction": False,
+        "client": {"contactPhone": None, "displayName": None, "inn": None},
+        "requestTime": "2026-01-01T10:00:00+03:00",
+        "operationTime": "2026-01-01T10:00:00+03:00",
+        "services": [{"name": "Консультация", "amount": "1500.00", "quantity": 1}],
+        "totalAmount": "1500.00",
+    }
+
+    print(f"page: {page_size} incomes, {len(page) / 1024:.0f} KiB")
+    print(f"{'codec':8} {'decode':>10} {'validate':>10} {'total':>10} {'encode':>10}")
+    for name, codec_class in CODECS.items():
+        try:
+            codec = codec_class()
+        except ImportError:
+            print(f"{name:8} не установлен")
+            continue
+        data = codec.loads(page)
+        decode = timed(lambda: codec.loads(page))
+        validate = timed(lambda: IncomesList.model_validate(data))
+        total = timed(lambda: IncomesList.model_validate(codec.loads(page)))
+        encode = timed(lambda: codec.dumps(body), rounds=ROUNDS * 1000) * 1e6
+        print(
+            f"{name:8} {decode * 1000:8.2f}ms {validate * 1000:8.2f}ms"
+            f" {total * 1000:8.2f}ms {encode:8.2f}us"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
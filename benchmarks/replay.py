@@ -0,0 +1,100 @@
+"""
+Прогон клиента по записанному трафику: авторизация, постраничный ``iter_incomes``
+и параллельные ``get_incomes``. Печатает время, запросы в секунду и пик памяти.
+
+Если кассеты нет, она записывается с синтетического сервера. Для сравнения версий
+библиотеки одну и ту же кассету прогоняют в каждой из них.
+
+    PYTHONPATH=. python benchmarks/replay.py traffic.jsonl.gz 0 10 1
+"""
+import asyncio
+import os
+import sys
+import tracemalloc
+from datetime import timedelta
+from time import perf_counter
+
+import httpx
+from compact_memory import income_payload
+
+from npdtools import NPDTools
+from npdtools.replay import Cassette, RecordingTransport, ReplayTransport
+from npdtools.timeutils import format_time, now
+
+INN = "123456789012"
+INCOMES = 2000
+PAGE_SIZE = 100
+PARALLEL = 50
+SERVER_LATENCY = 0.005
+
+
+async def server(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(SERVER_LATENCY)
+    if request.url.path.endswith("/auth/lkfl"):
+        return httpx.Response(
+            200,
+            json={
+                "token": "access-token",
+                "refreshToken": "refresh-token",
+                "tokenExpireIn": format_time(now() + timedelta(hours=1)),
+            },
+        )
+    offset = int(request.url.params["offset"])
+    limit = int(request.url.params["limit"])
+    content = [income_payload(i) for i in range(offset, min(offset + limit, INCOMES))]
+    return httpx.Response(
+        200,
+        json={
+            "content": content,
+            "hasMore": offset + limit < INCOMES,
+            "currentOffset": offset,
+            "currentLimit": limit,
+        },
+    )
+
+
+async def scenario(transport: httpx.AsyncBaseTransport) -> int:
+    async with httpx.AsyncClient(transport=transport) as session:
+        npd = NPDTools(default_inn=INN, http_session=session)
+        await npd.auth(password="password")
+        count = 0
+        async for _ in npd.iter_incomes(from_date=30, page_size=PAGE_SIZE):
+            count += 1
+        pages = await asyncio.gather(
+            *(npd.get_incomes(from_date=30, limit=10) for _ in range(PARALLEL))
+        )
+        return count + sum(len(page.incomes) for page in pages)
+
+
+async def main(path: str, speeds: list[float]) -> None:
+    if not os.path.exists(path):
+        recorder = RecordingTransport(httpx.MockTransport(server))
+        await scenario(recorder)
+        recorder.cassette.save(path)
+        print(f"recorded {len(recorder.cassette)} requests to {path}")
+
+    cassette = Cassette.load(path)
+    print(f"cassette: {len(cassette)} requests, {os.path.getsize(path) / 1024:.0f} KiB")
+    for speed in speeds:
+        replay = ReplayTransport(cassette, speed=speed or None)
+        tracemalloc.start()
+        started = perf_counter()
+        incomes = await scenario(replay)
+        elapsed = perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        requests = replay.metrics["exact"] + replay.metrics["fallback"]
+        print(
+            f"speed {speed or 'max':>5}: {elapsed:6.2f}s {requests / elapsed:8.0f} req/s"
+            f" {incomes / elapsed:8.0f} incomes/s peak {peak / 2**20:6.1f} MiB"
+            f" (fallback {replay.metrics['fallback']})"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            sys.argv[1] if len(sys.argv) > 1 else "traffic.jsonl.gz",
+            [float(speed) for speed in sys.argv[2:]] or [0.0, 1.0],
+        )
+    )
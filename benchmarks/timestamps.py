@@ -0,0 +1,33 @@
+"""
+Форматирование и разбор времени: прежние выражения против ``npdtools.timeutils``.
+
+    PYTHONPATH=. python benchmarks/timestamps.py
+"""
+import timeit
+from datetime import datetime
+
+from npdtools.timeutils import format_time, now, parse_time
+
+TOKEN_EXPIRE_IN = "2023-01-01T12:00:00.123456Z"
+
+CASES = {
+    "request time (astimezone)": lambda: datetime.now()
+    .replace(microsecond=0)
+    .astimezone()
+    .isoformat(),
+    "request time (timeutils)": lambda: format_time(now()),
+    "tokenExpireIn (strptime)": lambda: datetime.strptime(
+        TOKEN_EXPIRE_IN.replace("Z", "+00:00"), "%Y-%m-%dT%H:%M:%S.%f%z"
+    ),
+    "tokenExpireIn (timeutils)": lambda: parse_time(TOKEN_EXPIRE_IN),
+}
+
+
+def main(number: int = 100000) -> None:
+    for name, func in CASES.items():
+        seconds = min(timeit.repeat(func, number=number, repeat=5))
+        print(f"{name:30} {seconds / number * 1e9:8.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,49 @@
-from .modules import NPDTools
-from .types import *
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+from .types import __all__ as _types_all
+
+if TYPE_CHECKING:
+    from .helpers import RawPolicy
+    from .modules import NPDTools
+    from .types import *
+
+# Ошибки объявлены с ``__module__ = "npdtools"`` и должны находиться здесь, в том числе для pickle
+_ERRORS: tuple[str, ...] = (
+    "CircuitOpenError",
+    "DeadlineExceededError",
+    "FNSAuthError",
+    "FNSError",
+    "FNSLimitExceededError",
+    "FNSNotFoundError",
+    "FNSRateLimitedError",
+    "FNSServerError",
+    "FNSTokenExpiredError",
+    "FNSValidationError",
+    "IncomeLimitExceededError",
+    "QueueClosedError",
+)
+
+_LAZY: dict[str, str] = (
+    {
+        "NPDTools": "npdtools.modules",
+        "RawPolicy": "npdtools.helpers",
+    }
+    | {name: "npdtools.types" for name in _types_all}
+    | {name: "npdtools.errors" for name in _ERRORS}
+)
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    # Тяжёлые зависимости (httpx, pydantic) загружаются только при первом обращении
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,39 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class SQLiteStore:
+    """
+    Основа хранилищ на SQLite: одно соединение на объект, общее для потоков
+    под ``_lock``, режим автокоммита, журнал WAL и схема, создаваемая при открытии.
+    """
+
+    def __init__(self, path: str | os.PathLike, schema: str, wal: bool = True):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if wal:
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(schema)
+
+    def _execute(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Явная транзакция: при исключении изменения откатываются. Вызывается под ``self._lock``.
+        """
+        self._db.execute("BEGIN")
+        try:
+            yield self._db
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def close(self) -> None:
+        self._db.close()
@@ -0,0 +1,353 @@
+import asyncio
+from collections import deque
+from time import monotonic
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterable,
+    TypeVar,
+)
+
+from npdtools.errors import QueueClosedError
+from npdtools.helpers import aiterate
+from npdtools.types.bulk import BulkResult
+
+T = TypeVar("T")
+
+
+class BoundedQueue(Generic[T]):
+    """
+    Асинхронная очередь с верхней и нижней отметками заполнения.
+
+    Когда в очереди набирается ``high_watermark`` элементов, ``put`` приостанавливает
+    производителей, пока потребители не выберут очередь до ``low_watermark``.
+    Поэтому в очереди никогда не бывает больше ``high_watermark`` элементов,
+    а производители просыпаются не на каждый освободившийся элемент, а пачкой.
+
+    ```python
+    queue = BoundedQueue(high_watermark=100, low_watermark=20)
+
+    async def producer():
+        async for payment in payments():
+            await queue.put(payment)
+        queue.close()
+
+    async for payment in queue:
+        await npd.declare_income(...)
+    ```
+
+    Attributes:
+        high_watermark: Наибольшее количество элементов, при нём производители приостанавливаются
+        low_watermark: Количество элементов, при котором производители продолжают работу.
+            По умолчанию половина ``high_watermark``
+    """
+
+    def __init__(self, high_watermark: int = 100, low_watermark: int | None = None):
+        if low_watermark is None:
+            low_watermark = high_watermark // 2
+        if not 0 <= low_watermark < high_watermark:
+            raise ValueError("Нужно 0 <= low_watermark < high_watermark")
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+
+        self._items: deque[T] = deque()
+        self._paused = False
+        self._closed = False
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._readable = asyncio.Event()
+
+        self.max_depth = 0
+        self.puts = 0
+        self.gets = 0
+        self.pauses = 0
+        self.put_waits = 0
+        self.put_wait = 0.0
+        self.put_wait_max = 0.0
+        self.get_waits = 0
+        self.get_wait = 0.0
+        self.get_wait_max = 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def paused(self) -> bool:
+        """
+        Returns:
+            bool: Приостановлены ли производители
+        """
+        return self._paused
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    async def wait_writable(self) -> None:
+        """
+        Ждёт, пока производителям можно писать в очередь. Позволяет не готовить следующий
+        элемент, например, не читать его из сети, пока очередь заполнена.
+
+        Raises:
+            QueueClosedError: Очередь закрыта
+        """
+        if self._paused and not self._closed:
+            started = monotonic()
+            while self._paused and not self._closed:
+                await self._writable.wait()
+            waited = monotonic() - started
+            self.put_waits += 1
+            self.put_wait += waited
+            self.put_wait_max = max(self.put_wait_max, waited)
+        if self._closed:
+            raise QueueClosedError()
+
+    async def put(self, item: T) -> None:
+        """
+        Добавляет элемент, при заполненной очереди ждёт, пока она освободится до ``low_watermark``.
+
+        Raises:
+            QueueClosedError: Очередь закрыта
+        """
+        await self.wait_writable()
+        self._items.append(item)
+        self.puts += 1
+        self.max_depth = max(self.max_depth, len(self._items))
+        if len(self._items) >= self.high_watermark:
+            self._paused = True
+            self.pauses += 1
+            self._writable.clear()
+        self._readable.set()
+
+    async def get(self) -> T:
+        """
+        Забирает элемент, при пустой очереди ждёт его появления.
+
+        Raises:
+            QueueClosedError: Очередь закрыта и все элементы уже выбраны
+        """
+        if not self._items and not self._closed:
+            started = monotonic()
+            while not self._items and not self._closed:
+                await self._readable.wait()
+            waited = monotonic() - started
+            self.get_waits += 1
+            self.get_wait += waited
+            self.get_wait_max = max(self.get_wait_max, waited)
+        if not self._items:
+            raise QueueClosedError()
+
+        item = self._items.popleft()
+        self.gets += 1
+        if not self._items and not self._closed:
+            self._readable.clear()
+        if self._paused and len(self._items) <= self.low_watermark:
+            self._paused = False
+            self._writable.set()
+        return item
+
+    def close(self) -> None:
+        """
+        Закрывает очередь: ``put`` больше не принимает элементы,
+        а ``get`` отдаёт оставшиеся и затем выбрасывает ``QueueClosedError``.
+        """
+        self._closed = True
+        self._writable.set()
+        self._readable.set()
+
+    async def __aiter__(self) -> AsyncIterator[T]:
+        while True:
+            try:
+                yield await self.get()
+            except QueueClosedError:
+                return
+
+    def metrics(self) -> dict[str, Any]:
+        """
+        Returns:
+            Текущая и наибольшая глубина, количество записей, чтений и приостановок,
+            суммарное и наибольшее время ожидания производителей и потребителей
+        """
+        return {
+            "depth": len(self._items),
+            "max_depth": self.max_depth,
+            "puts": self.puts,
+            "gets": self.gets,
+            "pauses": self.pauses,
+            "put_waits": self.put_waits,
+            "put_wait": self.put_wait,
+            "put_wait_max": self.put_wait_max,
+            "get_waits": self.get_waits,
+            "get_wait": self.get_wait,
+            "get_wait_max": self.get_wait_max,
+        }
+
+
+class _Stage:
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Awaitable[Any]],
+        concurrency: int,
+        queue: BoundedQueue,
+    ):
+        self.name = name
+        self.func = func
+        self.concurrency = concurrency
+        self.queue = queue
+
+
+class Pipeline:
+    """
+    Конвейер стадий, связанных ``BoundedQueue``. Каждая стадия выполняет асинхронную функцию
+    над результатом предыдущей в ``concurrency`` воркеров.
+
+    Источник читается, только пока в очереди первой стадии есть место, а заполненная очередь
+    любой стадии приостанавливает все предыдущие. Поэтому в памяти одновременно находится
+    не больше суммы ``high_watermark`` и ``concurrency`` всех стадий элементов,
+    сколько бы быстро ни поступали данные и сколько бы их ни было.
+
+    Ошибка в элементе не останавливает конвейер: элемент пропускает оставшиеся стадии
+    и попадает в результаты с исключением.
+
+    ```python
+    pipeline = Pipeline(orders(), high_watermark=200)
+    pipeline.stage(
+        lambda order: npd.declare_income(*order.services, client=order.client),
+        concurrency=5,
+    )
+    pipeline.stage(save_receipt, concurrency=2)
+
+    async for result in pipeline:
+        if not result.ok:
+            log.error(result.error)
+    ```
+
+    Attributes:
+        high_watermark: Верхняя отметка очередей стадий по умолчанию
+        low_watermark: Нижняя отметка очередей стадий по умолчанию
+    """
+
+    def __init__(
+        self,
+        source: Iterable | AsyncIterable,
+        high_watermark: int = 100,
+        low_watermark: int | None = None,
+    ):
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self._source = source
+        self._stages: list[_Stage] = []
+        self._output: BoundedQueue[BulkResult] | None = None
+
+    def stage(
+        self,
+        func: Callable[[Any], Awaitable[Any]],
+        concurrency: int = 1,
+        high_watermark: int | None = None,
+        low_watermark: int | None = None,
+        name: str | None = None,
+    ) -> "Pipeline":
+        """
+        Добавляет стадию.
+
+        Args:
+            func: Асинхронная функция от результата предыдущей стадии или элемента источника
+            concurrency: Количество воркеров стадии
+            high_watermark: Верхняя отметка входной очереди стадии
+            low_watermark: Нижняя отметка входной очереди стадии
+            name: Имя стадии в ``metrics``. По умолчанию ``stage<номер>``
+
+        Returns:
+            Pipeline: Этот же конвейер
+        """
+        if high_watermark is None:
+            high_watermark = self.high_watermark
+            low_watermark = self.low_watermark
+        self._stages.append(
+            _Stage(
+                name or f"stage{len(self._stages)}",
+                func,
+                concurrency,
+                BoundedQueue(high_watermark, low_watermark),
+            )
+        )
+        return self
+
+    async def _feed(self, queue: BoundedQueue) -> None:
+        try:
+            index = 0
+            async for item in aiterate(self._source):
+                await queue.put((index, item, item))
+                index += 1
+        finally:
+            queue.close()
+
+    async def _work(
+        self, stage: _Stage, next_queue: BoundedQueue | None, output: BoundedQueue
+    ) -> None:
+        async for index, item, value in stage.queue:
+            try:
+                result = await stage.func(value)
+            except Exception as e:
+                await output.put(BulkResult(index=index, item=item, error=e))
+                continue
+            if next_queue is None:
+                await output.put(BulkResult(index=index, item=item, result=result))
+            else:
+                await next_queue.put((index, item, result))
+
+    async def _run_stage(
+        self, stage: _Stage, next_queue: BoundedQueue | None, output: BoundedQueue
+    ) -> None:
+        try:
+            await asyncio.gather(
+                *(
+                    self._work(stage, next_queue, output)
+                    for _ in range(stage.concurrency)
+                )
+            )
+        finally:
+            (next_queue if next_queue is not None else output).close()
+
+    async def __aiter__(self) -> AsyncIterator[BulkResult]:
+        """
+        Запускает конвейер и отдаёт результаты по мере готовности, а не по порядку.
+
+        Yields:
+            BulkResult: Результат последней стадии или ошибка, в ``item`` элемент источника
+        """
+        if not self._stages:
+            raise ValueError("В конвейере нет стадий")
+        output = self._output = BoundedQueue(self.high_watermark, self.low_watermark)
+        queues = [stage.queue for stage in self._stages]
+        tasks = [asyncio.create_task(self._feed(queues[0]))] + [
+            asyncio.create_task(
+                self._run_stage(
+                    stage, queues[i + 1] if i + 1 < len(queues) else None, output
+                )
+            )
+            for i, stage in enumerate(self._stages)
+        ]
+        try:
+            async for result in output:
+                yield result
+            # Пробрасывает ошибку чтения источника
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        """
+        Returns:
+            Метрики ``BoundedQueue.metrics`` входной очереди каждой стадии и очереди результатов ``output``
+        """
+        metrics = {stage.name: stage.queue.metrics() for stage in self._stages}
+        if self._output is not None:
+            metrics["output"] = self._output.metrics()
+        return metrics
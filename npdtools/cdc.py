@@ -0,0 +1,441 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from enum import StrEnum
+from time import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterable
+
+from npdtools._sqlite import SQLiteStore
+from npdtools.types.bulk import BulkResult
+from npdtools.types.income import IncomeInfo
+from npdtools.types.invoice import Invoice
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+    from npdtools.modules.client import NPDTools
+
+
+class ChangeKind(StrEnum):
+    """
+    Attributes:
+        receipt_created: Появился новый чек
+        receipt_cancelled: Чек аннулирован
+        invoice_created: Появился новый счёт
+        invoice_status_changed: Изменился статус счёта
+    """
+
+    receipt_created: str = "receipt_created"
+    receipt_cancelled: str = "receipt_cancelled"
+    invoice_created: str = "invoice_created"
+    invoice_status_changed: str = "invoice_status_changed"
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeEvent:
+    """
+    Событие изменения чека или счёта.
+
+    Attributes:
+        seq: Сквозной номер события, по нему продолжается чтение
+        inn: ИНН самозанятого
+        kind: Вид события
+        key: Номер чека или счёта
+        data: Сведения о чеке или счёте в JSON'подобном виде, для смены статуса ещё ``old_status``
+        created_at: Время обнаружения изменения, unix timestamp
+    """
+
+    seq: int
+    inn: str
+    kind: ChangeKind
+    key: str
+    data: dict[str, Any]
+    created_at: float
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "seq": self.seq,
+            "inn": self.inn,
+            "kind": str(self.kind),
+            "key": self.key,
+            "data": self.data,
+            "created_at": self.created_at,
+        }
+
+
+class ChangeStream(SQLiteStore):
+    """
+    Поток изменений чеков и счетов (CDC) для многих потребителей.
+
+    ``ChangeStream`` один раз за интервал опрашивает каждый ИНН, сравнивает чеки и счета
+    с сохранённым в SQLite снимком и записывает найденные изменения в журнал событий.
+    Снимок и журнал обновляются в одной транзакции, поэтому после перезапуска
+    изменения не теряются и не повторяются.
+
+    Потребители читают журнал через ``subscribe`` или получают события вебхуками.
+    У каждого именованного потребителя свой курсор в журнале: после перезапуска
+    чтение продолжается с первого необработанного события.
+
+    ```python
+    async with ChangeStream(npd, inns) as stream:
+        async for event in stream.subscribe("accounting"):
+            ...
+    ```
+
+    Notes: Первый опрос
+        При первом опросе ИНН текущие чеки и счета только запоминаются, событий по ним нет.
+        Чтобы получить их событиями, нужно передать ``emit_initial=True``.
+
+    Warning: Окно сравнения
+        Сравниваются только чеки и счета, созданные за последние ``receipt_lookback_days``
+        и ``invoice_lookback_days`` дней. Аннулирование более старого чека и смена статуса
+        более старого счёта событий не дают. Если чеки аннулируют спустя недели,
+        окно чеков нужно увеличить.
+
+    Attributes:
+        npd: Клиент, через который опрашиваются ИНН
+        inns: Опрашиваемые ИНН
+        path: Путь к файлу базы SQLite
+        interval: Интервал между опросами в секундах
+        receipt_lookback_days: За сколько последних дней сравнивать чеки
+        invoice_lookback_days: За сколько последних дней сравнивать счета
+        concurrency: Сколько ИНН опрашивать одновременно
+        emit_initial: Отдавать события по чекам и счетам, найденным при первом опросе ИНН
+        errors: Ошибки последнего опроса по ИНН. ИНН убирается отсюда после удачного опроса
+    """
+
+    def __init__(
+        self,
+        npd: "NPDTools",
+        inns: Iterable[str],
+        path: str = "npdtools_cdc.sqlite3",
+        interval: float = 60.0,
+        lookback_days: int = 7,
+        concurrency: int = 5,
+        emit_initial: bool = False,
+        receipt_lookback_days: int | None = None,
+        invoice_lookback_days: int | None = None,
+    ):
+        """
+        Args:
+            lookback_days: Окно сравнения в днях для чеков и счетов, если их окна не заданы
+        """
+        self.npd = npd
+        self.inns: list[str] = list(inns)
+        self.path = path
+        self.interval = interval
+        self.receipt_lookback_days = receipt_lookback_days or lookback_days
+        self.invoice_lookback_days = invoice_lookback_days or lookback_days
+        self.concurrency = concurrency
+        self.emit_initial = emit_initial
+        self.errors: dict[str, Exception] = {}
+
+        super().__init__(
+            path,
+            "CREATE TABLE IF NOT EXISTS cdc_receipts ("
+            " inn TEXT NOT NULL, receipt_id TEXT NOT NULL, cancelled INTEGER NOT NULL,"
+            " PRIMARY KEY (inn, receipt_id));"
+            "CREATE TABLE IF NOT EXISTS cdc_invoices ("
+            " inn TEXT NOT NULL, invoice_id INTEGER NOT NULL, status TEXT NOT NULL,"
+            " PRIMARY KEY (inn, invoice_id));"
+            "CREATE TABLE IF NOT EXISTS cdc_polled (inn TEXT PRIMARY KEY);"
+            "CREATE TABLE IF NOT EXISTS cdc_events ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " inn TEXT NOT NULL, kind TEXT NOT NULL, key TEXT NOT NULL,"
+            " data TEXT NOT NULL, created_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS cdc_cursors ("
+            " name TEXT PRIMARY KEY, seq INTEGER NOT NULL);",
+        )
+
+        self._new_events: asyncio.Condition | None = None
+        self._task: asyncio.Task | None = None
+        self._webhooks: list[asyncio.Task] = []
+        self._webhook_session: "AsyncClient | None" = None
+
+    @property
+    def _condition(self) -> asyncio.Condition:
+        if self._new_events is None:
+            self._new_events = asyncio.Condition()
+        return self._new_events
+
+    async def poll_inn(self, inn: str) -> int:
+        """
+        Опрашивает один ИНН и записывает изменения в журнал.
+
+        Returns:
+            int: Количество новых событий
+        """
+        incomes: list[IncomeInfo] = [
+            income
+            async for income in self.npd.iter_incomes(
+                from_date=self.receipt_lookback_days, inn=inn
+            )
+        ]
+        invoices: list[Invoice] = [
+            invoice
+            async for invoice in self.npd.iter_invoices(
+                from_date=self.invoice_lookback_days, inn=inn
+            )
+        ]
+
+        with self._lock:
+            known_receipts = dict(
+                self._db.execute(
+                    "SELECT receipt_id, cancelled FROM cdc_receipts WHERE inn = ?",
+                    (inn,),
+                ).fetchall()
+            )
+            known_invoices = dict(
+                self._db.execute(
+                    "SELECT invoice_id, status FROM cdc_invoices WHERE inn = ?", (inn,)
+                ).fetchall()
+            )
+            first_poll = not self._db.execute(
+                "SELECT 1 FROM cdc_polled WHERE inn = ?", (inn,)
+            ).fetchall()
+            emit = self.emit_initial or not first_poll
+
+            events: list[tuple[str, str, dict]] = []
+            receipts: list[tuple[str, str, int]] = []
+            for income in incomes:
+                cancelled = int(income.cancellation_info is not None)
+                known = known_receipts.get(income.receipt_id)
+                if known == cancelled:
+                    continue
+                receipts.append((inn, income.receipt_id, cancelled))
+                data = income.model_dump(mode="json", exclude={"raw"})
+                if known is None:
+                    events.append((ChangeKind.receipt_created, income.receipt_id, data))
+                if cancelled:
+                    events.append(
+                        (ChangeKind.receipt_cancelled, income.receipt_id, data)
+                    )
+
+            invoice_rows: list[tuple[str, int, str]] = []
+            for invoice in invoices:
+                known = known_invoices.get(invoice.invoice_id)
+                if known == invoice.status:
+                    continue
+                invoice_rows.append((inn, invoice.invoice_id, invoice.status))
+                data = invoice.model_dump(mode="json", exclude={"raw"})
+                if known is None:
+                    events.append(
+                        (ChangeKind.invoice_created, str(invoice.invoice_id), data)
+                    )
+                else:
+                    events.append(
+                        (
+                            ChangeKind.invoice_status_changed,
+                            str(invoice.invoice_id),
+                            data | {"old_status": known},
+                        )
+                    )
+
+            if not emit:
+                events = []
+            created_at = time()
+            with self._transaction() as db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO cdc_receipts VALUES (?, ?, ?)", receipts
+                )
+                db.executemany(
+                    "INSERT OR REPLACE INTO cdc_invoices VALUES (?, ?, ?)",
+                    invoice_rows,
+                )
+                db.executemany(
+                    "INSERT INTO cdc_events (inn, kind, key, data, created_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            inn,
+                            str(kind),
+                            key,
+                            json.dumps(data, ensure_ascii=False),
+                            created_at,
+                        )
+                        for kind, key, data in events
+                    ],
+                )
+                db.execute("INSERT OR IGNORE INTO cdc_polled VALUES (?)", (inn,))
+
+        if events:
+            async with self._condition:
+                self._condition.notify_all()
+        return len(events)
+
+    async def poll(self) -> list[BulkResult]:
+        """
+        Опрашивает все ИНН, не больше ``concurrency`` одновременно. Ошибки отдельных ИНН не прерывают опрос,
+        а возвращаются в результатах и сохраняются в ``errors``.
+
+        Returns:
+            list[BulkResult]: Результаты по каждому ИНН, в ``item`` ИНН, в ``result`` количество новых событий
+        """
+        results = await self.npd._run_bulk(self.poll_inn, self.inns, self.concurrency)
+        for result in results:
+            if result.ok:
+                self.errors.pop(result.item, None)
+            else:
+                self.errors[result.item] = result.error
+        return results
+
+    async def run(self) -> None:
+        while True:
+            await self.poll()
+            await asyncio.sleep(self.interval)
+
+    def last_seq(self) -> int:
+        """
+        Returns:
+            int: Номер последнего события в журнале
+        """
+        return self._execute("SELECT COALESCE(MAX(seq), 0) FROM cdc_events")[0][0]
+
+    def get_cursor(self, name: str) -> int:
+        """
+        Returns:
+            int: Номер последнего обработанного потребителем события, ``0`` для нового потребителя
+        """
+        rows = self._execute("SELECT seq FROM cdc_cursors WHERE name = ?", (name,))
+        return rows[0][0] if rows else 0
+
+    def commit(self, name: str, seq: int) -> None:
+        """
+        Сохраняет курсор потребителя: события до ``seq`` включительно обработаны.
+        """
+        self._execute(
+            "INSERT INTO cdc_cursors VALUES (?, ?)"
+            " ON CONFLICT (name) DO UPDATE SET seq = MAX(seq, excluded.seq)",
+            (name, seq),
+        )
+
+    def read(self, after: int, limit: int = 500) -> list[ChangeEvent]:
+        """
+        Args:
+            after: Номер события, после которого читать
+            limit: Максимальное количество событий
+
+        Returns:
+            list[ChangeEvent]: События журнала по возрастанию номера
+        """
+        rows = self._execute(
+            "SELECT seq, inn, kind, key, data, created_at FROM cdc_events"
+            " WHERE seq > ? ORDER BY seq LIMIT ?",
+            (after, limit),
+        )
+        return [
+            ChangeEvent(seq, inn, ChangeKind(kind), key, json.loads(data), created_at)
+            for seq, inn, kind, key, data, created_at in rows
+        ]
+
+    async def subscribe(
+        self,
+        name: str | None = None,
+        after: int | None = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[ChangeEvent]:
+        """
+        Бесконечно отдаёт события журнала, дожидаясь новых.
+
+        У именованного потребителя курсор сохраняется, когда он запрашивает следующее событие,
+        то есть событие считается обработанным, когда обработчик вернул управление в цикл.
+
+        Args:
+            name: Имя потребителя для сохранения курсора. Без имени курсор не сохраняется
+            after: Номер события, после которого начать. По умолчанию сохранённый курсор,
+                а для безымянного потребителя — только новые события
+            batch_size: Сколько событий читать из базы за раз
+        """
+        if after is None:
+            after = self.get_cursor(name) if name is not None else self.last_seq()
+
+        while True:
+            async with self._condition:
+                events = self.read(after, batch_size)
+                if not events:
+                    await self._condition.wait()
+                    continue
+            for event in events:
+                yield event
+                after = event.seq
+                if name is not None:
+                    self.commit(name, after)
+
+    async def _deliver(
+        self, url: str, name: str, headers: dict | None, retry_delay: float
+    ) -> None:
+        async for event in self.subscribe(name):
+            delay = retry_delay
+            while True:
+                try:
+                    response = await self._webhook_session.post(
+                        url, json=event.to_json(), headers=headers
+                    )
+                    if response.status_code < 300:
+                        break
+                except Exception:
+                    pass
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 300.0)
+
+    def add_webhook(
+        self,
+        url: str,
+        name: str | None = None,
+        headers: dict | None = None,
+        retry_delay: float = 1.0,
+    ) -> None:
+        """
+        Отправляет события POST-запросами на ``url`` по одному, по порядку.
+        Неудачная доставка повторяется с растущей задержкой, следующие события ждут.
+
+        Args:
+            url: Адрес вебхука
+            name: Имя курсора. По умолчанию ``webhook:<url>``
+            headers: Дополнительные заголовки, например, для подписи
+            retry_delay: Начальная задержка повтора в секундах
+        """
+        if self._webhook_session is None:
+            from httpx import AsyncClient
+
+            self._webhook_session = AsyncClient()
+        self._webhooks.append(
+            asyncio.create_task(
+                self._deliver(url, name or f"webhook:{url}", headers, retry_delay)
+            )
+        )
+
+    def prune(self, before: datetime) -> int:
+        """
+        Удаляет из журнала события, обнаруженные раньше ``before``.
+
+        Returns:
+            int: Количество удалённых событий
+        """
+        with self._lock:
+            return self._db.execute(
+                "DELETE FROM cdc_events WHERE created_at < ?", (before.timestamp(),)
+            ).rowcount
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        tasks = self._webhooks + ([self._task] if self._task is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._webhooks = []
+        if self._webhook_session is not None:
+            await self._webhook_session.aclose()
+            self._webhook_session = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
@@ -0,0 +1,260 @@
+import re
+from collections import deque
+from enum import StrEnum
+from random import uniform
+from time import monotonic
+from typing import Any
+
+from npdtools.errors import CircuitOpenError
+
+_ID_PATTERN = re.compile(r"/\d+(?=/|$)")
+_RECEIPT_PATTERN = re.compile(r"/receipt/[^/]+/[^/]+")
+
+GATEWAY_ERRORS: frozenset[int] = frozenset({502, 503, 504})
+
+
+def endpoint_of(url: str) -> str:
+    """
+    Приводит адрес к шаблону эндпоинта, заменяя ИНН и номера чеков в адресах чеков
+    и числовые идентификаторы: ``/receipt/123456789012/200egv8g3f/print`` ->
+    ``/receipt/{inn}/{receipt_id}/print``, ``/invoice/123/cancel`` -> ``/invoice/{id}/cancel``.
+    """
+    path = _RECEIPT_PATTERN.sub("/receipt/{inn}/{receipt_id}", url.split("?", 1)[0])
+    return _ID_PATTERN.sub("/{id}", path)
+
+
+class CircuitState(StrEnum):
+    """
+    Attributes:
+        closed: Запросы проходят, ошибки считаются
+        open: Запросы сразу отклоняются с ``CircuitOpenError``
+        half_open: Проходит ограниченное число пробных запросов
+    """
+
+    closed: str = "closed"
+    open: str = "open"
+    half_open: str = "half_open"
+
+
+class Circuit:
+    """
+    Состояние одной цепи: скользящее окно результатов последних запросов и счётчики.
+    """
+
+    __slots__ = (
+        "state",
+        "window",
+        "opened_until",
+        "open_for",
+        "probes",
+        "probe_successes",
+        "calls",
+        "failures",
+        "slow_calls",
+        "rejected",
+        "opened",
+    )
+
+    def __init__(self, window_size: int, open_for: float):
+        self.state: CircuitState = CircuitState.closed
+        self.window: deque[bool] = deque(maxlen=window_size)
+        self.opened_until: float = 0.0
+        self.open_for: float = open_for
+        self.probes: int = 0
+        self.probe_successes: int = 0
+        self.calls: int = 0
+        self.failures: int = 0
+        self.slow_calls: int = 0
+        self.rejected: int = 0
+        self.opened: int = 0
+
+    @property
+    def failure_rate(self) -> float:
+        if not self.window:
+            return 0.0
+        return self.window.count(False) / len(self.window)
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "state": str(self.state),
+            "failure_rate": self.failure_rate,
+            "calls": self.calls,
+            "failures": self.failures,
+            "slow_calls": self.slow_calls,
+            "rejected": self.rejected,
+            "opened": self.opened,
+            "retry_after": max(self.opened_until - monotonic(), 0.0)
+            if self.state == CircuitState.open
+            else 0.0,
+        }
+
+
+class CircuitBreaker:
+    """
+    Размыкатель цепи для запросов к ЛК НПД. Цепи ведутся отдельно для каждого эндпоинта
+    и для каждой пары эндпоинт + ИНН, запрос проходит, только если замкнуты обе.
+    Ошибки, которые могут относиться к одному ИНН, например, ``500`` и ``429``,
+    учитываются только в цепи ИНН, чтобы один проблемный ИНН не размыкал цепь для всех.
+
+    Неудачей считается исключение при запросе, ответ со статусом ``5xx`` или ``429``,
+    а также ответ медленнее ``slow_call_threshold``. Когда доля неудач в окне из последних
+    ``window_size`` запросов достигает ``failure_rate``, цепь размыкается на ``open_for`` секунд,
+    и запросы сразу завершаются ``CircuitOpenError`` вместо ожидания таймаута.
+
+    После паузы цепь становится полуоткрытой и пропускает не больше ``half_open_calls`` пробных запросов.
+    Если они успешны, цепь замыкается, иначе снова размыкается на вдвое большее время,
+    но не больше ``max_open_for``. Паузы немного случайны, чтобы цепи разных ИНН восстанавливались не одновременно.
+
+    ```python
+    npd = NPDTools(circuit_breaker=CircuitBreaker())
+    ...
+    npd.circuit_breaker.metrics()
+    ```
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window_size: int = 50,
+        slow_call_threshold: float = 5.0,
+        open_for: float = 10.0,
+        max_open_for: float = 300.0,
+        half_open_calls: int = 2,
+        jitter: float = 0.2,
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_size = window_size
+        self.slow_call_threshold = slow_call_threshold
+        self.open_for = open_for
+        self.max_open_for = max_open_for
+        self.half_open_calls = half_open_calls
+        self.jitter = jitter
+
+        self._circuits: dict[tuple[str, str | None], Circuit] = {}
+
+    def circuit(self, endpoint: str, inn: str | None = None) -> Circuit:
+        key = (endpoint, inn)
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = Circuit(self.window_size, self.open_for)
+        return circuit
+
+    def _open(self, circuit: Circuit) -> None:
+        if circuit.state == CircuitState.half_open:
+            circuit.open_for = min(circuit.open_for * 2, self.max_open_for)
+        circuit.state = CircuitState.open
+        circuit.opened += 1
+        circuit.opened_until = monotonic() + circuit.open_for * uniform(
+            1 - self.jitter, 1 + self.jitter
+        )
+
+    def _allow(self, circuit: Circuit, endpoint: str, inn: str | None) -> None:
+        if circuit.state == CircuitState.open:
+            if monotonic() < circuit.opened_until:
+                circuit.rejected += 1
+                raise CircuitOpenError(
+                    endpoint, inn, circuit.opened_until - monotonic()
+                )
+            circuit.state = CircuitState.half_open
+            circuit.probes = 0
+            circuit.probe_successes = 0
+
+        if circuit.state == CircuitState.half_open:
+            if circuit.probes >= self.half_open_calls:
+                circuit.rejected += 1
+                raise CircuitOpenError(endpoint, inn, 0.0)
+            circuit.probes += 1
+
+    def before_call(self, endpoint: str, inn: str | None = None) -> None:
+        """
+        Проверяет, можно ли отправить запрос.
+
+        Raises:
+            CircuitOpenError: Цепь эндпоинта или ИНН разомкнута
+        """
+        self._allow(self.circuit(endpoint), endpoint, None)
+        if inn is not None:
+            try:
+                self._allow(self.circuit(endpoint, inn), endpoint, inn)
+            except CircuitOpenError:
+                self._release_probe(self.circuit(endpoint))
+                raise
+
+    def _release_probe(self, circuit: Circuit) -> None:
+        if circuit.state == CircuitState.half_open and circuit.probes:
+            circuit.probes -= 1
+
+    def cancel_call(self, endpoint: str, inn: str | None = None) -> None:
+        """
+        Возвращает пробный запрос, если он был отменён и результата не будет.
+        """
+        self._release_probe(self.circuit(endpoint))
+        if inn is not None:
+            self._release_probe(self.circuit(endpoint, inn))
+
+    def _record(self, circuit: Circuit, ok: bool, slow: bool) -> None:
+        circuit.calls += 1
+        circuit.failures += not ok
+        circuit.slow_calls += slow
+        success = ok and not slow
+
+        if circuit.state == CircuitState.half_open:
+            if not success:
+                self._open(circuit)
+                return
+            circuit.probe_successes += 1
+            if circuit.probe_successes >= self.half_open_calls:
+                circuit.state = CircuitState.closed
+                circuit.open_for = self.open_for
+                circuit.window.clear()
+            return
+
+        if circuit.state == CircuitState.open:
+            # Ответ на запрос, отправленный до размыкания
+            return
+
+        circuit.window.append(success)
+        if (
+            len(circuit.window) >= self.min_calls
+            and circuit.failure_rate >= self.failure_rate
+        ):
+            self._open(circuit)
+
+    def record(
+        self,
+        endpoint: str,
+        inn: str | None,
+        ok: bool,
+        latency: float,
+        shared: bool = True,
+    ) -> None:
+        """
+        Учитывает результат запроса.
+
+        Args:
+            endpoint: Шаблон эндпоинта
+            inn: ИНН или ``None``
+            ok: Был ли запрос успешным
+            latency: Время выполнения запроса в секундах
+            shared: Учитывать ли результат в общей цепи эндпоинта. ``False`` для ошибок,
+                которые могут относиться только к этому ИНН
+        """
+        slow = latency >= self.slow_call_threshold
+        if shared or inn is None:
+            self._record(self.circuit(endpoint), ok, slow)
+        else:
+            self._release_probe(self.circuit(endpoint))
+        if inn is not None:
+            self._record(self.circuit(endpoint, inn), ok, slow)
+
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        """
+        Returns:
+            Состояние и счётчики каждой цепи. Ключ — эндпоинт или ``эндпоинт@ИНН``
+        """
+        return {
+            endpoint if inn is None else f"{endpoint}@{inn}": circuit.metrics()
+            for (endpoint, inn), circuit in self._circuits.items()
+        }
@@ -0,0 +1,105 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        # Числом, как и прежде через ujson: формат тела запроса не зависит от кодека
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} не сериализуется в JSON")
+
+
+class JSONCodec:
+    """
+    Кодек JSON для запросов, ответов и сохранения токенов. Ответы разбираются
+    сразу из ``bytes``, без декодирования в строку.
+
+    Собственный кодек наследуется от ``JSONCodec`` и передаётся в ``NPDTools(json_codec=...)``.
+    ``Decimal`` кодируется числом, ``datetime`` — строкой ISO 8601.
+
+    Attributes:
+        name: Название кодека
+    """
+
+    name: str = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(
+            value, ensure_ascii=False, separators=(",", ":"), default=_default
+        ).encode()
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    name: str = "ujson"
+
+    def __init__(self):
+        import ujson
+
+        self._ujson = ujson
+
+    def dumps(self, value: Any) -> bytes:
+        return self._ujson.dumps(
+            value, ensure_ascii=False, default=_default
+        ).encode()
+
+    def loads(self, data: bytes | str) -> Any:
+        return self._ujson.loads(data)
+
+    def __reduce__(self):
+        return UjsonCodec, ()
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Самый быстрый из кодеков. Разбирает ``bytes`` без промежуточной строки.
+    """
+
+    name: str = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps(self, value: Any) -> bytes:
+        return self._orjson.dumps(value, default=_default)
+
+    def loads(self, data: bytes | str) -> Any:
+        return self._orjson.loads(data)
+
+    def __reduce__(self):
+        return OrjsonCodec, ()
+
+
+CODECS: dict[str, type[JSONCodec]] = {
+    "orjson": OrjsonCodec,
+    "ujson": UjsonCodec,
+    "json": JSONCodec,
+}
+
+
+def get_codec(codec: JSONCodec | str | None = None) -> JSONCodec:
+    """
+    Args:
+        codec: Кодек, его название из ``CODECS`` или ``None`` для самого быстрого из установленных
+
+    Returns:
+        JSONCodec: Кодек
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec is not None:
+        return CODECS[codec]()
+    for codec_class in CODECS.values():
+        try:
+            return codec_class()
+        except ImportError:
+            continue
+    return JSONCodec()
@@ -0,0 +1,252 @@
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Hashable, Iterable
+
+from npdtools.types.entity import ClientInfo, EmployeeInfo
+from npdtools.types.income import IncomeInfo, PaymentTypes
+from npdtools.types.invoice import Invoice
+from npdtools.types.service import Service
+
+
+@dataclass(frozen=True, slots=True)
+class CompactService:
+    """
+    Неизменяемая позиция чека или счёта
+
+    Attributes:
+        name: Название позиции
+        amount: Цена единицы позиции
+        quantity: Количество
+    """
+
+    name: str
+    amount: Decimal
+    quantity: int
+
+    @property
+    def service_amount(self) -> Decimal:
+        return self.amount * self.quantity
+
+
+@dataclass(frozen=True, slots=True)
+class CompactClient:
+    """
+    Неизменяемые сведения о клиенте. Одинаковые клиенты представлены одним объектом.
+    """
+
+    inn: str | None
+    name: str | None
+    type: str
+    phone: str | None
+    email: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class CompactEmployee:
+    """
+    Неизменяемые сведения о самозанятом. Обычно один объект на ИНН.
+
+    Attributes:
+        description: Описание деятельности в виде кортежа пар ``(ключ, значение)`` для каждого элемента
+    """
+
+    inn: str
+    profession: str | None
+    description: tuple[tuple[tuple[str, Any], ...], ...] | None
+    email: str | None
+    phone: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class CompactIncome:
+    """
+    Компактное неизменяемое представление ``IncomeInfo`` без ``raw`` и ``partner_info``.
+
+    Attributes:
+        cancelled_at: Время аннулирования ``CancellationInfo.canceled_at``, если чек аннулирован
+        cancellation_tax_period: Налоговый период аннулирования
+    """
+
+    receipt_id: str
+    total_amount: Decimal
+    services: tuple[CompactService, ...]
+    name: str
+    tax_period: int | None
+    payment_type: PaymentTypes
+    created_at: datetime
+    registered_at: datetime
+    received_at: datetime
+    device_id: str | None
+    partner_code: str | None
+    client_info: CompactClient
+    employee_info: CompactEmployee
+    invoice_id: int | None
+    cancelled_at: datetime | None
+    cancellation_tax_period: int | None
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self.cancelled_at is not None
+
+
+@dataclass(frozen=True, slots=True)
+class CompactInvoice:
+    """
+    Компактное неизменяемое представление ``Invoice`` без ``raw``, ``bank``, ``acquiring_info`` и ``receipt_template``.
+    """
+
+    invoice_id: int
+    uuid: str
+    receipt_id: str | None
+    services: tuple[CompactService, ...]
+    status: str
+    payment_type: PaymentTypes
+    total_amount: Decimal
+    total_tax: Decimal
+    created_at: datetime
+    paid_at: datetime | None
+    canceled_at: datetime | None
+    client_info: CompactClient
+    employee_info: CompactEmployee
+
+    @property
+    def is_paid(self) -> bool:
+        return self.paid_at is not None
+
+    @property
+    def is_canceled(self) -> bool:
+        return self.canceled_at is not None
+
+
+class Interner:
+    """
+    Переводит модели в компактные записи и переиспользует повторяющиеся объекты:
+    строки, суммы, позиции, сведения о клиентах и самозанятых.
+
+    Один ``Interner`` стоит держать на всю выгрузку, тогда, например, сведения о самозанятом
+    будут одним объектом на все его чеки.
+
+    ```python
+    interner = Interner()
+    incomes = [interner.income(income) for income in incomes_list]
+    ```
+    """
+
+    def __init__(self):
+        self._pool: dict[Hashable, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._pool)
+
+    def _intern(self, value):
+        if value is None:
+            return None
+        try:
+            return self._pool.setdefault(value, value)
+        except TypeError:
+            return value
+
+    def amount(self, value: Decimal) -> Decimal:
+        # Decimal("0.4") == Decimal("0.40"), поэтому ключом служит строка, чтобы не терять точность
+        return self._pool.setdefault(("amount", str(value)), value)
+
+    def string(self, value: str | None) -> str | None:
+        return sys.intern(value) if value is not None else None
+
+    def service(self, service: Service) -> CompactService:
+        return self._intern(
+            CompactService(
+                name=self.string(service.name),
+                amount=self.amount(service.amount),
+                quantity=service.quantity,
+            )
+        )
+
+    def client(self, client: ClientInfo) -> CompactClient:
+        return self._intern(
+            CompactClient(
+                inn=self.string(client.inn),
+                name=self.string(client.name),
+                type=client.type,
+                phone=self.string(client.phone),
+                email=self.string(client.email),
+            )
+        )
+
+    def employee(self, employee: EmployeeInfo) -> CompactEmployee:
+        description = (
+            tuple(tuple(sorted(d.items())) for d in employee.description)
+            if employee.description is not None
+            else None
+        )
+        return self._intern(
+            CompactEmployee(
+                inn=self.string(employee.inn),
+                profession=self.string(employee.profession),
+                description=description,
+                email=self.string(employee.email),
+                phone=self.string(employee.phone),
+            )
+        )
+
+    def income(self, income: IncomeInfo) -> CompactIncome:
+        """
+        Args:
+            income: Сведения о доходе
+
+        Returns:
+            CompactIncome: Компактная запись
+        """
+        cancellation = income.cancellation_info
+        return CompactIncome(
+            receipt_id=income.receipt_id,
+            total_amount=self.amount(income.total_amount),
+            services=tuple(self.service(s) for s in income.services),
+            name=self.string(income.name),
+            tax_period=income.tax_period,
+            payment_type=income.payment_type,
+            created_at=income.created_at,
+            registered_at=income.registered_at,
+            received_at=income.received_at,
+            device_id=self.string(income.device_id),
+            partner_code=(
+                self.string(income.partner_info.code) if income.partner_info else None
+            ),
+            client_info=self.client(income.client_info),
+            employee_info=self.employee(income.employee_info),
+            invoice_id=income.invoice_id,
+            cancelled_at=cancellation.canceled_at if cancellation else None,
+            cancellation_tax_period=cancellation.tax_period if cancellation else None,
+        )
+
+    def invoice(self, invoice: Invoice) -> CompactInvoice:
+        """
+        Args:
+            invoice: Объект счёта
+
+        Returns:
+            CompactInvoice: Компактная запись
+        """
+        return CompactInvoice(
+            invoice_id=invoice.invoice_id,
+            uuid=invoice.uuid,
+            receipt_id=invoice.receipt_id,
+            services=tuple(self.service(s) for s in invoice.services),
+            status=self.string(invoice.status),
+            payment_type=invoice.payment_type,
+            total_amount=self.amount(invoice.total_amount),
+            total_tax=self.amount(invoice.total_tax),
+            created_at=invoice.created_at,
+            paid_at=invoice.paid_at,
+            canceled_at=invoice.canceled_at,
+            client_info=self.client(invoice.client_info),
+            employee_info=self.employee(invoice.employee_info),
+        )
+
+    def incomes(self, incomes: Iterable[IncomeInfo]) -> list[CompactIncome]:
+        return [self.income(income) for income in incomes]
+
+    def invoices(self, invoices: Iterable[Invoice]) -> list[CompactInvoice]:
+        return [self.invoice(invoice) for invoice in invoices]
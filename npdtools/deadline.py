@@ -0,0 +1,77 @@
+import asyncio
+from contextvars import ContextVar
+
+from npdtools.errors import DeadlineExceededError
+
+_deadline: ContextVar[float | None] = ContextVar("npdtools_deadline", default=None)
+
+
+def remaining_time() -> float | None:
+    """
+    Returns:
+        float | None: Сколько секунд осталось до срока текущей операции или ``None``, если срок не задан
+    """
+    when = _deadline.get()
+    if when is None:
+        return None
+    return when - asyncio.get_running_loop().time()
+
+
+def check_deadline() -> None:
+    """
+    Raises:
+        DeadlineExceededError: Срок текущей операции уже истёк
+    """
+    left = remaining_time()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError(0.0)
+
+
+def clear_deadline() -> None:
+    """
+    Снимает срок в текущем контексте. Используется в фоновых задачах,
+    которые не должны прерываться вместе с запустившим их вызовом.
+    """
+    _deadline.set(None)
+
+
+class Deadline:
+    """
+    Общий срок для всех запросов внутри блока, включая неявное обновление токена.
+
+    Вложенные сроки не могут продлить внешний: действует наименьший.
+    По истечении срока ожидающий запрос отменяется и поднимается ``DeadlineExceededError``.
+
+    ```python
+    async with npd.deadline(1.5):
+        income = await npd.declare_income(service)
+    ```
+
+    Attributes:
+        timeout: Срок в секундах
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._token = None
+        self._timeout: asyncio.Timeout | None = None
+
+    async def __aenter__(self):
+        when = asyncio.get_running_loop().time() + self.timeout
+        outer = _deadline.get()
+        if outer is not None:
+            when = min(when, outer)
+        self._token = _deadline.set(when)
+        self._timeout = asyncio.timeout_at(when)
+        await self._timeout.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        _deadline.reset(self._token)
+        try:
+            await self._timeout.__aexit__(exc_type, exc, tb)
+        except TimeoutError as e:
+            if isinstance(e, DeadlineExceededError):
+                raise
+            raise DeadlineExceededError(self.timeout) from e
+        return False
@@ -0,0 +1,24 @@
+class CircuitOpenError(Exception):
+    """
+    Запрос не отправлен, потому что цепь для эндпоинта или ИНН разомкнута:
+    ЛК НПД недавно отвечал ошибками или слишком медленно.
+
+    Attributes:
+        endpoint: Эндпоинт, например, ``/invoice/{id}/cancel``
+        inn: ИНН, для которого разомкнута цепь, или ``None``, если разомкнута цепь всего эндпоинта
+        retry_after: Через сколько секунд цепь перейдёт в полуоткрытое состояние
+    """
+
+    __module__ = "npdtools"
+
+    def __init__(self, endpoint: str, inn: str | None, retry_after: float):
+        self.endpoint = endpoint
+        self.inn = inn
+        self.retry_after = retry_after
+        target = f"{endpoint} для ИНН {inn}" if inn else endpoint
+        super().__init__(
+            f"Цепь {target} разомкнута, повторите через {retry_after:.1f} с"
+        )
+
+    def __reduce__(self):
+        return self.__class__, (self.endpoint, self.inn, self.retry_after)
@@ -0,0 +1,16 @@
+class DeadlineExceededError(TimeoutError):
+    """
+    Операция не уложилась в срок, заданный через ``NPDTools.deadline``.
+
+    Attributes:
+        timeout: Срок операции в секундах
+    """
+
+    __module__ = "npdtools"
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        super().__init__(f"Операция не уложилась в {timeout:g} с")
+
+    def __reduce__(self):
+        return self.__class__, (self.timeout,)
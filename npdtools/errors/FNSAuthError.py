@@ -0,0 +1,9 @@
+from npdtools.errors.FNSError import FNSError
+
+
+class FNSAuthError(FNSError):
+    """
+    Ошибка авторизации: неверный логин, пароль или токен, либо нет доступа (HTTP 401, 403).
+    """
+
+    __module__ = "npdtools"
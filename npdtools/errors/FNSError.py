@@ -1,16 +1,70 @@
-import json
+from typing import TYPE_CHECKING, Any
 
-from httpx._models import Response
+from npdtools.codec import JSONCodec
+
+if TYPE_CHECKING:
+    from httpx import Response
 
 
 class FNSError(Exception):
+    """
+    Ошибка, которую вернул ЛК НПД. Базовый класс для всех ошибок ФНС.
+
+    Тело ответа разбирается только при обращении к ``r_json``, ``code`` или ``message``.
+
+    Attributes:
+        status_code: HTTP статус ответа
+        codec: Кодек JSON клиента для разбора тела ответа
+        retryable: Имеет ли смысл повторить запрос позже
+    """
+
     __module__ = "npdtools"
+    retryable: bool = False
 
-    def __init__(self, response: Response):
+    def __init__(
+        self,
+        response: "Response",
+        r_json: Any = None,
+        codec: JSONCodec | None = None,
+    ):
+        self.response = response
         self.status_code = response.status_code
-        try:
-            self.r_json = response.json()
-            self.message = f"#{self.r_json['code']}: {self.r_json['message']}"
-        except json.decoder.JSONDecodeError:
-            self.message = response.text
-        super().__init__(f"Ooops. HTTP_{self.status_code}. {self.message}")
+        self.codec = codec or JSONCodec()
+        self._r_json = r_json
+        super().__init__(response.status_code)
+
+    def __reduce__(self):
+        # Для передачи между процессами: у подклассов тот же конструктор
+        return self.__class__, (self.response, self._r_json, self.codec)
+
+    @property
+    def r_json(self) -> Any:
+        """
+        Returns:
+            Тело ответа ФНС или ``None``, если это не JSON
+        """
+        if self._r_json is None:
+            try:
+                self._r_json = self.codec.loads(self.response.content)
+            except ValueError:
+                self._r_json = False
+        return self._r_json or None
+
+    @property
+    def code(self) -> str | None:
+        """
+        Returns:
+            str | None: Код ошибки ФНС, например, ``authentication.failed``
+        """
+        r_json = self.r_json
+        return r_json.get("code") if isinstance(r_json, dict) else None
+
+    @property
+    def message(self) -> str:
+        r_json = self.r_json
+        if isinstance(r_json, dict) and "message" in r_json:
+            return f"#{r_json.get('code')}: {r_json['message']}"
+        return self.response.text
+
+    def __str__(self) -> str:
+        return f"Ooops. HTTP_{self.status_code}. {self.message}"
@@ -0,0 +1,9 @@
+from npdtools.errors.FNSValidationError import FNSValidationError
+
+
+class FNSLimitExceededError(FNSValidationError):
+    """
+    ЛК НПД отклонил чек из-за превышения лимита дохода за год.
+    """
+
+    __module__ = "npdtools"
@@ -0,0 +1,9 @@
+from npdtools.errors.FNSError import FNSError
+
+
+class FNSNotFoundError(FNSError):
+    """
+    Чек, счёт или другой объект не найден (HTTP 404).
+    """
+
+    __module__ = "npdtools"
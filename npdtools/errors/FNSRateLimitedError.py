@@ -0,0 +1,20 @@
+from npdtools.errors.FNSError import FNSError
+
+
+class FNSRateLimitedError(FNSError):
+    """
+    ЛК НПД ограничил частоту запросов (HTTP 429).
+
+    Attributes:
+        retry_after: Через сколько секунд повторить запрос по заголовку ``Retry-After``, если он есть
+    """
+
+    __module__ = "npdtools"
+    retryable = True
+
+    @property
+    def retry_after(self) -> float | None:
+        try:
+            return float(self.response.headers["Retry-After"])
+        except (KeyError, ValueError):
+            return None
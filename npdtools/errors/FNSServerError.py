@@ -0,0 +1,10 @@
+from npdtools.errors.FNSError import FNSError
+
+
+class FNSServerError(FNSError):
+    """
+    Ошибка на стороне ЛК НПД (HTTP 5xx). Запрос можно повторить позже.
+    """
+
+    __module__ = "npdtools"
+    retryable = True
@@ -0,0 +1,9 @@
+from npdtools.errors.FNSAuthError import FNSAuthError
+
+
+class FNSTokenExpiredError(FNSAuthError):
+    """
+    Access-токен истёк или отозван. Помогает обновление токена через ``auth``.
+    """
+
+    __module__ = "npdtools"
@@ -0,0 +1,9 @@
+from npdtools.errors.FNSError import FNSError
+
+
+class FNSValidationError(FNSError):
+    """
+    ЛК НПД отклонил данные запроса (HTTP 400, 422).
+    """
+
+    __module__ = "npdtools"
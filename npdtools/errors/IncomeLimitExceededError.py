@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+
+class IncomeLimitExceededError(Exception):
+    """
+    Чек не отправлен: с ним доход за год превысит лимит для самозанятых.
+
+    Attributes:
+        inn: ИНН самозанятого
+        year: Год получения дохода
+        total: Доход за год с учётом отправляемых сейчас чеков
+        amount: Сумма чека
+        limit: Лимит дохода за год
+    """
+
+    __module__ = "npdtools"
+
+    def __init__(
+        self, inn: str, year: int, total: Decimal, amount: Decimal, limit: Decimal
+    ):
+        self.inn = inn
+        self.year = year
+        self.total = total
+        self.amount = amount
+        self.limit = limit
+        super().__init__(
+            f"Доход ИНН {inn} за {year} год {total} + {amount} превысит лимит {limit}"
+        )
+
+    def __reduce__(self):
+        return self.__class__, (
+            self.inn,
+            self.year,
+            self.total,
+            self.amount,
+            self.limit,
+        )
@@ -0,0 +1,12 @@
+class QueueClosedError(Exception):
+    """
+    Очередь закрыта: в неё больше нельзя писать, а при чтении все элементы уже выбраны.
+    """
+
+    __module__ = "npdtools"
+
+    def __init__(self):
+        super().__init__("Очередь закрыта")
+
+    def __reduce__(self):
+        return self.__class__, ()
@@ -1 +1,13 @@
+from npdtools.errors.CircuitOpenError import CircuitOpenError
+from npdtools.errors.DeadlineExceededError import DeadlineExceededError
+from npdtools.errors.FNSAuthError import FNSAuthError
 from npdtools.errors.FNSError import FNSError
+from npdtools.errors.FNSLimitExceededError import FNSLimitExceededError
+from npdtools.errors.FNSNotFoundError import FNSNotFoundError
+from npdtools.errors.FNSRateLimitedError import FNSRateLimitedError
+from npdtools.errors.FNSServerError import FNSServerError
+from npdtools.errors.FNSTokenExpiredError import FNSTokenExpiredError
+from npdtools.errors.FNSValidationError import FNSValidationError
+from npdtools.errors.IncomeLimitExceededError import IncomeLimitExceededError
+from npdtools.errors.QueueClosedError import QueueClosedError
+from npdtools.errors.classification import error_for, raise_for_response
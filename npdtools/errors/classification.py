@@ -0,0 +1,77 @@
+from typing import TYPE_CHECKING
+
+from npdtools.codec import JSONCodec
+from npdtools.errors.FNSAuthError import FNSAuthError
+from npdtools.errors.FNSError import FNSError
+from npdtools.errors.FNSLimitExceededError import FNSLimitExceededError
+from npdtools.errors.FNSNotFoundError import FNSNotFoundError
+from npdtools.errors.FNSRateLimitedError import FNSRateLimitedError
+from npdtools.errors.FNSServerError import FNSServerError
+from npdtools.errors.FNSTokenExpiredError import FNSTokenExpiredError
+from npdtools.errors.FNSValidationError import FNSValidationError
+
+if TYPE_CHECKING:
+    from httpx import Response
+
+# Статусы, по которым класс ошибки понятен без разбора тела ответа
+STATUS_ERRORS: dict[int, type[FNSError]] = {
+    404: FNSNotFoundError,
+    429: FNSRateLimitedError,
+}
+
+# Статусы, для которых класс уточняется по коду ошибки ФНС из тела ответа
+STATUS_DEFAULTS: dict[int, type[FNSError]] = {
+    400: FNSValidationError,
+    401: FNSAuthError,
+    403: FNSAuthError,
+    422: FNSValidationError,
+}
+
+# Коды ошибок ФНС. Таблицу можно дополнять
+CODE_ERRORS: dict[str, type[FNSError]] = {
+    "authentication.failed": FNSAuthError,
+    "token.expired": FNSTokenExpiredError,
+    "token.invalid": FNSTokenExpiredError,
+    "refresh.token.not.found": FNSAuthError,
+    "receipt.income.limit.exceeded": FNSLimitExceededError,
+    "income.limit.exceeded": FNSLimitExceededError,
+    "validation.failed": FNSValidationError,
+    "receipt.not.found": FNSNotFoundError,
+    "too.many.requests": FNSRateLimitedError,
+}
+
+
+def error_for(response: "Response", codec: JSONCodec | None = None) -> FNSError:
+    """
+    Подбирает класс ошибки по HTTP статусу, а если его недостаточно, по коду ошибки ФНС.
+
+    Args:
+        response: Ответ ЛК НПД с неуспешным статусом
+        codec: Кодек JSON клиента для разбора тела ответа
+
+    Returns:
+        FNSError: Исключение подходящего класса
+    """
+    status = response.status_code
+    error_class = STATUS_ERRORS.get(status)
+    if error_class is not None:
+        return error_class(response, codec=codec)
+    if status >= 500:
+        return FNSServerError(response, codec=codec)
+
+    error = FNSError(response, codec=codec)
+    error_class = CODE_ERRORS.get(error.code) or STATUS_DEFAULTS.get(status, FNSError)
+    if error_class is FNSError:
+        return error
+    return error_class(response, error.r_json, codec)
+
+
+def raise_for_response(
+    response: "Response", codec: JSONCodec | None = None
+) -> None:
+    """
+    Raises:
+        FNSError: Ответ со статусом не из ``2xx``
+    """
+    if not 200 <= response.status_code < 300:
+        raise error_for(response, codec)
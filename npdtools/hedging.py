@@ -0,0 +1,113 @@
+from collections import deque
+from typing import Any
+
+
+class HedgePolicy:
+    """
+    Политика дублирования идемпотентных запросов на чтение для сокращения хвостов задержки.
+
+    Если запрос не получил ответ за ``percentile`` наблюдаемых задержек его эндпоинта,
+    отправляется второй такой же запрос, и используется тот ответ, который придёт первым.
+    Пока по эндпоинту меньше ``min_samples`` замеров, запросы не дублируются.
+
+    Общий бюджет не даёт дублированию увеличить нагрузку больше чем на ``budget``:
+    каждый обычный запрос добавляет в бюджет ``budget`` дубля, каждый дубль расходует один.
+
+    ```python
+    npd = NPDTools(hedging=HedgePolicy(budget=0.05))
+    ...
+    npd.hedging.metrics()
+    ```
+
+    Attributes:
+        budget: Допустимая доля дублей относительно обычных запросов
+        percentile: Перцентиль задержки, после которого отправляется дубль
+        min_samples: Минимальное количество замеров эндпоинта для дублирования
+        window_size: Сколько последних замеров учитывать
+        min_delay: Минимальная задержка перед дублем в секундах
+        max_burst: Сколько дублей может накопиться в бюджете
+    """
+
+    def __init__(
+        self,
+        budget: float = 0.05,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        window_size: int = 200,
+        min_delay: float = 0.05,
+        max_burst: float = 10.0,
+    ):
+        self.budget = budget
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window_size = window_size
+        self.min_delay = min_delay
+        self.max_burst = max_burst
+
+        self._latencies: dict[str, deque[float]] = {}
+        self._tokens: float = 0.0
+        self.requests: int = 0
+        self.hedges: int = 0
+        self.hedge_wins: int = 0
+
+    def record(self, endpoint: str, latency: float) -> None:
+        """
+        Учитывает задержку ответа на запрос к эндпоинту.
+        """
+        latencies = self._latencies.get(endpoint)
+        if latencies is None:
+            latencies = self._latencies[endpoint] = deque(maxlen=self.window_size)
+        latencies.append(latency)
+
+    def delay(self, endpoint: str) -> float | None:
+        """
+        Учитывает новый запрос в бюджете.
+
+        Returns:
+            float | None: Через сколько секунд отправлять дубль или ``None``, если замеров ещё мало
+        """
+        self.requests += 1
+        self._tokens = min(self._tokens + self.budget, self.max_burst)
+        return self.delay_of(endpoint)
+
+    def try_hedge(self) -> bool:
+        """
+        Расходует один дубль из бюджета.
+
+        Returns:
+            bool: Можно ли отправить дубль
+        """
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        self.hedges += 1
+        return True
+
+    def metrics(self) -> dict[str, Any]:
+        """
+        Returns:
+            Количество запросов, дублей и выигравших дублей, а также текущие задержки дублирования по эндпоинтам
+        """
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "budget_left": self._tokens,
+            "delays": {
+                endpoint: self.delay_of(endpoint) for endpoint in self._latencies
+            },
+        }
+
+    def delay_of(self, endpoint: str) -> float | None:
+        """
+        Returns:
+            float | None: Текущая задержка дублирования эндпоинта или ``None``, если замеров ещё мало
+        """
+        latencies = self._latencies.get(endpoint)
+        if latencies is None or len(latencies) < self.min_samples:
+            return None
+        ordered = sorted(latencies)
+        return max(
+            ordered[min(int(len(ordered) * self.percentile), len(ordered) - 1)],
+            self.min_delay,
+        )
@@ -1,5 +1,129 @@
+import asyncio
 from decimal import Decimal
+from enum import StrEnum
+from time import monotonic
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+from pydantic import ValidationInfo
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 def amount_to_decimal(amount: int | float | str) -> Decimal:
     return Decimal(str(amount)).quantize(Decimal("0.00"))
+
+
+class RawPolicy(StrEnum):
+    """
+    Как моделям хранить необработанный ответ ФНС в поле ``raw``
+
+    Attributes:
+        off: Не хранить, ``raw`` будет ``None``
+        reference: Хранить ссылку на исходный словарь из ответа, без копирования
+        copy: Хранить отдельную копию словаря
+    """
+
+    off: str = "off"
+    reference: str = "reference"
+    copy: str = "copy"
+
+
+def with_raw(values: dict[str, Any], info: ValidationInfo) -> dict[str, Any]:
+    """
+    Готовит входные данные модели к нормализации: возвращает новый словарь,
+    чтобы не портить исходный, и кладёт в ``raw`` ответ ФНС согласно ``RawPolicy`` из контекста валидации.
+    """
+    policy = (info.context or {}).get("raw_policy", RawPolicy.off)
+    if policy == RawPolicy.reference:
+        raw = values
+    elif policy == RawPolicy.copy:
+        raw = values.copy()
+    else:
+        raw = None
+
+    return {**values, "raw": raw}
+
+
+class RateLimiter:
+    """
+    Простой ограничитель частоты запросов: не больше ``rate`` вызовов в секунду.
+
+    Attributes:
+        rate: Количество разрешённых вызовов в секунду
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._interval = 1 / rate
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = monotonic()
+            if self._next_at > now:
+                await asyncio.sleep(self._next_at - now)
+                now = self._next_at
+            self._next_at = now + self._interval
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+
+async def aiterate(items: Iterable[T] | AsyncIterable[T]) -> AsyncIterator[T]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def gather_bounded(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T] | AsyncIterable[T],
+    limit: int,
+) -> list[R | Exception]:
+    """
+    Выполняет ``func`` для каждого элемента, но не больше ``limit`` одновременно.
+    Элементы читаются из источника только по мере освобождения места,
+    поэтому источник может быть ленивым или бесконечно большим генератором.
+
+    Args:
+        func: Корутина, вызываемая для каждого элемента
+        items: Итерируемый или асинхронно итерируемый набор элементов
+        limit: Максимальное количество одновременных вызовов
+
+    Returns:
+        Результаты в порядке элементов. Вместо результата упавшего вызова — его исключение
+    """
+    semaphore = asyncio.Semaphore(limit)
+    results: list[R | Exception | None] = []
+    tasks: set[asyncio.Task] = set()
+
+    async def run(index: int, item: T):
+        try:
+            results[index] = await func(item)
+        except Exception as e:
+            results[index] = e
+        finally:
+            semaphore.release()
+
+    try:
+        async for item in aiterate(items):
+            await semaphore.acquire()
+            results.append(None)
+            task = asyncio.create_task(run(len(results) - 1, item))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return results
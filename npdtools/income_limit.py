@@ -0,0 +1,230 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterable
+
+from npdtools.errors import IncomeLimitExceededError
+from npdtools.timeutils import now, to_local
+from npdtools.types.bulk import BulkResult
+
+if TYPE_CHECKING:
+    from npdtools.modules.income import NPDToolsIncome
+
+ANNUAL_INCOME_LIMIT: Decimal = Decimal("2400000")
+
+
+class IncomeLimitGuard:
+    """
+    Проверяет лимит дохода самозанятого за год до отправки чека, а не после отказа ФНС.
+
+    Для каждой пары ИНН и год ведётся сумма уже выданных чеков за вычетом аннулированных
+    и сумма чеков, отправляемых прямо сейчас. Сумма за год один раз загружается
+    через ``iter_incomes``, дальше обновляется при каждой выдаче и аннулировании через клиент.
+
+    Загрузка — это просмотр всех чеков за год, поэтому её лучше выполнить заранее через ``warm_up``.
+    Если год ИНН не загружен к первому чеку, загрузка запускается в фоне, а пока она идёт,
+    чеки этого ИНН отправляются без проверки лимита (или ждут загрузки при ``wait_for_seed``).
+    Чеки и аннулирования, прошедшие во время загрузки, учитываются после её окончания.
+
+    Резервирование суммы чека и проверка лимита выполняются без ``await`` между ними,
+    поэтому одновременные чеки одного ИНН не могут вместе превысить лимит.
+
+    ```python
+    npd = NPDTools(income_guard=IncomeLimitGuard())
+    await npd.income_guard.warm_up(npd, inns)
+    ```
+
+    Warning: Чеки из других источников
+        Чеки, выданные в обход клиента, например, в приложении "Мой налог", учитываются
+        только при следующей загрузке через ``seed``.
+
+    Attributes:
+        limit: Лимит дохода за год
+        reject: Не отправлять чек, превышающий лимит. Если ``False``, чек отправляется,
+            а превышение передаётся в ``on_exceeded``
+        on_exceeded: Функция ``(inn, year, total, amount)``, вызываемая при превышении лимита
+        wait_for_seed: Ждать загрузки года перед первым чеком ИНН, а не отправлять его без проверки
+    """
+
+    def __init__(
+        self,
+        limit: Decimal = ANNUAL_INCOME_LIMIT,
+        reject: bool = True,
+        on_exceeded: Callable[[str, int, Decimal, Decimal], None] | None = None,
+        wait_for_seed: bool = False,
+    ):
+        self.limit = limit
+        self.reject = reject
+        self.on_exceeded = on_exceeded
+        self.wait_for_seed = wait_for_seed
+
+        self._totals: dict[tuple[str, int], Decimal] = {}
+        self._reserved: dict[tuple[str, int], Decimal] = {}
+        self._seeding: dict[tuple[str, int], asyncio.Task] = {}
+        # Изменения, пришедшие во время загрузки года: (номер чека, сумма со знаком)
+        self._pending: dict[tuple[str, int], list[tuple[str | None, Decimal]]] = {}
+
+    def total(self, inn: str, year: int) -> Decimal | None:
+        """
+        Returns:
+            Decimal | None: Доход за год с учётом отправляемых чеков или ``None``, если год ещё не загружен
+        """
+        total = self._totals.get((inn, year))
+        if total is None:
+            return None
+        return total + self._reserved.get((inn, year), Decimal(0))
+
+    def remaining(self, inn: str, year: int) -> Decimal | None:
+        """
+        Returns:
+            Decimal | None: Сколько ещё можно получить в этом году или ``None``, если год ещё не загружен
+        """
+        total = self.total(inn, year)
+        return None if total is None else self.limit - total
+
+    async def seed(self, npd: "NPDToolsIncome", inn: str, year: int) -> Decimal:
+        """
+        Загружает доход ИНН за год: сумму чеков за вычетом аннулированных.
+
+        Returns:
+            Decimal: Доход за год
+        """
+        key = (inn, year)
+        pending = self._pending.setdefault(key, [])
+        # Чеки, зарегистрированные после начала загрузки, придут через pending
+        started = now()
+        start = datetime(year, 1, 1)
+        end = datetime(year, 12, 31, 23, 59, 59, 999999)
+        total = Decimal(0)
+        cancelled = set()
+        try:
+            async for income in npd.iter_incomes(
+                from_date=to_local(start),
+                to_date=to_local(end),
+                page_size=1000,
+                inn=inn,
+            ):
+                if income.registered_at > started:
+                    continue
+                if income.cancellation_info is None:
+                    total += income.total_amount
+                else:
+                    cancelled.add(income.receipt_id)
+        finally:
+            if self._pending.get(key) is pending:
+                del self._pending[key]
+
+        for receipt_id, amount in pending:
+            # Аннулирование, которое загрузка уже увидела
+            if amount < 0 and receipt_id in cancelled:
+                continue
+            total += amount
+        self._totals[key] = total
+        return total
+
+    def _seed_task(self, npd: "NPDToolsIncome", inn: str, year: int) -> asyncio.Task:
+        key = (inn, year)
+        task = self._seeding.get(key)
+        if task is None:
+            task = self._seeding[key] = asyncio.create_task(self.seed(npd, inn, year))
+
+            def done(task: asyncio.Task) -> None:
+                self._seeding.pop(key, None)
+                if not task.cancelled():
+                    task.exception()
+
+            task.add_done_callback(done)
+        return task
+
+    async def warm_up(
+        self,
+        npd: "NPDToolsIncome",
+        inns: Iterable[str],
+        year: int | None = None,
+        concurrency: int = 5,
+    ) -> list[BulkResult]:
+        """
+        Заранее загружает доход за год для каждого ИНН, чтобы первый чек не ждал загрузки
+        и сразу проверялся. Уже загруженные ИНН не загружаются повторно.
+
+        Args:
+            npd: Клиент
+            inns: ИНН самозанятых
+            year: Год. По умолчанию текущий
+            concurrency: Сколько ИНН загружать одновременно
+
+        Returns:
+            list[BulkResult]: Результаты по каждому ИНН, в ``result`` доход за год
+        """
+        year = year or now().year
+
+        async def load(inn: str) -> Decimal:
+            if (inn, year) not in self._totals:
+                await asyncio.shield(self._seed_task(npd, inn, year))
+            return self._totals[(inn, year)]
+
+        return await npd._run_bulk(load, inns, concurrency)
+
+    @asynccontextmanager
+    async def reserve(
+        self, npd: "NPDToolsIncome", inn: str, year: int, amount: Decimal
+    ) -> AsyncIterator[None]:
+        """
+        Резервирует сумму чека на время его отправки. Если блок завершился без ошибки,
+        сумма добавляется к доходу за год, иначе резерв снимается.
+
+        Raises:
+            IncomeLimitExceededError: Чек превысит лимит, а ``reject`` включён
+        """
+        key = (inn, year)
+        if key not in self._totals:
+            task = self._seed_task(npd, inn, year)
+            if self.wait_for_seed:
+                await asyncio.shield(task)
+            else:
+                yield
+                self._unchecked(key, amount)
+                return
+
+        total = self.total(inn, year)
+        if total + amount > self.limit:
+            if self.on_exceeded is not None:
+                self.on_exceeded(inn, year, total, amount)
+            if self.reject:
+                raise IncomeLimitExceededError(inn, year, total, amount, self.limit)
+
+        self._reserved[key] = self._reserved.get(key, Decimal(0)) + amount
+        try:
+            yield
+        except BaseException:
+            self._reserved[key] -= amount
+            raise
+        self._reserved[key] -= amount
+        self._totals[key] += amount
+
+    def _unchecked(self, key: tuple[str, int], amount: Decimal) -> None:
+        # Чек выдан без проверки, пока год не был загружен
+        if key in self._totals:
+            self._totals[key] += amount
+        elif key in self._pending:
+            self._pending[key].append((None, amount))
+
+    def cancelled(
+        self, inn: str, year: int, amount: Decimal, receipt_id: str | None = None
+    ) -> None:
+        """
+        Учитывает аннулированный чек.
+
+        Args:
+            inn: ИНН самозанятого
+            year: Год получения дохода по чеку
+            amount: Сумма чека
+            receipt_id: Номер чека. Нужен, чтобы не учесть аннулирование дважды,
+                если оно пришло во время загрузки года
+        """
+        key = (inn, year)
+        if key in self._totals:
+            self._totals[key] -= amount
+        elif key in self._pending:
+            self._pending[key].append((receipt_id, -amount))
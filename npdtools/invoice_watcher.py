@@ -0,0 +1,204 @@
+import asyncio
+import inspect
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable
+
+from npdtools.timeutils import now
+from npdtools.types.invoice import Invoice, InvoiceStatusChange
+
+if TYPE_CHECKING:
+    from npdtools.modules.invoice import NPDToolsInvoice
+
+FINAL_STATUSES: frozenset[str] = frozenset({"CANCELLED", "PAID_WITH_RECEIPT"})
+
+
+class InvoiceWatcher:
+    """
+    Следит за изменением статуса открытых счетов одного ИНН.
+
+    Хранит только открытые счета и опрашивает ``/invoice/table`` узкими окнами по ``createdAt``:
+    близкие по времени создания счета объединяются в одно окно, а промежутки между ними не запрашиваются.
+    Поэтому стоимость опроса зависит от количества открытых счетов, а не от всей истории.
+
+    Интервал опроса адаптивный: после изменений он сбрасывается до ``min_interval``,
+    а пока ничего не меняется, растёт вдвое до ``max_interval``.
+
+    Счёт перестаёт отслеживаться, когда переходит в один из ``FINAL_STATUSES``.
+
+    Attributes:
+        npd: Клиент, через который запрашиваются счета
+        inn: ИНН самозанятого. По умолчанию ``default_inn`` клиента
+        min_interval: Минимальный интервал между опросами в секундах
+        max_interval: Максимальный интервал между опросами в секундах
+        window_gap: Если между счетами больше этого времени, они опрашиваются разными окнами
+        page_size: Количество счетов на одной странице запроса
+        interval: Текущий интервал между опросами
+    """
+
+    def __init__(
+        self,
+        npd: "NPDToolsInvoice",
+        inn: str | None = None,
+        min_interval: float = 5,
+        max_interval: float = 120,
+        window_gap: timedelta = timedelta(hours=6),
+        page_size: int = 100,
+    ):
+        self.npd = npd
+        self.inn = inn
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.window_gap = window_gap
+        self.page_size = page_size
+        self.interval = min_interval
+
+        self._invoices: dict[int, Invoice] = {}
+        self._callbacks: list[
+            Callable[[InvoiceStatusChange], Awaitable[None] | None]
+        ] = []
+
+    def __len__(self) -> int:
+        return len(self._invoices)
+
+    def __contains__(self, invoice_id: int) -> bool:
+        return invoice_id in self._invoices
+
+    def watch(self, *invoices: Invoice) -> None:
+        """
+        Добавляет счета в отслеживание. Счета в финальном статусе игнорируются.
+
+        Args:
+            *invoices: Объекты счетов, например, из ``create_invoice`` или ``get_invoices``
+        """
+        for invoice in invoices:
+            if invoice.status not in FINAL_STATUSES:
+                self._invoices[invoice.invoice_id] = invoice
+
+    def unwatch(self, invoice_id: int) -> None:
+        self._invoices.pop(invoice_id, None)
+
+    def on_change(
+        self, callback: Callable[[InvoiceStatusChange], Awaitable[None] | None]
+    ) -> Callable[[InvoiceStatusChange], Awaitable[None] | None]:
+        """
+        Регистрирует обработчик изменений. Можно использовать как декоратор.
+
+        Args:
+            callback: Функция или корутина, принимающая ``InvoiceStatusChange``
+        """
+        self._callbacks.append(callback)
+        return callback
+
+    async def discover(self, from_date: datetime | int = 30) -> int:
+        """
+        Один раз пролистывает все счета за период и добавляет открытые в отслеживание.
+
+        Args:
+            from_date: Время начала поиска или количество дней назад
+
+        Returns:
+            int: Количество добавленных счетов
+        """
+        before = len(self._invoices)
+        async for invoice in self.npd.iter_invoices(
+            from_date=from_date,
+            to_date=now(),
+            page_size=self.page_size,
+            inn=self.inn,
+        ):
+            self.watch(invoice)
+        return len(self._invoices) - before
+
+    def _windows(self) -> list[tuple[datetime, datetime, set[int]]]:
+        invoices = sorted(self._invoices.values(), key=lambda i: i.created_at)
+        windows: list[tuple[datetime, datetime, set[int]]] = []
+        for invoice in invoices:
+            if windows and invoice.created_at - windows[-1][1] <= self.window_gap:
+                start, _, ids = windows[-1]
+                windows[-1] = (start, invoice.created_at, ids | {invoice.invoice_id})
+            else:
+                windows.append(
+                    (invoice.created_at, invoice.created_at, {invoice.invoice_id})
+                )
+        return windows
+
+    async def _poll_window(
+        self, start: datetime, end: datetime, ids: set[int]
+    ) -> list[InvoiceStatusChange]:
+        changes = []
+        invoices = self.npd.iter_invoices(
+            from_date=start - timedelta(seconds=1),
+            to_date=end + timedelta(seconds=1),
+            page_size=self.page_size,
+            inn=self.inn,
+        )
+        try:
+            async for invoice in invoices:
+                known = self._invoices.get(invoice.invoice_id)
+                if invoice.invoice_id not in ids or known is None:
+                    continue
+                ids.discard(invoice.invoice_id)
+                if invoice.status != known.status:
+                    changes.append(
+                        InvoiceStatusChange(
+                            invoice=invoice,
+                            old_status=known.status,
+                            new_status=invoice.status,
+                        )
+                    )
+                if invoice.status in FINAL_STATUSES:
+                    self._invoices.pop(invoice.invoice_id, None)
+                else:
+                    self._invoices[invoice.invoice_id] = invoice
+                if not ids:
+                    break
+        finally:
+            await invoices.aclose()
+        return changes
+
+    async def poll(self) -> list[InvoiceStatusChange]:
+        """
+        Один проход опроса всех открытых счетов. Вызывает зарегистрированные обработчики.
+
+        Returns:
+            list[InvoiceStatusChange]: Изменения с прошлого опроса
+        """
+        changes = []
+        for start, end, ids in self._windows():
+            changes += await self._poll_window(start, end, ids)
+
+        for change in changes:
+            for callback in self._callbacks:
+                result = callback(change)
+                if inspect.isawaitable(result):
+                    await result
+
+        if changes:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+
+        return changes
+
+    async def __aiter__(self) -> AsyncIterator[InvoiceStatusChange]:
+        """
+        Опрашивает счета, пока есть открытые, и отдаёт изменения по мере их появления.
+
+        ```python
+        async for change in InvoiceWatcher(npd):
+            if change.new_status == "PAID_WITHOUT_RECEIPT":
+                await npd.invoice_complete(change.invoice_id)
+        ```
+        """
+        while self._invoices:
+            for change in await self.poll():
+                yield change
+            if self._invoices:
+                await asyncio.sleep(self.interval)
+
+    async def run(self) -> None:
+        """
+        Опрашивает счета, пока есть открытые. Изменения получают только обработчики из ``on_change``.
+        """
+        async for _ in self:
+            pass
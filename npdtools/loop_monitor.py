@@ -0,0 +1,88 @@
+import asyncio
+from collections import deque
+from time import monotonic
+from typing import Any
+
+
+class LoopMonitor:
+    """
+    Измеряет задержки цикла событий: как долго синхронный код, например, разбор большого ответа,
+    не давал циклу выполнять другие задачи.
+
+    Раз в ``interval`` секунд задача засыпает и сравнивает фактическое время пробуждения с ожидаемым.
+    Разница — время, на которое цикл был занят.
+
+    ```python
+    async with LoopMonitor() as monitor:
+        ...
+        print(monitor.metrics())
+    ```
+
+    Attributes:
+        interval: Период замеров в секундах
+        stall_threshold: Задержка, начиная с которой замер считается зависанием
+        window_size: Сколько последних замеров хранить для перцентилей
+        max_stall: Наибольшая задержка с момента запуска
+        stalls: Количество зависаний
+        stall_time: Суммарное время зависаний в секундах
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.05,
+        stall_threshold: float = 0.02,
+        window_size: int = 1000,
+    ):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.lags: deque[float] = deque(maxlen=window_size)
+        self.max_stall: float = 0.0
+        self.stalls: int = 0
+        self.stall_time: float = 0.0
+
+        self._task: asyncio.Task | None = None
+
+    def record(self, lag: float) -> None:
+        self.lags.append(lag)
+        self.max_stall = max(self.max_stall, lag)
+        if lag >= self.stall_threshold:
+            self.stalls += 1
+            self.stall_time += lag
+
+    async def run(self) -> None:
+        while True:
+            expected = monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(monotonic() - expected, 0.0))
+
+    def metrics(self) -> dict[str, Any]:
+        """
+        Returns:
+            Наибольшая задержка, 99-й перцентиль последних замеров, количество и суммарное время зависаний
+        """
+        ordered = sorted(self.lags)
+        return {
+            "max_stall": self.max_stall,
+            "p99": ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)]
+            if ordered
+            else 0.0,
+            "stalls": self.stalls,
+            "stall_time": self.stall_time,
+        }
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
@@ -1,11 +1,31 @@
-from npdtools.modules.base import NPDToolsBase
-from npdtools.modules.income import NPDToolsIncome
-from npdtools.modules.invoice import NPDToolsInvoice
+from importlib import import_module
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from npdtools.modules.base import NPDToolsBase
+    from npdtools.modules.client import NPDTools
+    from npdtools.modules.income import NPDToolsIncome
+    from npdtools.modules.invoice import NPDToolsInvoice
+    from npdtools.modules.receipt import NPDToolsReceipt
 
-class NPDTools(NPDToolsInvoice, NPDToolsIncome, NPDToolsBase):
-    """
-    Объединяет методы всех модулей, чтобы не грузить всё в один большой и страшный файл.
-    """
+_LAZY: dict[str, str] = {
+    "NPDTools": "npdtools.modules.client",
+    "NPDToolsBase": "npdtools.modules.base",
+    "NPDToolsIncome": "npdtools.modules.income",
+    "NPDToolsInvoice": "npdtools.modules.invoice",
+    "NPDToolsReceipt": "npdtools.modules.receipt",
+}
 
-    ...
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,13 +1,60 @@
-from datetime import datetime
+import asyncio
+from concurrent.futures import Executor
 from random import choice
 from string import ascii_lowercase, digits
-from typing import Literal, Type
+from time import monotonic
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Iterable,
+    Literal,
+    Type,
+    TypeVar,
+)
 
-import ujson as ujson
-from httpx import AsyncClient, Response
+from pydantic import BaseModel
 
-from npdtools.settings import DATE_FORMAT, HTTP_TIMEOUT, LKNPD_API_V1
-from npdtools.token_manager import AbstractTokenManager, InMemoryTokenManager
+from npdtools.codec import JSONCodec, get_codec
+from npdtools.deadline import Deadline, check_deadline, clear_deadline
+from npdtools.circuit_breaker import GATEWAY_ERRORS, CircuitBreaker, endpoint_of
+from npdtools.errors import DeadlineExceededError, FNSError, raise_for_response
+from npdtools.hedging import HedgePolicy
+from npdtools.helpers import RateLimiter, RawPolicy, aiterate, gather_bounded
+from npdtools.settings import HTTP_TIMEOUT, LKNPD_API_V1
+from npdtools.timeutils import parse_time
+from npdtools.token_manager import AbstractTokenManager, InMemoryTokenManager, Tokens
+from npdtools.types.auth import Credentials
+from npdtools.types.bulk import BulkResult
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient, Response
+
+    from npdtools.income_limit import IncomeLimitGuard
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def _decode_and_parse(
+    model: Type[Model], content: bytes, raw_policy: RawPolicy, codec: JSONCodec
+) -> Model:
+    # На уровне модуля, чтобы работать и в пуле процессов
+    return model.model_validate(
+        codec.loads(content), context={"raw_policy": raw_policy}
+    )
+
+
+def _is_retryable(error: Exception) -> bool:
+    # Неверный пароль и другие отказы ФНС не повторяются: это грозит блокировкой учётной записи
+    if isinstance(error, FNSError):
+        return error.retryable
+    if isinstance(error, DeadlineExceededError):
+        return False
+    from httpx import TransportError
+
+    return isinstance(error, (TransportError, TimeoutError))
 
 
 class NPDToolsBase:
@@ -16,8 +63,15 @@ class NPDToolsBase:
         token_manager: Type[AbstractTokenManager] = InMemoryTokenManager,
         default_inn: str | None = None,
         base_url: str | None = None,
-        http_session: AsyncClient = None,
+        http_session: "AsyncClient" = None,
         *args,
+        raw_policy: RawPolicy | str = RawPolicy.off,
+        circuit_breaker: CircuitBreaker | None = None,
+        hedging: HedgePolicy | None = None,
+        offload_threshold: int | None = None,
+        offload_executor: Executor | None = None,
+        income_guard: "IncomeLimitGuard | None" = None,
+        json_codec: JSONCodec | str | None = None,
         **token_manager_data,
     ):
         """
@@ -28,27 +82,153 @@ class NPDToolsBase:
             base_url:
             http_session:
             *args:
+            raw_policy: Хранить ли в моделях необработанный ответ ФНС в поле ``raw``. По умолчанию не хранится
+            circuit_breaker: Размыкатель цепи, чтобы при деградации ЛК НПД запросы завершались сразу, а не по таймауту
+            hedging: Политика дублирования медленных запросов на чтение
+            offload_threshold: Ответы списков больше этого размера в байтах разбираются в ``offload_executor``, а не в цикле событий
+            offload_executor: Пул для разбора больших ответов. По умолчанию пул потоков цикла событий
+            income_guard: Проверка лимита дохода за год перед выдачей чека
+            json_codec: Кодек JSON: ``orjson``, ``ujson``, ``json`` или свой ``JSONCodec``. По умолчанию самый быстрый из установленных
             **token_manager_data:
         Attributes:
 
         """
         self._base_url = LKNPD_API_V1 if not base_url else base_url
-        self._http_session: AsyncClient = http_session
+        self._http_session: "AsyncClient" = http_session
 
         self._default_inn: str | None = default_inn
+        self.raw_policy: RawPolicy = RawPolicy(raw_policy)
+        self.circuit_breaker: CircuitBreaker | None = circuit_breaker
+        self.hedging: HedgePolicy | None = hedging
+        self.offload_threshold: int | None = offload_threshold
+        self.offload_executor: Executor | None = offload_executor
+        self.income_guard: "IncomeLimitGuard | None" = income_guard
+        self.parse_stats: dict[str, float] = {
+            "inline": 0,
+            "inline_time": 0.0,
+            "inline_max": 0.0,
+            "offloaded": 0,
+        }
+        self.codec: JSONCodec = get_codec(json_codec)
         self.token_manager: AbstractTokenManager = token_manager(**token_manager_data)
+        self.token_manager.codec = self.codec
         self.token_manager.load_tokens()
+        self._refreshing: dict[str, asyncio.Task] = {}
 
         self._device_id_factory = lambda: "".join(
             [choice(ascii_lowercase + digits) for _ in range(21)]
         )
 
     @property
-    def http_session(self) -> AsyncClient:
+    def http_session(self) -> "AsyncClient":
         if self._http_session is None:
+            from httpx import AsyncClient
+
             self._http_session = AsyncClient(timeout=HTTP_TIMEOUT)
         return self._http_session
 
+    def deadline(self, timeout: float) -> Deadline:
+        """
+        Задаёт общий срок для всех вызовов внутри блока, включая неявное обновление токена.
+
+        ```python
+        async with npd.deadline(1.5):
+            income = await npd.declare_income(service)
+        ```
+
+        Args:
+            timeout: Срок в секундах
+
+        Raises:
+            DeadlineExceededError: Вызовы не уложились в срок
+        """
+        return Deadline(timeout)
+
+    async def _refresh_tokens(self, tokens: Tokens) -> None:
+        """
+        Обновляет истёкший access-токен. Одновременные запросы одного ИНН ждут одно обновление.
+
+        Обновление выполняется отдельной задачей без срока вызывающего: если вызывающий отменён
+        или не уложился в срок, обновление всё равно завершится, и токены не останутся
+        наполовину обновлёнными.
+        """
+        task = self._refreshing.get(tokens.inn)
+        if task is None:
+
+            async def refresh():
+                clear_deadline()
+                await self.auth(inn=tokens.inn, refresh_token=tokens.refresh)
+
+            def done(finished: asyncio.Task):
+                self._refreshing.pop(tokens.inn, None)
+                if not finished.cancelled():
+                    finished.exception()
+
+            task = self._refreshing[tokens.inn] = asyncio.create_task(refresh())
+            task.add_done_callback(done)
+
+        await asyncio.shield(task)
+
+    def _json(self, response: "Response") -> Any:
+        return self.codec.loads(response.content)
+
+    def _parse(self, model: Type[Model], data: Any) -> Model:
+        return model.model_validate(data, context={"raw_policy": self.raw_policy})
+
+    async def _parse_response(self, model: Type[Model], response: "Response") -> Model:
+        """
+        Разбирает ответ в модель. Ответы больше ``offload_threshold`` разбираются в ``offload_executor``,
+        чтобы не задерживать другие запросы. Время разбора в цикле событий копится в ``parse_stats``.
+        """
+        content = response.content
+        if (
+            self.offload_threshold is not None
+            and len(content) >= self.offload_threshold
+        ):
+            self.parse_stats["offloaded"] += 1
+            return await asyncio.get_running_loop().run_in_executor(
+                self.offload_executor,
+                _decode_and_parse,
+                model,
+                content,
+                self.raw_policy,
+                self.codec,
+            )
+
+        started = monotonic()
+        result = self._parse(model, self.codec.loads(content))
+        elapsed = monotonic() - started
+        self.parse_stats["inline"] += 1
+        self.parse_stats["inline_time"] += elapsed
+        self.parse_stats["inline_max"] = max(self.parse_stats["inline_max"], elapsed)
+        return result
+
+    async def _run_bulk(
+        self,
+        func: Callable[[Any], Awaitable[Any]],
+        items: Iterable | AsyncIterable,
+        concurrency: int,
+    ) -> list[BulkResult]:
+        """
+        Общая основа массовых методов: вызывает ``func`` для каждого элемента
+        с ограничением параллельности и собирает результаты в порядке элементов.
+        """
+        consumed = []
+
+        async def collect():
+            async for item in aiterate(items):
+                consumed.append(item)
+                yield item
+
+        results = await gather_bounded(func, collect(), concurrency)
+
+        return [
+            BulkResult(index=index, item=consumed[index], error=result)
+            if isinstance(result, Exception)
+            else BulkResult(index=index, item=consumed[index], result=result)
+            for index, result in enumerate(results)
+        ]
+
     async def _request(
         self,
         method: Literal["GET", "POST", "PUT", "DELETE"] = "GET",
@@ -62,24 +242,27 @@ class NPDToolsBase:
         referer: str | None = None,
         auth_required: bool = True,
         inn: str | None = None,
+        hedge: bool = False,
+        stream: bool = False,
         **get_tokens_params,
-    ) -> Response:
+    ) -> "Response":
+        # stream=True: тело успешного ответа не читается, его нужно прочитать
+        # через ``aiter_bytes`` и закрыть ответ через ``aclose``
         headers = headers or {}
         if json is not None:
-            content = ujson.encode(json)
+            content = self.codec.dumps(json)
             headers |= {"Content-Type": "application/json"}
         if auth_required:
-            if self._default_inn:
-                get_tokens_params = get_tokens_params | {
-                    "inn": inn or self._default_inn
-                }
+            inn = inn or self._default_inn
+            if inn is not None:
+                get_tokens_params = get_tokens_params | {"inn": inn}
             tokens = self.token_manager.get_tokens(**get_tokens_params)
             if (
                 tokens.access is not None
                 and not tokens.access.is_alive
                 and tokens.refresh is not None
             ):
-                await self.auth(refresh_token=tokens.refresh)
+                await self._refresh_tokens(tokens)
             elif tokens.access is None or tokens.refresh is None:
                 raise ValueError("access_token is needed for authorization")
             headers |= {"Authorization": f"Bearer {tokens.access}"}
@@ -88,7 +271,10 @@ class NPDToolsBase:
             "referer": f'https://lknpd.nalog.ru/{referer if referer else ""}'
         } | headers
 
-        return await self.http_session.request(
+        check_deadline()
+
+        endpoint = endpoint_of(url.removeprefix(self._base_url))
+        request = dict(
             method=method,
             url=url if url.startswith("https://") else self._base_url + url,
             data=data,
@@ -97,6 +283,80 @@ class NPDToolsBase:
             cookies=cookies,
             content=content,
         )
+        if hedge and not stream and self.hedging is not None:
+            return await self._send_hedged(endpoint, inn, request)
+        return await self._send(endpoint, inn, request, stream)
+
+    async def _send(
+        self, endpoint: str, inn: str | None, request: dict, stream: bool = False
+    ) -> "Response":
+        breaker = self.circuit_breaker
+        if breaker is not None:
+            breaker.before_call(endpoint, inn)
+
+        started = monotonic()
+        try:
+            if stream:
+                response = await self.http_session.send(
+                    self.http_session.build_request(**request), stream=True
+                )
+            else:
+                response = await self.http_session.request(**request)
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.cancel_call(endpoint, inn)
+            raise
+        except Exception:
+            if breaker is not None:
+                breaker.record(endpoint, inn, False, monotonic() - started)
+            raise
+
+        latency = monotonic() - started
+        ok = response.status_code < 500 and response.status_code != 429
+        if breaker is not None:
+            # Ошибки шлюза общие для всех ИНН, остальные могут быть вызваны самим ИНН
+            shared = ok or response.status_code in GATEWAY_ERRORS
+            breaker.record(endpoint, inn, ok, latency, shared)
+        if ok and self.hedging is not None:
+            self.hedging.record(endpoint, latency)
+        if stream and not 200 <= response.status_code < 300:
+            # Тело ошибки нужно целиком для её классификации
+            await response.aread()
+        raise_for_response(response, self.codec)
+        return response
+
+    async def _send_hedged(
+        self, endpoint: str, inn: str | None, request: dict
+    ) -> "Response":
+        """
+        Отправляет запрос и, если он не ответил за задержку из ``HedgePolicy``, его дубль.
+        Возвращается первый успешный ответ, оставшийся запрос отменяется.
+        """
+        delay = self.hedging.delay(endpoint)
+        primary = asyncio.create_task(self._send(endpoint, inn, request))
+        if delay is None:
+            return await primary
+
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self.hedging.try_hedge():
+                tasks.add(asyncio.create_task(self._send(endpoint, inn, request)))
+
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                winner = next((t for t in done if t.exception() is None), None)
+                if winner is None and not tasks:
+                    winner = done.pop()
+                if winner is not None:
+                    if winner is not primary:
+                        self.hedging.hedge_wins += 1
+                    return winner.result()
+        finally:
+            for task in tasks:
+                task.cancel()
 
     async def auth(
         self,
@@ -108,7 +368,7 @@ class NPDToolsBase:
     ):
         inn = inn or self._default_inn
         if inn is None:
-            ValueError()  # TODO: add info
+            raise ValueError("Для авторизации нужен ИНН")
 
         tokens = self.token_manager.get_tokens(inn, **get_tokens_params)
         if tokens.device is None:
@@ -151,11 +411,81 @@ class NPDToolsBase:
             auth_required=False,
         )
 
-        r_data = response.json()
-        tokens.access = r_data["token"], datetime.strptime(
-            r_data["tokenExpireIn"].replace("Z", "+00:00"),
-            DATE_FORMAT,
-        )
-        tokens.refresh = r_data["refreshToken"]
+        r_data = self._json(response)
+        # Ответ разбирается целиком до записи, чтобы токены не обновились наполовину
+        access = r_data["token"], parse_time(r_data["tokenExpireIn"])
+        refresh = r_data["refreshToken"]
+        tokens.access = access
+        tokens.refresh = refresh
 
         return response
+
+    async def auth_bulk(
+        self,
+        credentials: Iterable[Credentials | tuple[str, str]]
+        | AsyncIterable[Credentials | tuple[str, str]],
+        concurrency: int = 5,
+        rate_limit: float | None = None,
+        retries: int = 2,
+        retry_delay: float = 1.0,
+        save_batch_size: int = 50,
+    ) -> list[BulkResult]:
+        """
+        Метод для массовой авторизации, например, при подключении или восстановлении множества ИНН.
+
+        Данные читаются из источника по мере авторизации, одновременно выполняется не больше ``concurrency``
+        запросов, а частота запросов ограничивается ``rate_limit``. Неудачные попытки повторяются
+        с тем же идентификатором устройства, поэтому для ФНС это выглядит как одно устройство.
+        Полученные токены передаются в ``token_manager.save_tokens`` пачками по ``save_batch_size``.
+
+        Args:
+            credentials: ``Credentials`` или пары ``(ИНН, пароль)``
+            concurrency: Максимальное количество одновременных авторизаций
+            rate_limit: Максимальное количество запросов авторизации в секунду
+            retries: Сколько раз повторить неудачную авторизацию. Повторяются только сетевые ошибки,
+                таймауты и ошибки ФНС с ``retryable``, а, например, неверный пароль возвращается сразу
+            retry_delay: Базовая задержка между повторами в секундах, удваивается с каждой попыткой
+            save_batch_size: Размер пачки токенов для ``token_manager.save_tokens``
+
+        Returns:
+            list[BulkResult]: Результаты в порядке входных данных, в ``result`` объект ``Tokens``
+        """
+        limiter = RateLimiter(rate_limit) if rate_limit else None
+        unsaved: list[Tokens] = []
+
+        async def login(item: Credentials | tuple[str, str]) -> Tokens:
+            creds = (
+                item
+                if isinstance(item, Credentials)
+                else Credentials(inn=item[0], password=item[1])
+            )
+            tokens = self.token_manager.get_tokens(creds.inn)
+            if tokens.device is None:
+                tokens.device = creds.device_id or self._device_id_factory()
+
+            for attempt in range(retries + 1):
+                if limiter is not None:
+                    await limiter.acquire()
+                try:
+                    await self.auth(
+                        inn=creds.inn,
+                        password=creds.password,
+                        refresh_token=creds.refresh_token,
+                    )
+                    break
+                except Exception as e:
+                    if attempt == retries or not _is_retryable(e):
+                        raise
+                    await asyncio.sleep(retry_delay * 2**attempt)
+
+            unsaved.append(tokens)
+            if len(unsaved) >= save_batch_size:
+                self.token_manager.save_tokens(unsaved[:])
+                unsaved.clear()
+            return tokens
+
+        try:
+            return await self._run_bulk(login, credentials, concurrency)
+        finally:
+            if unsaved:
+                self.token_manager.save_tokens(unsaved)
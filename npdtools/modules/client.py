@@ -0,0 +1,12 @@
+from npdtools.modules.base import NPDToolsBase
+from npdtools.modules.income import NPDToolsIncome
+from npdtools.modules.invoice import NPDToolsInvoice
+from npdtools.modules.receipt import NPDToolsReceipt
+
+
+class NPDTools(NPDToolsReceipt, NPDToolsInvoice, NPDToolsIncome, NPDToolsBase):
+    """
+    Объединяет методы всех модулей, чтобы не грузить всё в один большой и страшный файл.
+    """
+
+    ...
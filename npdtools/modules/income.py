@@ -1,8 +1,17 @@
-from datetime import datetime, timedelta
+from datetime import datetime
+from decimal import Decimal
+from typing import AsyncIterator
 
 from npdtools.modules.base import NPDToolsBase
+from npdtools.timeutils import format_time, now, parse_time, period_bounds, to_local
 from npdtools.types.entity import ClientInfo
-from npdtools.types.income import CanceledIncome, IncomesList, NewIncome, SortTypes
+from npdtools.types.income import (
+    CanceledIncome,
+    IncomeInfo,
+    IncomesList,
+    NewIncome,
+    SortTypes,
+)
 from npdtools.types.service import Service
 
 
@@ -12,6 +21,7 @@ class NPDToolsIncome(NPDToolsBase):
         *services: Service,
         client: ClientInfo | None = None,
         operation_time: datetime | str = None,
+        inn: str | None = None,
     ) -> NewIncome:
         """
         Метод для декларирования дохода. Иными словами, выдача чека.
@@ -43,44 +53,46 @@ class NPDToolsIncome(NPDToolsBase):
             *services: Позиции в чеке: список товаров, услуг или подобного
             client: Объект сведений о клиенте
             operation_time: Дата и время получения дохода.
+            inn: ИНН самозанятого, от имени которого выдаётся чек. По умолчанию ``default_inn``
 
         Returns:
             NewIncome: Объект нового дохода, **содержащий на данный момент только номер чека**,
         """
         client = client if client is not None else ClientInfo()
 
-        operation_time = (
-            operation_time if operation_time is not None else datetime.now()
-        )
+        request_time = now()
         data = {
             "paymentType": "CASH",
             "ignoreMaxTotalIncomeRestriction": False,
             "client": client.fns_export(),
-            "requestTime": datetime.now()
-            .replace(microsecond=0)
-            .astimezone()
-            .isoformat(),
-            "operationTime": operation_time
-            if isinstance(operation_time, str)
-            else operation_time.now().replace(microsecond=0).astimezone().isoformat(),
+            "requestTime": format_time(request_time),
+            "operationTime": format_time(
+                operation_time if operation_time is not None else request_time
+            ),
             "services": [s.model_dump() for s in services],
             "totalAmount": str(sum(s.service_amount for s in services)),
         }
 
-        response = await self._request(
-            "POST",
-            url="/income",
-            json=data,
-        )
-        print(response.json())
+        guard_inn = inn or self._default_inn
+        if self.income_guard is None or guard_inn is None:
+            response = await self._request("POST", url="/income", json=data, inn=inn)
+        else:
+            operation_year = to_local(parse_time(data["operationTime"])).year
+            async with self.income_guard.reserve(
+                self, guard_inn, operation_year, Decimal(data["totalAmount"])
+            ):
+                response = await self._request(
+                    "POST", url="/income", json=data, inn=inn
+                )
 
-        return NewIncome(**response.json())
+        return self._parse(NewIncome, self._json(response))
 
     async def cancel_income(
         self,
         receipt_id: str,
         comment: str = "Чек сформирован ошибочно",
         cancellation_time: datetime | str | None = None,
+        inn: str | None = None,
     ) -> CanceledIncome:
         """
         Метод для аннулирования задекларированного дохода.
@@ -91,23 +103,18 @@ class NPDToolsIncome(NPDToolsBase):
             receipt_id: Номер чека. Те самые буквы-цифры.
             comment: Комментарий, по какой причине происходит аннулирование
             cancellation_time: Время отмены. Например, если вы вернули деньги вчера. По умолчанию принимает значение ``datetime.now()``
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
 
         Returns:
             CanceledIncome: Сведения об аннулированном доходе
         """
-        cancellation_time = (
-            cancellation_time if cancellation_time is not None else datetime.now()
-        )
-
+        request_time = now()
         data = {
             "comment": comment,
-            "requestTime": datetime.now()
-            .replace(microsecond=0)
-            .astimezone()
-            .isoformat(),
-            "operationTime": cancellation_time
-            if isinstance(cancellation_time, str)
-            else cancellation_time.replace(microsecond=0).astimezone().isoformat(),
+            "requestTime": format_time(request_time),
+            "operationTime": format_time(
+                cancellation_time if cancellation_time is not None else request_time
+            ),
             "receiptUuid": receipt_id,
         }
 
@@ -115,9 +122,19 @@ class NPDToolsIncome(NPDToolsBase):
             "POST",
             url="/cancel",
             json=data,
+            inn=inn,
         )
 
-        return CanceledIncome(**response.json()["incomeInfo"])
+        canceled = self._parse(CanceledIncome, self._json(response)["incomeInfo"])
+        guard_inn = inn or self._default_inn
+        if self.income_guard is not None and guard_inn is not None:
+            self.income_guard.cancelled(
+                guard_inn,
+                to_local(canceled.received_at).year,
+                canceled.total_amount,
+                canceled.receipt_id,
+            )
+        return canceled
 
     async def get_incomes(
         self,
@@ -127,6 +144,7 @@ class NPDToolsIncome(NPDToolsBase):
         limit: int = 10,
         sort_type: SortTypes | str = SortTypes.time,
         is_sort_asc: bool = False,
+        inn: str | None = None,
     ) -> IncomesList:
         """
         Метод для получения списка задекларированных доходов с учётом фильтров.
@@ -138,39 +156,16 @@ class NPDToolsIncome(NPDToolsBase):
             limit: Количество доходов в выдаче
             sort_type: Тип сортировки: по дате или сумме
             is_sort_asc: Сортировка по возрастанию?
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
 
         Returns:
             IncomesList: Список доходов и сведения о пагинации
         """
-        if from_date is None:
-            from_date: datetime = datetime.now()
-        if isinstance(from_date, int):
-            from_date: datetime = (datetime.now() - timedelta(days=from_date)).replace(
-                hour=0,
-                minute=0,
-                second=0,
-                microsecond=0,
-            )
-
-        if isinstance(to_date, int):
-            to_date: datetime = (datetime.now() - timedelta(days=to_date)).replace(
-                hour=23,
-                minute=59,
-                second=59,
-                microsecond=999999,
-            )
+        from_date, to_date = period_bounds(from_date, to_date)
 
         params = {
-            "from": (
-                from_date
-                if isinstance(from_date, str)
-                else from_date.astimezone().isoformat()
-            ),
-            "to": (
-                to_date
-                if isinstance(to_date, str)
-                else to_date.astimezone().isoformat()
-            ),
+            "from": from_date,
+            "to": to_date,
             "offset": offset,
             "sortBy": f'{str(sort_type)}:{"asc" if is_sort_asc else "desc"}',
             "limit": limit,
@@ -179,6 +174,45 @@ class NPDToolsIncome(NPDToolsBase):
             "GET",
             "/invoices",
             params=params,
+            inn=inn,
+            hedge=True,
         )
 
-        return IncomesList(**response.json())
+        return await self._parse_response(IncomesList, response)
+
+    async def iter_incomes(
+        self,
+        from_date: datetime | str | int = 7,
+        to_date: datetime | str | int | None = None,
+        page_size: int = 100,
+        inn: str | None = None,
+    ) -> AsyncIterator[IncomeInfo]:
+        """
+        Перебирает все доходы за период, постранично запрашивая ``get_incomes`` по возрастанию времени.
+
+        Args:
+            from_date: Время начала поиска, как в ``get_incomes``
+            to_date: Время окончания поиска, как в ``get_incomes``
+            page_size: Количество доходов на одной странице запроса
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
+
+        Yields:
+            IncomeInfo: Доходы, включая аннулированные
+        """
+        # Границы фиксируются один раз, чтобы "сейчас" не сдвигалось между страницами
+        from_date, to_date = period_bounds(from_date, to_date)
+        offset = 0
+        while True:
+            page = await self.get_incomes(
+                from_date=from_date,
+                to_date=to_date,
+                offset=offset,
+                limit=page_size,
+                is_sort_asc=True,
+                inn=inn,
+            )
+            for income in page.incomes:
+                yield income
+            if not page.has_more or not page.incomes:
+                break
+            offset += len(page.incomes)
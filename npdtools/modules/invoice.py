@@ -1,13 +1,17 @@
-from datetime import datetime, timedelta
-from typing import Literal
+import asyncio
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Iterable, Literal
 
 from npdtools.modules.base import NPDToolsBase
+from npdtools.timeutils import format_time, now, period_bounds
+from npdtools.types.bulk import BulkResult
 from npdtools.types.entity import ClientInfo
 from npdtools.types.invoice import (
     BankAccount,
     BankPhone,
     Invoice,
     InvoicesList,
+    NewInvoice,
     PaymentOptions,
 )
 from npdtools.types.service import Service
@@ -17,11 +21,12 @@ class NPDToolsInvoice(NPDToolsBase):
     async def get_invoices(
         self,
         from_date: datetime | str | int = 7,
-        to_date: datetime | str | None = None,
+        to_date: datetime | str | int | None = None,
         offset: int = 0,
         limit: int = 10,
         sort_type: Literal["createdAt"] = "createdAt",
         is_sort_asc: bool = False,
+        inn: str | None = None,
     ) -> InvoicesList:
         """
         Метод для получения списка счетов с учётом фильтров.
@@ -35,27 +40,12 @@ class NPDToolsInvoice(NPDToolsBase):
             limit: Количество счетов в выдаче
             sort_type: Тип сортировки: только по дате, другие пока что не реализованы
             is_sort_asc: Сортировка по возрастанию?
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
 
         Returns:
             InvoicesList: Список счетов и сведения о пагинации
         """
-        if from_date is None:
-            from_date: datetime = datetime.now()
-        if isinstance(from_date, int):
-            from_date: datetime = (datetime.now() - timedelta(days=from_date)).replace(
-                hour=0,
-                minute=0,
-                second=0,
-                microsecond=0,
-            )
-
-        if isinstance(to_date, int):
-            to_date: datetime = (datetime.now() - timedelta(days=to_date)).replace(
-                hour=23,
-                minute=59,
-                second=59,
-                microsecond=999999,
-            )
+        from_date, to_date = period_bounds(from_date, to_date)
 
         data = {
             "limit": limit,
@@ -68,19 +58,11 @@ class NPDToolsInvoice(NPDToolsBase):
                 },
                 {
                     "id": "from",
-                    "value": (
-                        from_date
-                        if isinstance(from_date, str)
-                        else from_date.astimezone().isoformat()
-                    ),
+                    "value": from_date,
                 },
                 {
                     "id": "to",
-                    "value": (
-                        to_date
-                        if isinstance(to_date, str)
-                        else to_date.astimezone().isoformat()
-                    ),
+                    "value": to_date,
                 },
             ],
         }
@@ -88,15 +70,54 @@ class NPDToolsInvoice(NPDToolsBase):
             "POST",
             url="/invoice/table",
             json=data,
+            inn=inn,
+            hedge=True,
         )
 
-        return InvoicesList(**response.json())
+        return await self._parse_response(InvoicesList, response)
+
+    async def iter_invoices(
+        self,
+        from_date: datetime | str | int = 7,
+        to_date: datetime | str | int | None = None,
+        page_size: int = 100,
+        inn: str | None = None,
+    ) -> AsyncIterator[Invoice]:
+        """
+        Перебирает все счета за период, постранично запрашивая ``get_invoices`` по возрастанию времени создания.
+
+        Args:
+            from_date: Время начала поиска, как в ``get_invoices``
+            to_date: Время окончания поиска, как в ``get_invoices``
+            page_size: Количество счетов на одной странице запроса
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
+
+        Yields:
+            Invoice: Счета в любом статусе
+        """
+        from_date, to_date = period_bounds(from_date, to_date)
+        offset = 0
+        while True:
+            page = await self.get_invoices(
+                from_date=from_date,
+                to_date=to_date,
+                offset=offset,
+                limit=page_size,
+                is_sort_asc=True,
+                inn=inn,
+            )
+            for invoice in page.invoices:
+                yield invoice
+            if not page.has_more or not page.invoices:
+                break
+            offset += len(page.invoices)
 
     async def create_invoice(
         self,
         *services: Service,
         bank: BankPhone | BankAccount,
         client: ClientInfo,
+        inn: str | None = None,
     ) -> Invoice:
         """
         Метод выставления счёта.
@@ -121,6 +142,7 @@ class NPDToolsInvoice(NPDToolsBase):
             *services: Позиции в счёте: список товаров, услуг или подобного
             bank: Объект варианта приёма платежа: по номеру телефона или по реквизитам
             client: Объект сведений о клиенте
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
 
         Returns:
             Invoice: Полные сведения о счёте
@@ -163,11 +185,14 @@ class NPDToolsInvoice(NPDToolsBase):
             "POST",
             url="/invoice",
             json=data,
+            inn=inn,
         )
 
-        return Invoice(**response.json())
+        return self._parse(Invoice, self._json(response))
 
-    async def cancel_invoice(self, invoice_id: int) -> Invoice:
+    async def cancel_invoice(
+        self, invoice_id: int, inn: str | None = None
+    ) -> Invoice:
         """
         Метод для отмены счёта. Выданный к счёту чек не отменяется, вроде, его надо руками отменять.
 
@@ -175,6 +200,7 @@ class NPDToolsInvoice(NPDToolsBase):
 
         Args:
             invoice_id: Номер счёта ``Invoice.invoice_id``
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
 
         Returns:
             Invoice: Актуальный полный объект счёта
@@ -182,11 +208,12 @@ class NPDToolsInvoice(NPDToolsBase):
         response = await self._request(
             "POST",
             url=f"/invoice/{invoice_id}/cancel",
+            inn=inn,
         )
 
-        return Invoice(**response.json())
+        return self._parse(Invoice, self._json(response))
 
-    async def invoice_paid(self, invoice_id: int) -> Invoice:
+    async def invoice_paid(self, invoice_id: int, inn: str | None = None) -> Invoice:
         """
         Метод, чтобы отметить счёт оплаченным. Чек можно выдать позже.
 
@@ -194,6 +221,7 @@ class NPDToolsInvoice(NPDToolsBase):
 
         Args:
             invoice_id: Номер счёта ``Invoice.invoice_id``
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
 
         Returns:
             Invoice: Актуальный полный объект счёта
@@ -201,12 +229,16 @@ class NPDToolsInvoice(NPDToolsBase):
         response = await self._request(
             "POST",
             url=f"/invoice/{invoice_id}/approve",
+            inn=inn,
         )
 
-        return Invoice(**response.json())
+        return self._parse(Invoice, self._json(response))
 
     async def invoice_complete(
-        self, invoice_id: int, operation_time: datetime | str = None
+        self,
+        invoice_id: int,
+        operation_time: datetime | str = None,
+        inn: str | None = None,
     ) -> Invoice:
         """
         Метод для выдачи чека к счёту. Счёт автоматически становится оплаченным.
@@ -216,33 +248,33 @@ class NPDToolsInvoice(NPDToolsBase):
         Args:
             invoice_id: Номер счёта ``Invoice.invoice_id``
             operation_time: Дата и время получения денег по счёту.
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
 
         Returns:
             Invoice: Актуальный полный объект счёта
         """
-        operation_time = (
-            operation_time if operation_time is not None else datetime.now()
-        )
+        request_time = now()
         data = {
             "invoiceId": invoice_id,
-            "requestTime": datetime.now()
-            .replace(microsecond=0)
-            .astimezone()
-            .isoformat(),
-            "operationTime": operation_time
-            if isinstance(operation_time, str)
-            else operation_time.now().replace(microsecond=0).astimezone().isoformat(),
+            "requestTime": format_time(request_time),
+            "operationTime": format_time(
+                operation_time if operation_time is not None else request_time
+            ),
         }
         response = await self._request(
             "POST",
             url=f"/invoice/{invoice_id}/receipt",
             json=data,
+            inn=inn,
         )
 
-        return Invoice(**response.json())
+        return self._parse(Invoice, self._json(response))
 
     async def update_invoice_payment_type(
-        self, invoice_id: int, bank: BankPhone | BankAccount
+        self,
+        invoice_id: int,
+        bank: BankPhone | BankAccount,
+        inn: str | None = None,
     ) -> Invoice:
         """
         Метод для смены способа получения денег по счёту
@@ -252,6 +284,7 @@ class NPDToolsInvoice(NPDToolsBase):
         Args:
             invoice_id: Номер счёта ``Invoice.invoice_id``
             bank: Сведения о способе получения денег. Можно создать руками или получить из ``NPDTools.get_payment_options()``
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
 
         Returns:
             Invoice: Актуальный полный объект счёта
@@ -273,12 +306,15 @@ class NPDToolsInvoice(NPDToolsBase):
             "POST",
             url="/invoice/update-payment-info",
             json=data,
+            inn=inn,
         )
 
-        return Invoice(**response.json())
+        return self._parse(Invoice, self._json(response))
 
     async def get_payment_options(
-        self, by_type: Literal["PHONE", "ACCOUNT"] | None = None
+        self,
+        by_type: Literal["PHONE", "ACCOUNT"] | None = None,
+        inn: str | None = None,
     ) -> PaymentOptions:
         """
         Метод для получения списка сохранённых способов получения денег по счёту
@@ -287,6 +323,7 @@ class NPDToolsInvoice(NPDToolsBase):
 
         Args:
             by_type: Отфильтровать по типу способа получения
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
 
         Returns:
             PaymentOptions: Итерируемый объект со списком способов
@@ -295,6 +332,80 @@ class NPDToolsInvoice(NPDToolsBase):
             "GET",
             url="/payment-type/table",
             params={"type": by_type} if by_type else None,
+            inn=inn,
+            hedge=True,
         )
 
-        return PaymentOptions(**response.json())
+        return await self._parse_response(PaymentOptions, response)
+
+    async def create_invoices_bulk(
+        self,
+        invoices: Iterable[NewInvoice] | AsyncIterable[NewInvoice],
+        bank: BankPhone | BankAccount | None = None,
+        concurrency: int = 10,
+        inn: str | None = None,
+    ) -> list[BulkResult]:
+        """
+        Метод для массового выставления счетов.
+
+        Счета читаются из источника по мере выставления, одновременно выполняется
+        не больше ``concurrency`` запросов. Ошибка в одном счёте не останавливает остальные.
+
+        Если ни у счёта, ни в аргументе ``bank`` не указан способ получения денег,
+        один раз запрашивается ``get_payment_options()`` и берётся избранный способ.
+
+        Args:
+            invoices: Итерируемый или асинхронно итерируемый набор ``NewInvoice``
+            bank: Способ получения денег для счетов, у которых он не указан
+            concurrency: Максимальное количество одновременных запросов
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
+
+        Returns:
+            list[BulkResult]: Результаты в порядке входных счетов, в ``result`` объект ``Invoice``
+        """
+        default_bank = bank
+        bank_lock = asyncio.Lock()
+
+        async def resolve_bank() -> BankPhone | BankAccount:
+            nonlocal default_bank
+            async with bank_lock:
+                if default_bank is None:
+                    options = await self.get_payment_options(inn=inn)
+                    if not len(options):
+                        raise ValueError("Нет сохранённых способов получения денег")
+                    favorite = next((o for o in options if o.is_favorite), options[0])
+                    default_bank = favorite.bank
+            return default_bank
+
+        async def create(invoice: NewInvoice) -> Invoice:
+            return await self.create_invoice(
+                *invoice.services,
+                bank=invoice.bank or await resolve_bank(),
+                client=invoice.client,
+                inn=inn,
+            )
+
+        return await self._run_bulk(create, invoices, concurrency)
+
+    async def cancel_invoices_bulk(
+        self,
+        invoice_ids: Iterable[int] | AsyncIterable[int],
+        concurrency: int = 10,
+        inn: str | None = None,
+    ) -> list[BulkResult]:
+        """
+        Метод для массовой отмены счетов. Ошибка в одном счёте не останавливает остальные.
+
+        Args:
+            invoice_ids: Итерируемый или асинхронно итерируемый набор номеров счетов
+            concurrency: Максимальное количество одновременных запросов
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
+
+        Returns:
+            list[BulkResult]: Результаты в порядке входных номеров, в ``result`` объект ``Invoice``
+        """
+        return await self._run_bulk(
+            lambda invoice_id: self.cancel_invoice(invoice_id, inn=inn),
+            invoice_ids,
+            concurrency,
+        )
@@ -0,0 +1,65 @@
+from typing import Any, Literal
+
+from npdtools.modules.base import NPDToolsBase
+
+
+class NPDToolsReceipt(NPDToolsBase):
+    def receipt_url(
+        self,
+        receipt_id: str,
+        kind: Literal["print", "json"] = "print",
+        inn: str | None = None,
+    ) -> str:
+        """
+        Args:
+            receipt_id: Номер чека
+            kind: ``print`` для картинки чека, ``json`` для сведений о чеке
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
+
+        Returns:
+            str: Ссылка на чек
+        """
+        inn = inn or self._default_inn
+        if inn is None:
+            raise ValueError("Для получения чека нужен ИНН самозанятого")
+        return f"{self._base_url}/receipt/{inn}/{receipt_id}/{kind}"
+
+    async def get_receipt_json(
+        self, receipt_id: str, inn: str | None = None
+    ) -> dict[str, Any]:
+        """
+        Метод для получения сведений о чеке в том виде, в котором их отдаёт ФНС.
+
+        Args:
+            receipt_id: Номер чека
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
+
+        Returns:
+            JSON'подобный словарь со сведениями о чеке
+        """
+        response = await self._request(
+            "GET",
+            url=self.receipt_url(receipt_id, "json", inn),
+            auth_required=False,
+        )
+
+        return self._json(response)
+
+    async def get_receipt_print(self, receipt_id: str, inn: str | None = None) -> bytes:
+        """
+        Метод для получения картинки чека. Для многократной отдачи лучше использовать ``ReceiptCache``.
+
+        Args:
+            receipt_id: Номер чека
+            inn: ИНН самозанятого. По умолчанию ``default_inn``
+
+        Returns:
+            bytes: Картинка чека
+        """
+        response = await self._request(
+            "GET",
+            url=self.receipt_url(receipt_id, "print", inn),
+            auth_required=False,
+        )
+
+        return response.content
@@ -0,0 +1,291 @@
+import asyncio
+import json
+from datetime import datetime
+from time import time
+from typing import TYPE_CHECKING, Any
+
+from npdtools._sqlite import SQLiteStore
+from npdtools.errors import FNSError
+from npdtools.helpers import RateLimiter
+from npdtools.timeutils import format_time, now
+from npdtools.types.entity import ClientInfo
+from npdtools.types.service import Service
+
+if TYPE_CHECKING:
+    from npdtools.modules.income import NPDToolsIncome
+
+
+class IncomeOutbox(SQLiteStore):
+    """
+    Надёжная очередь на декларацию доходов.
+
+    ``enqueue_income`` сразу записывает чек в SQLite и возвращает номер задачи,
+    а пул фоновых воркеров отправляет чеки в ``/income``. Чеки одного ИНН
+    отправляются строго в порядке постановки в очередь, неудачные попытки
+    повторяются с экспоненциальной задержкой. Очередь переживает перезапуск процесса.
+
+    Warning: Повторная выдача
+        Если процесс упадёт между ответом ФНС и записью результата, после перезапуска
+        чек будет отправлен ещё раз. Гарантия доставки "хотя бы один раз".
+
+    Attributes:
+        npd: Клиент, через который декларируются доходы
+        path: Путь к файлу базы SQLite
+        workers: Количество воркеров
+        max_attempts: Максимальное количество попыток, после которого задача помечается ``failed``. Задача с ``FNSError``, которую повторять бессмысленно (``retryable`` ложно), помечается ``failed`` сразу
+        retry_delay: Базовая задержка между попытками в секундах
+        rate_limiter: Ограничитель частоты запросов ко всем ИНН
+    """
+
+    def __init__(
+        self,
+        npd: "NPDToolsIncome",
+        path: str = "npdtools_outbox.sqlite3",
+        workers: int = 4,
+        max_attempts: int = 10,
+        retry_delay: float = 1.0,
+        rate_limit: float | None = None,
+        poll_interval: float = 0.5,
+    ):
+        self.npd = npd
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.rate_limiter: RateLimiter | None = (
+            RateLimiter(rate_limit) if rate_limit else None
+        )
+
+        super().__init__(
+            path,
+            "CREATE TABLE IF NOT EXISTS income_outbox ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " inn TEXT,"
+            " payload TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending',"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " next_try_at REAL NOT NULL DEFAULT 0,"
+            " receipt_id TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL"
+            ");"
+            "CREATE INDEX IF NOT EXISTS income_outbox_pending"
+            " ON income_outbox (status, inn, id);",
+        )
+
+        self._busy_inns: set[str | None] = set()
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def enqueue_income(
+        self,
+        *services: Service,
+        client: ClientInfo | None = None,
+        operation_time: datetime | str | None = None,
+        inn: str | None = None,
+    ) -> int:
+        """
+        Ставит чек в очередь на декларацию. Не ждёт ответа ФНС.
+
+        Время получения дохода фиксируется в момент постановки в очередь,
+        чтобы задержка отправки не сдвигала его.
+
+        Args:
+            *services: Позиции в чеке
+            client: Объект сведений о клиенте
+            operation_time: Дата и время получения дохода. По умолчанию ``datetime.now()``
+            inn: ИНН самозанятого. По умолчанию ``default_inn`` клиента
+
+        Returns:
+            int: Номер задачи в очереди
+        """
+        if not services:
+            raise ValueError("Для выдачи чека нужна хотя бы одна позиция")
+
+        payload = {
+            "services": [s.model_dump(mode="json") for s in services],
+            "client": client.model_dump(mode="json") if client is not None else None,
+            "operation_time": format_time(
+                operation_time if operation_time is not None else now()
+            ),
+        }
+        inn = inn or self.npd._default_inn
+
+        with self._lock:
+            job_id = self._db.execute(
+                "INSERT INTO income_outbox (inn, payload, created_at) VALUES (?, ?, ?)",
+                (inn, json.dumps(payload, ensure_ascii=False), time()),
+            ).lastrowid
+
+        # Может вызываться из другого потока, поэтому будим воркеров через их цикл
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+        return job_id
+
+    def get_job(self, job_id: int) -> dict[str, Any] | None:
+        """
+        Args:
+            job_id: Номер задачи из ``enqueue_income``
+
+        Returns:
+            Сведения о задаче: статус, количество попыток, номер чека и последняя ошибка
+        """
+        rows = self._execute(
+            "SELECT id, inn, status, attempts, receipt_id, error FROM income_outbox"
+            " WHERE id = ?",
+            (job_id,),
+        )
+        if not rows:
+            return None
+        keys = ("id", "inn", "status", "attempts", "receipt_id", "error")
+        return dict(zip(keys, rows[0]))
+
+    def get_receipt_id(self, job_id: int) -> str | None:
+        """
+        Args:
+            job_id: Номер задачи из ``enqueue_income``
+
+        Returns:
+            str | None: Номер чека ``NewIncome.receipt_id``, если чек уже выдан
+        """
+        job = self.get_job(job_id)
+        return job["receipt_id"] if job else None
+
+    def pending_count(self) -> int:
+        """
+        Returns:
+            int: Количество задач, ожидающих отправки
+        """
+        return self._execute(
+            "SELECT COUNT(*) FROM income_outbox WHERE status IN ('pending', 'processing')"
+        )[0][0]
+
+    def _claim(self) -> tuple[int, str | None, str] | None:
+        """
+        Берёт самую старую задачу среди ИНН, которые сейчас не обрабатываются другим воркером.
+        Если у ИНН самая старая задача ещё ждёт повтора, весь ИНН пропускается, чтобы не нарушить порядок.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, inn, payload, next_try_at FROM income_outbox"
+                " WHERE id IN (SELECT MIN(id) FROM income_outbox"
+                " WHERE status = 'pending' GROUP BY inn)"
+                " ORDER BY id"
+            ).fetchall()
+            current = time()
+            for job_id, inn, payload, next_try_at in rows:
+                if inn in self._busy_inns or next_try_at > current:
+                    continue
+                self._db.execute(
+                    "UPDATE income_outbox SET status = 'processing' WHERE id = ?",
+                    (job_id,),
+                )
+                self._busy_inns.add(inn)
+                return job_id, inn, payload
+        return None
+
+    async def _send(self, inn: str | None, payload: str) -> str:
+        data = json.loads(payload)
+        services = [Service(**s) for s in data["services"]]
+        client = ClientInfo(**data["client"]) if data["client"] else None
+
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+
+        new_income = await self.npd.declare_income(
+            *services,
+            client=client,
+            operation_time=data["operation_time"],
+            inn=inn,
+        )
+        return new_income.receipt_id
+
+    async def _worker(self) -> None:
+        while True:
+            job = self._claim()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id, inn, payload = job
+            try:
+                receipt_id = await self._send(inn, payload)
+            except asyncio.CancelledError:
+                self._execute(
+                    "UPDATE income_outbox SET status = 'pending' WHERE id = ?",
+                    (job_id,),
+                )
+                raise
+            except Exception as e:
+                # Ошибку, которую ФНС вернёт и при повторе, повторять бессмысленно
+                max_attempts = (
+                    0
+                    if isinstance(e, FNSError) and not e.retryable
+                    else self.max_attempts
+                )
+                self._execute(
+                    "UPDATE income_outbox SET"
+                    " attempts = attempts + 1,"
+                    " status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END,"
+                    " next_try_at = ? + ? * (1 << MIN(attempts, 10)),"
+                    " error = ?"
+                    " WHERE id = ?",
+                    (max_attempts, time(), self.retry_delay, repr(e), job_id),
+                )
+            else:
+                self._execute(
+                    "UPDATE income_outbox SET status = 'done', receipt_id = ?,"
+                    " attempts = attempts + 1, error = NULL WHERE id = ?",
+                    (receipt_id, job_id),
+                )
+            finally:
+                self._busy_inns.discard(inn)
+                self._wakeup.set()
+
+    async def start(self) -> None:
+        """
+        Запускает воркеров. Задачи, оставшиеся в статусе ``processing`` после падения процесса,
+        возвращаются в очередь.
+        """
+        if self._tasks:
+            return
+        self._execute(
+            "UPDATE income_outbox SET status = 'pending' WHERE status = 'processing'"
+        )
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Останавливает воркеров. Неотправленные задачи остаются в базе.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+        self._loop = None
+
+    async def join(self) -> None:
+        """
+        Ждёт, пока очередь не опустеет. Задачи со статусом ``failed`` не учитываются.
+        """
+        while self.pending_count():
+            await asyncio.sleep(self.poll_interval)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
@@ -0,0 +1,302 @@
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+from time import time
+from typing import TYPE_CHECKING, Any, Iterable, Literal
+
+from npdtools._sqlite import SQLiteStore
+from npdtools.types.bulk import BulkResult
+from npdtools.types.income import IncomeInfo
+
+if TYPE_CHECKING:
+    from npdtools.modules.receipt import NPDToolsReceipt
+
+ReceiptRef = IncomeInfo | tuple[str, str]
+
+
+class ReceiptCache(SQLiteStore):
+    """
+    Дисковый кеш картинок и JSON чеков.
+
+    Файлы хранятся по sha256 содержимого, поэтому одинаковые ответы занимают место один раз,
+    а индекс ``(ИНН, чек, вид) -> хеш`` лежит в SQLite рядом с файлами.
+    Ответ ФНС пишется на диск потоково, не собираясь целиком в памяти.
+    Когда общий размер превышает ``max_bytes``, удаляются давно не запрашиваемые записи.
+
+    Выданный чек не меняется, пока его не аннулируют. После аннулирования нужно вызвать
+    ``invalidate`` или запросить чек с ``refresh=True``. Для ``IncomeInfo`` с ``cancellation_info``
+    кеш сам проверяет, что запись сделана после аннулирования.
+
+    Attributes:
+        npd: Клиент, через который запрашиваются чеки
+        path: Каталог кеша
+        max_bytes: Максимальный общий размер файлов кеша
+    """
+
+    def __init__(
+        self,
+        npd: "NPDToolsReceipt",
+        path: str | os.PathLike = "npdtools_receipts",
+        max_bytes: int = 512 * 1024 * 1024,
+    ):
+        self.npd = npd
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+
+        (self.path / "blobs").mkdir(parents=True, exist_ok=True)
+        super().__init__(
+            self.path / "index.sqlite3",
+            "CREATE TABLE IF NOT EXISTS receipts ("
+            " key TEXT PRIMARY KEY,"
+            " digest TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL"
+            ");"
+            "CREATE INDEX IF NOT EXISTS receipts_lru ON receipts (accessed_at);",
+            wal=False,
+        )
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def _ref(receipt: ReceiptRef) -> tuple[str, str, float | None]:
+        if isinstance(receipt, IncomeInfo):
+            cancelled_at = (
+                receipt.cancellation_info.registered_at.timestamp()
+                if receipt.cancellation_info is not None
+                else None
+            )
+            return receipt.employee_info.inn, receipt.receipt_id, cancelled_at
+        return receipt[0], receipt[1], None
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.path / "blobs" / digest[:2] / digest
+
+    def _drop(self, key: str) -> int:
+        """
+        Удаляет запись из индекса и файл, если на него больше никто не ссылается.
+        Вызывается под ``self._lock``.
+
+        Returns:
+            int: Сколько байт освобождено на диске
+        """
+        row = self._db.execute(
+            "DELETE FROM receipts WHERE key = ? RETURNING digest, size", (key,)
+        ).fetchone()
+        if row is None:
+            return 0
+        digest, size = row
+        if self._db.execute(
+            "SELECT 1 FROM receipts WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone():
+            return 0
+        self._blob_path(digest).unlink(missing_ok=True)
+        return size
+
+    def _lookup(self, key: str, not_before: float | None) -> Path | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, stored_at FROM receipts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            digest, stored_at = row
+            blob = self._blob_path(digest)
+            if (not_before is not None and stored_at < not_before) or not blob.exists():
+                self._drop(key)
+                return None
+            self._db.execute(
+                "UPDATE receipts SET accessed_at = ? WHERE key = ?", (time(), key)
+            )
+            return blob
+
+    def _store(self, key: str, tmp: Path, digest: str, size: int) -> Path:
+        blob = self._blob_path(digest)
+        blob.parent.mkdir(exist_ok=True)
+        os.replace(tmp, blob)
+
+        now = time()
+        with self._lock:
+            previous = self._db.execute(
+                "SELECT digest FROM receipts WHERE key = ?", (key,)
+            ).fetchone()
+            if previous is not None and previous[0] != digest:
+                self._drop(key)
+            self._db.execute(
+                "INSERT OR REPLACE INTO receipts VALUES (?, ?, ?, ?, ?)",
+                (key, digest, size, now, now),
+            )
+        self._evict(keep=key)
+        return blob
+
+    async def _download(self, key: str, url: str) -> Path:
+        tmp = self.path / "blobs" / f".{os.getpid()}.{id(asyncio.current_task())}.tmp"
+        sha = hashlib.sha256()
+        size = 0
+        try:
+            # Через общий путь запросов: цепь, срок вызова и классы ошибок ФНС
+            response = await self.npd._request(
+                "GET", url=url, auth_required=False, stream=True
+            )
+            try:
+                file = await asyncio.to_thread(open, tmp, "wb")
+                try:
+                    async for chunk in response.aiter_bytes():
+                        sha.update(chunk)
+                        size += len(chunk)
+                        await asyncio.to_thread(file.write, chunk)
+                finally:
+                    await asyncio.to_thread(file.close)
+            finally:
+                await response.aclose()
+            return await asyncio.to_thread(
+                self._store, key, tmp, sha.hexdigest(), size
+            )
+        finally:
+            await asyncio.to_thread(tmp.unlink, missing_ok=True)
+
+    def _evict(self, keep: str | None = None) -> None:
+        """
+        Удаляет давно не запрашиваемые записи, пока размер кеша больше ``max_bytes``.
+        Запись ``keep`` не удаляется, даже если она одна больше ``max_bytes``.
+        """
+        with self._lock:
+            total = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM"
+                " (SELECT DISTINCT digest, size FROM receipts)"
+            ).fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = self._db.execute(
+                "SELECT key FROM receipts WHERE key IS NOT ? ORDER BY accessed_at",
+                (keep,),
+            ).fetchall()
+            for (key,) in rows:
+                if total <= self.max_bytes:
+                    break
+                total -= self._drop(key)
+
+    async def get_path(
+        self,
+        receipt: ReceiptRef,
+        kind: Literal["print", "json"] = "print",
+        refresh: bool = False,
+    ) -> Path:
+        """
+        Возвращает путь к файлу чека в кеше, при необходимости скачивая его.
+        Одновременные запросы одного и того же чека скачивают его один раз.
+
+        Args:
+            receipt: ``IncomeInfo`` или пара ``(ИНН, номер чека)``
+            kind: ``print`` для картинки чека, ``json`` для сведений о чеке
+            refresh: Скачать заново, даже если чек есть в кеше
+
+        Returns:
+            Path: Путь к файлу. Его можно отдавать клиенту напрямую
+
+        Raises:
+            FNSError: ЛК НПД не отдал чек
+        """
+        inn, receipt_id, not_before = self._ref(receipt)
+        key = f"{inn}/{receipt_id}/{kind}"
+
+        if not refresh:
+            blob = await asyncio.to_thread(self._lookup, key, not_before)
+            if blob is not None:
+                return blob
+
+        while (shared := self._in_flight.get(key)) is not None:
+            try:
+                return await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                # Отменена задача, которая скачивала чек, а не эта: скачиваем сами
+                if not shared.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            blob = await self._download(
+                key, self.npd.receipt_url(receipt_id, kind, inn)
+            )
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            future.set_result(blob)
+        finally:
+            del self._in_flight[key]
+        return blob
+
+    async def _read(
+        self, receipt: ReceiptRef, kind: Literal["print", "json"], refresh: bool
+    ) -> bytes:
+        path = await self.get_path(receipt, kind, refresh)
+        try:
+            return await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            # Файл успела вытеснить загрузка другого чека
+            path = await self.get_path(receipt, kind, refresh=True)
+            return await asyncio.to_thread(path.read_bytes)
+
+    async def get_print(self, receipt: ReceiptRef, refresh: bool = False) -> bytes:
+        """
+        Args:
+            receipt: ``IncomeInfo`` или пара ``(ИНН, номер чека)``
+            refresh: Скачать заново, даже если чек есть в кеше
+
+        Returns:
+            bytes: Картинка чека
+        """
+        return await self._read(receipt, "print", refresh)
+
+    async def get_json(
+        self, receipt: ReceiptRef, refresh: bool = False
+    ) -> dict[str, Any]:
+        """
+        Args:
+            receipt: ``IncomeInfo`` или пара ``(ИНН, номер чека)``
+            refresh: Скачать заново, даже если чек есть в кеше
+
+        Returns:
+            JSON'подобный словарь со сведениями о чеке
+        """
+        return self.npd.codec.loads(await self._read(receipt, "json", refresh))
+
+    async def prefetch(
+        self,
+        receipts: Iterable[ReceiptRef],
+        kind: Literal["print", "json"] = "print",
+        concurrency: int = 8,
+    ) -> list[BulkResult]:
+        """
+        Заранее скачивает чеки в кеш. Уже закешированные чеки не скачиваются.
+
+        Args:
+            receipts: Набор ``IncomeInfo`` или пар ``(ИНН, номер чека)``
+            kind: ``print`` для картинок чеков, ``json`` для сведений о чеках
+            concurrency: Максимальное количество одновременных загрузок
+
+        Returns:
+            list[BulkResult]: Результаты в порядке входных чеков, в ``result`` путь к файлу
+        """
+        return await self.npd._run_bulk(
+            lambda receipt: self.get_path(receipt, kind), receipts, concurrency
+        )
+
+    def invalidate(self, inn: str, receipt_id: str) -> None:
+        """
+        Удаляет чек из индекса кеша, например, после аннулирования.
+
+        Args:
+            inn: ИНН самозанятого
+            receipt_id: Номер чека
+        """
+        with self._lock:
+            for kind in ("print", "json"):
+                self._drop(f"{inn}/{receipt_id}/{kind}")
@@ -0,0 +1,225 @@
+import asyncio
+from datetime import datetime
+from time import monotonic
+from typing import TYPE_CHECKING, AsyncIterable, Callable, Iterable
+
+from pydantic import Field
+
+from npdtools.timeutils import now
+from npdtools.types.base import NPDModel
+from npdtools.types.invoice import Invoice, InvoiceStatusChange
+
+if TYPE_CHECKING:
+    from npdtools.modules.invoice import NPDToolsInvoice
+
+
+class IssuanceStats(NPDModel):
+    """
+    Прогресс выдачи чеков к счетам
+
+    Attributes:
+        found: Найдено счетов, оплаченных без чека
+        completed: Выдано чеков
+        skipped: Пропущено счетов, к которым чек уже выдан или выдаётся
+        failed: Счетов, к которым не удалось выдать чек
+        errors: Последняя ошибка по номеру счёта
+        started_at: Время начала по ``time.monotonic()``
+    """
+
+    found: int = 0
+    completed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: dict[int, str] = Field(default_factory=dict)
+    started_at: float = Field(default_factory=monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Returns:
+            float: Сколько секунд прошло с начала
+        """
+        return monotonic() - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """
+        Returns:
+            float: Выдано чеков в секунду
+        """
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+
+def needs_receipt(invoice: Invoice) -> bool:
+    """
+    Args:
+        invoice: Объект счёта
+
+    Returns:
+        bool: Оплачен ли счёт без выданного чека
+    """
+    return (
+        invoice.status == "PAID_WITHOUT_RECEIPT"
+        and invoice.is_paid
+        and invoice.receipt_id is None
+    )
+
+
+class InvoiceReceiptIssuer:
+    """
+    Находит счета, оплаченные без чека, и параллельно выдаёт к ним чеки через ``invoice_complete``.
+
+    Идемпотентен: счёт с ``receipt_id`` считается обработанным, поэтому после перезапуска
+    повторный проход выдаст чеки только к оставшимся счетам.
+    Время получения дохода берётся из ``Invoice.paid_at``.
+
+    ```python
+    issuer = InvoiceReceiptIssuer(npd, workers=8, on_progress=print)
+    stats = await issuer.run(from_date=30)
+    ```
+
+    Attributes:
+        npd: Клиент, через который выдаются чеки
+        inn: ИНН самозанятого. По умолчанию ``default_inn`` клиента
+        workers: Количество одновременных запросов ``invoice_complete``
+        page_size: Количество счетов на одной странице при поиске
+        on_progress: Вызывается с ``IssuanceStats`` после обработки каждого счёта
+        stats: Прогресс текущего или последнего запуска
+    """
+
+    def __init__(
+        self,
+        npd: "NPDToolsInvoice",
+        inn: str | None = None,
+        workers: int = 8,
+        page_size: int = 100,
+        on_progress: Callable[[IssuanceStats], None] | None = None,
+    ):
+        self.npd = npd
+        self.inn = inn
+        self.workers = workers
+        self.page_size = page_size
+        self.on_progress = on_progress
+        self.stats = IssuanceStats()
+
+        self._in_flight: set[int] = set()
+        self._semaphore = asyncio.Semaphore(workers)
+
+    async def complete(self, invoice: Invoice) -> Invoice | None:
+        """
+        Выдаёт чек к одному счёту, если он ещё нужен.
+
+        Args:
+            invoice: Объект счёта
+
+        Returns:
+            Invoice | None: Актуальный объект счёта или ``None``, если счёт пропущен или произошла ошибка
+        """
+        if not needs_receipt(invoice) or invoice.invoice_id in self._in_flight:
+            self.stats.skipped += 1
+            self._report()
+            return None
+
+        self._in_flight.add(invoice.invoice_id)
+        try:
+            async with self._semaphore:
+                result = await self.npd.invoice_complete(
+                    invoice.invoice_id,
+                    operation_time=invoice.paid_at,
+                    inn=self.inn,
+                )
+        except Exception as e:
+            self.stats.failed += 1
+            self.stats.errors[invoice.invoice_id] = repr(e)
+            result = None
+        else:
+            self.stats.completed += 1
+            self.stats.errors.pop(invoice.invoice_id, None)
+        finally:
+            self._in_flight.discard(invoice.invoice_id)
+
+        self._report()
+        return result
+
+    def _report(self) -> None:
+        if self.on_progress is not None:
+            self.on_progress(self.stats)
+
+    async def scan(self, from_date: datetime | int = 30) -> AsyncIterable[Invoice]:
+        """
+        Постранично перебирает счета за период и отдаёт только оплаченные без чека.
+
+        Args:
+            from_date: Время начала поиска или количество дней назад
+        """
+        async for invoice in self.npd.iter_invoices(
+            from_date=from_date,
+            to_date=now(),
+            page_size=self.page_size,
+            inn=self.inn,
+        ):
+            if needs_receipt(invoice):
+                yield invoice
+
+    async def process(
+        self, invoices: Iterable[Invoice] | AsyncIterable[Invoice]
+    ) -> IssuanceStats:
+        """
+        Выдаёт чеки к переданным счетам. Одновременно выполняется не больше ``workers`` запросов,
+        а новые счета читаются из источника только по мере освобождения воркеров.
+
+        Args:
+            invoices: Итерируемый или асинхронно итерируемый набор счетов
+
+        Returns:
+            IssuanceStats: Итоговая статистика
+        """
+        self.stats = IssuanceStats()
+        queue: asyncio.Queue[Invoice | None] = asyncio.Queue(maxsize=self.workers * 2)
+
+        async def worker():
+            while (invoice := await queue.get()) is not None:
+                await self.complete(invoice)
+
+        tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        try:
+            if isinstance(invoices, AsyncIterable):
+                async for invoice in invoices:
+                    self.stats.found += 1
+                    await queue.put(invoice)
+            else:
+                for invoice in invoices:
+                    self.stats.found += 1
+                    await queue.put(invoice)
+            for _ in tasks:
+                await queue.put(None)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return self.stats
+
+    async def run(self, from_date: datetime | int = 30) -> IssuanceStats:
+        """
+        Ищет счета, оплаченные без чека, и выдаёт к ним чеки.
+
+        Args:
+            from_date: Время начала поиска или количество дней назад
+
+        Returns:
+            IssuanceStats: Итоговая статистика
+        """
+        return await self.process(self.scan(from_date))
+
+    async def handle_change(self, change: InvoiceStatusChange) -> None:
+        """
+        Обработчик для ``InvoiceWatcher.on_change``: выдаёт чек, как только счёт оплачен без чека.
+
+        Args:
+            change: Событие изменения статуса счёта
+        """
+        if needs_receipt(change.invoice):
+            self.stats.found += 1
+            await self.complete(change.invoice)
@@ -0,0 +1,328 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import AsyncIterable, Hashable, Iterable
+
+from npdtools.compact import CompactIncome
+from npdtools.helpers import aiterate
+from npdtools.timeutils import to_local
+from npdtools.types.income import IncomeInfo
+
+
+@dataclass(frozen=True, slots=True)
+class LedgerPayment:
+    """
+    Платёж из собственного учёта, для которого должен существовать чек.
+
+    Attributes:
+        payment_id: Идентификатор платежа в учёте
+        amount: Сумма платежа
+        paid_at: Время получения денег, сравнивается с ``IncomeInfo.received_at``.
+            Время без часового пояса считается локальным
+        client_inn: ИНН клиента, если известен
+        receipt_id: Номер чека, если он сохранён в учёте
+    """
+
+    payment_id: Hashable
+    amount: Decimal
+    paid_at: datetime
+    client_inn: str | None = None
+    receipt_id: str | None = None
+
+    def __post_init__(self):
+        # Время из учёта часто без часового пояса, а из ЛК НПД — всегда с ним
+        if self.paid_at.tzinfo is None:
+            object.__setattr__(self, "paid_at", to_local(self.paid_at))
+
+
+@dataclass(slots=True)
+class Mismatch:
+    """
+    Attributes:
+        payment: Платёж
+        receipt: Чек, найденный по номеру или по клиенту и времени
+        reasons: Что не совпало: ``amount``, ``time``, ``client``
+            или ``receipt``, если чек уже сопоставлен другому платежу
+    """
+
+    payment: LedgerPayment
+    receipt: IncomeInfo | CompactIncome
+    reasons: tuple[str, ...]
+
+
+@dataclass(slots=True)
+class ReconciliationReport:
+    """
+    Результат сверки.
+
+    Attributes:
+        matched: Платежи, для которых найден ровно один действующий чек
+        missing: Платежи без чека
+        duplicated: Платежи, которым соответствует больше одного действующего чека, и лишние чеки
+        mismatched: Платежи, чек которых отличается суммой, временем или клиентом
+        cancelled: Платежи, чек которых аннулирован, а действующего нет
+        unexpected: Действующие чеки, которым не соответствует ни один платёж
+    """
+
+    matched: list[tuple[LedgerPayment, IncomeInfo | CompactIncome]] = field(
+        default_factory=list
+    )
+    missing: list[LedgerPayment] = field(default_factory=list)
+    duplicated: list[
+        tuple[LedgerPayment, list[IncomeInfo | CompactIncome]]
+    ] = field(default_factory=list)
+    mismatched: list[Mismatch] = field(default_factory=list)
+    cancelled: list[tuple[LedgerPayment, IncomeInfo | CompactIncome]] = field(
+        default_factory=list
+    )
+    unexpected: list[IncomeInfo | CompactIncome] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """
+        Returns:
+            bool: Сверка прошла без расхождений
+        """
+        return not (
+            self.missing
+            or self.duplicated
+            or self.mismatched
+            or self.cancelled
+            or self.unexpected
+        )
+
+    def summary(self) -> dict[str, int]:
+        return {
+            "matched": len(self.matched),
+            "missing": len(self.missing),
+            "duplicated": len(self.duplicated),
+            "mismatched": len(self.mismatched),
+            "cancelled": len(self.cancelled),
+            "unexpected": len(self.unexpected),
+        }
+
+
+def _is_cancelled(receipt: IncomeInfo | CompactIncome) -> bool:
+    if isinstance(receipt, CompactIncome):
+        return receipt.is_cancelled
+    return receipt.cancellation_info is not None
+
+
+class Reconciler:
+    """
+    Сверка платежей из собственного учёта с чеками ЛК НПД.
+
+    Каждому платежу должен соответствовать ровно один действующий (не аннулированный) чек
+    с той же суммой и временем получения денег в пределах ``time_tolerance``.
+    Если в учёте сохранён номер чека, платёж сверяется с ним напрямую.
+
+    Чеки индексируются хешами по номеру, по сумме и интервалу времени и по клиенту и интервалу времени,
+    поэтому каждый платёж проверяется за постоянное время, а вся сверка линейна
+    по количеству чеков и платежей. Платежи читаются потоком и в памяти не держатся.
+
+    ```python
+    reconciler = Reconciler()
+    await reconciler.add_receipts(npd.iter_incomes(from_date=31))
+    report = await reconciler.reconcile(ledger_payments())
+    print(report.summary())
+    ```
+
+    Attributes:
+        time_tolerance: Допустимое расхождение времени платежа и чека
+    """
+
+    def __init__(self, time_tolerance: timedelta = timedelta(minutes=5)):
+        self.time_tolerance = time_tolerance
+        self._bucket_size = max(time_tolerance.total_seconds(), 1.0)
+
+        self._receipts: list[IncomeInfo | CompactIncome] = []
+        self._consumed: list[bool] = []
+        self._by_id: dict[str, int] = {}
+        self._by_amount: dict[tuple[Decimal, int], list[int]] = defaultdict(list)
+        self._by_client: dict[tuple[str, int], list[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._receipts)
+
+    def _bucket(self, moment: datetime) -> int:
+        return int(moment.timestamp() // self._bucket_size)
+
+    def add_receipt(self, receipt: IncomeInfo | CompactIncome) -> None:
+        if receipt.receipt_id in self._by_id:
+            return
+        index = len(self._receipts)
+        self._receipts.append(receipt)
+        self._consumed.append(False)
+        self._by_id[receipt.receipt_id] = index
+
+        bucket = self._bucket(receipt.received_at)
+        self._by_amount[(receipt.total_amount, bucket)].append(index)
+        if receipt.client_info.inn:
+            self._by_client[(receipt.client_info.inn, bucket)].append(index)
+
+    async def add_receipts(
+        self,
+        receipts: Iterable[IncomeInfo | CompactIncome]
+        | AsyncIterable[IncomeInfo | CompactIncome],
+    ) -> int:
+        """
+        Добавляет чеки в индекс, например, из ``npd.iter_incomes``.
+
+        Returns:
+            int: Количество чеков в индексе
+        """
+        async for receipt in aiterate(receipts):
+            self.add_receipt(receipt)
+        return len(self._receipts)
+
+    def _near(
+        self, index: dict[tuple, list[int]], key: Hashable, moment: datetime
+    ) -> list[int]:
+        bucket = self._bucket(moment)
+        found = []
+        for b in (bucket - 1, bucket, bucket + 1):
+            for i in index.get((key, b), ()):
+                if abs(self._receipts[i].received_at - moment) <= self.time_tolerance:
+                    found.append(i)
+        return found
+
+    @staticmethod
+    def _client_fits(payment: LedgerPayment, receipt) -> bool:
+        return (
+            payment.client_inn is None
+            or receipt.client_info.inn is None
+            or payment.client_inn == receipt.client_info.inn
+        )
+
+    def _check_direct(
+        self, payment: LedgerPayment, report: ReconciliationReport
+    ) -> int | None:
+        index = self._by_id.get(payment.receipt_id)
+        if index is None:
+            report.missing.append(payment)
+            return None
+
+        receipt = self._receipts[index]
+        if self._consumed[index]:
+            # Чек уже достался другому платежу: не перезаписываем его сопоставление
+            report.mismatched.append(Mismatch(payment, receipt, ("receipt",)))
+            return None
+
+        self._consumed[index] = True
+        if _is_cancelled(receipt):
+            report.cancelled.append((payment, receipt))
+            return None
+
+        reasons = []
+        if receipt.total_amount != payment.amount:
+            reasons.append("amount")
+        if abs(receipt.received_at - payment.paid_at) > self.time_tolerance:
+            reasons.append("time")
+        if not self._client_fits(payment, receipt):
+            reasons.append("client")
+        if reasons:
+            report.mismatched.append(Mismatch(payment, receipt, tuple(reasons)))
+            return None
+        return index
+
+    def _check_search(
+        self, payment: LedgerPayment, report: ReconciliationReport
+    ) -> int | None:
+        candidates = [
+            i
+            for i in self._near(self._by_amount, payment.amount, payment.paid_at)
+            if not self._consumed[i] and self._client_fits(payment, self._receipts[i])
+        ]
+        active = [i for i in candidates if not _is_cancelled(self._receipts[i])]
+        if active:
+            best = min(
+                active,
+                key=lambda i: abs(self._receipts[i].received_at - payment.paid_at),
+            )
+            self._consumed[best] = True
+            return best
+
+        if candidates:
+            self._consumed[candidates[0]] = True
+            report.cancelled.append((payment, self._receipts[candidates[0]]))
+            return None
+
+        if payment.client_inn is not None:
+            nearby = self._near(self._by_client, payment.client_inn, payment.paid_at)
+            same_client = [
+                i
+                for i in nearby
+                if not self._consumed[i] and not _is_cancelled(self._receipts[i])
+            ]
+            if same_client:
+                self._consumed[same_client[0]] = True
+                report.mismatched.append(
+                    Mismatch(payment, self._receipts[same_client[0]], ("amount",))
+                )
+                return None
+
+        report.missing.append(payment)
+        return None
+
+    async def reconcile(
+        self, ledger: Iterable[LedgerPayment] | AsyncIterable[LedgerPayment]
+    ) -> ReconciliationReport:
+        """
+        Сверяет платежи с добавленными чеками.
+
+        Чеки, совпавшие с уже сопоставленным платежом по сумме, времени и клиенту,
+        считаются дублями этого платежа, остальные несопоставленные действующие чеки попадают в ``unexpected``.
+
+        Args:
+            ledger: Платежи из учёта, читаются потоком
+
+        Returns:
+            ReconciliationReport: Результат сверки
+        """
+        self._consumed = [False] * len(self._receipts)
+        report = ReconciliationReport()
+        matched: dict[int, LedgerPayment] = {}
+
+        async for payment in aiterate(ledger):
+            if payment.receipt_id is not None:
+                index = self._check_direct(payment, report)
+            else:
+                index = self._check_search(payment, report)
+            if index is not None:
+                matched[index] = payment
+
+        # Лишние действующие чеки: дубли сопоставленных платежей или чеки без платежа
+        extra: dict[int, list[int]] = defaultdict(list)
+        for index, receipt in enumerate(self._receipts):
+            if self._consumed[index] or _is_cancelled(receipt):
+                continue
+            twin = next(
+                (
+                    i
+                    for i in self._near(
+                        self._by_amount, receipt.total_amount, receipt.received_at
+                    )
+                    if i in matched
+                    and self._client_fits(matched[i], receipt)
+                ),
+                None,
+            )
+            if twin is None:
+                report.unexpected.append(receipt)
+            else:
+                extra[twin].append(index)
+
+        for index, payment in matched.items():
+            if index in extra:
+                report.duplicated.append(
+                    (
+                        payment,
+                        [self._receipts[index]]
+                        + [self._receipts[i] for i in extra[index]],
+                    )
+                )
+            else:
+                report.matched.append((payment, self._receipts[index]))
+
+        return report
@@ -0,0 +1,349 @@
+import asyncio
+import gzip
+import re
+import secrets
+from datetime import timedelta
+from hashlib import blake2b
+from string import ascii_lowercase, ascii_uppercase
+from time import monotonic
+from typing import Any
+
+import httpx
+
+from npdtools.circuit_breaker import endpoint_of
+from npdtools.codec import JSONCodec, get_codec
+from npdtools.timeutils import format_time, now, parse_time
+
+SENSITIVE_KEYS: frozenset[str] = frozenset(
+    {
+        "inn",
+        "clientInn",
+        "username",
+        "password",
+        "token",
+        "refreshToken",
+        "refresh_token",
+        "sourceDeviceId",
+        "phone",
+        "contactPhone",
+        "clientContactPhone",
+        "email",
+        "displayName",
+        "clientDisplayName",
+        "account",
+        "corrAccount",
+    }
+)
+_TIME_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}")
+_INN_PATTERN = re.compile(r"/(\d{10}|\d{12})(?=/|$)")
+_KEPT_HEADERS = ("content-type", "retry-after")
+
+
+class Anonymizer:
+    """
+    Заменяет персональные данные в записываемом трафике псевдонимами.
+
+    Значения ключей из ``keys`` заменяются псевдонимом той же длины и того же вида:
+    цифры цифрами, буквы буквами. Одно и то же значение всегда получает один и тот же псевдоним,
+    поэтому связи между запросами сохраняются. Псевдонимы строятся по случайному секрету,
+    который не попадает в кассету, и не позволяют восстановить исходные значения.
+
+    Attributes:
+        keys: Ключи JSON, значения которых заменяются
+    """
+
+    def __init__(
+        self, keys: frozenset[str] = SENSITIVE_KEYS, secret: bytes | None = None
+    ):
+        self.keys = keys
+        self._secret = secret or secrets.token_bytes(16)
+
+    def value(self, value: str) -> str:
+        """
+        Returns:
+            str: Псевдоним значения
+        """
+        digest = blake2b(value.encode(), key=self._secret).digest()
+        chars = []
+        for i, char in enumerate(value):
+            byte = digest[i % len(digest)]
+            if char.isdigit():
+                chars.append(str(byte % 10))
+            elif char.isupper():
+                chars.append(ascii_uppercase[byte % 26])
+            elif char.isalpha():
+                chars.append(ascii_lowercase[byte % 26])
+            else:
+                chars.append(char)
+        return "".join(chars)
+
+    def json(self, data: Any) -> Any:
+        """
+        Returns:
+            Any: Копия данных JSON с заменёнными значениями
+        """
+        if isinstance(data, dict):
+            return {
+                key: (
+                    self.value(str(value))
+                    if key in self.keys and isinstance(value, (str, int))
+                    else self.json(value)
+                )
+                for key, value in data.items()
+            }
+        if isinstance(data, list):
+            return [self.json(value) for value in data]
+        return data
+
+    def path(self, path: str) -> str:
+        """
+        Returns:
+            str: Путь запроса с заменёнными ИНН
+        """
+        return _INN_PATTERN.sub(lambda m: "/" + self.value(m.group(1)), path)
+
+
+def _normalize(data: Any, keys: frozenset[str]) -> Any:
+    # Без персональных данных и времени: запрос при воспроизведении совпадёт с записанным
+    if isinstance(data, dict):
+        return {
+            key: _normalize(data[key], keys) for key in sorted(data) if key not in keys
+        }
+    if isinstance(data, list):
+        return [_normalize(value, keys) for value in data]
+    if isinstance(data, str) and _TIME_PATTERN.match(data):
+        return "<time>"
+    return data
+
+
+def request_key(
+    request: httpx.Request,
+    codec: JSONCodec,
+    keys: frozenset[str] = SENSITIVE_KEYS,
+) -> str:
+    """
+    Отпечаток запроса для поиска ответа в кассете: метод, эндпоинт, параметры и тело JSON
+    без персональных данных и значений времени.
+
+    Returns:
+        str: Отпечаток
+    """
+    body = None
+    if request.content and "json" in request.headers.get("content-type", ""):
+        body = codec.loads(request.content)
+    query = sorted(
+        (key, _normalize(value, keys))
+        for key, value in request.url.params.multi_items()
+        if key not in keys
+    )
+    data = [
+        request.method,
+        endpoint_of(request.url.path),
+        query,
+        _normalize(body, keys),
+    ]
+    return blake2b(codec.dumps(data), digest_size=8).hexdigest()
+
+
+class Cassette:
+    """
+    Записанный трафик: по одной записи на запрос с эндпоинтом, отпечатком запроса,
+    временем отправки, задержкой и ответом. Сохраняется в JSON Lines со сжатием gzip.
+
+    Ответы JSON хранятся целиком, остальные, например, картинки чеков, — только размером.
+
+    Attributes:
+        entries: Записи в порядке завершения запросов
+        started_at: Время начала записи
+    """
+
+    def __init__(
+        self, entries: list[dict] | None = None, started_at: str | None = None
+    ):
+        self.entries: list[dict] = entries if entries is not None else []
+        self.started_at: str = started_at or format_time(now())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def save(self, path: str, codec: JSONCodec | str | None = None) -> None:
+        codec = get_codec(codec)
+        with gzip.open(path, "wb") as file:
+            file.write(codec.dumps({"version": 1, "started_at": self.started_at}))
+            for entry in self.entries:
+                file.write(b"\n")
+                file.write(codec.dumps(entry))
+
+    @classmethod
+    def load(cls, path: str, codec: JSONCodec | str | None = None) -> "Cassette":
+        codec = get_codec(codec)
+        with gzip.open(path, "rb") as file:
+            header, *entries = [codec.loads(line) for line in file if line.strip()]
+        return cls(entries, header["started_at"])
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """
+    Транспорт httpx, записывающий проходящий через него трафик в кассету
+    с заменой персональных данных. Токены авторизации из заголовков не записываются.
+
+    ```python
+    recorder = RecordingTransport()
+    npd = NPDTools(http_session=httpx.AsyncClient(transport=recorder))
+    ...
+    recorder.cassette.save("traffic.jsonl.gz")
+    ```
+
+    Attributes:
+        transport: Транспорт, через который запросы уходят в ЛК НПД
+        anonymizer: Замена персональных данных
+        cassette: Записываемая кассета
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport | None = None,
+        anonymizer: Anonymizer | None = None,
+        codec: JSONCodec | str | None = None,
+    ):
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        self.anonymizer = anonymizer or Anonymizer()
+        self.codec = get_codec(codec)
+        self.cassette = Cassette()
+        self._started = monotonic()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        sent = monotonic()
+        response = await self.transport.handle_async_request(request)
+        try:
+            raw = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        latency = monotonic() - sent
+
+        response = httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            content=raw,
+            extensions=response.extensions,
+            request=request,
+        )
+        self.cassette.entries.append(self._entry(request, response, sent, latency))
+        return response
+
+    def _entry(
+        self,
+        request: httpx.Request,
+        response: httpx.Response,
+        sent: float,
+        latency: float,
+    ) -> dict:
+        entry = {
+            "t": round(sent - self._started, 6),
+            "latency": round(latency, 6),
+            "method": request.method,
+            "endpoint": endpoint_of(request.url.path),
+            "path": self.anonymizer.path(request.url.path),
+            "key": request_key(request, self.codec, self.anonymizer.keys),
+            "status": response.status_code,
+            "headers": {
+                name: response.headers[name]
+                for name in _KEPT_HEADERS
+                if name in response.headers
+            },
+        }
+        body = response.content
+        if body and "json" in response.headers.get("content-type", ""):
+            try:
+                entry["json"] = self.anonymizer.json(self.codec.loads(body))
+            except ValueError:
+                entry["size"] = len(body)
+        else:
+            entry["size"] = len(body)
+        return entry
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class ReplayTransport(httpx.MockTransport):
+    """
+    Транспорт httpx, отвечающий на запросы ответами из кассеты.
+
+    Ответ ищется по отпечатку запроса, а если такого запроса не записано — по эндпоинту.
+    Ответы одного отпечатка выдаются по кругу в порядке записи, поэтому постраничные
+    запросы и массовые методы получают те же ответы, что и при записи.
+    Срок действия токенов в ответах авторизации отсчитывается от момента воспроизведения.
+
+    ```python
+    replay = ReplayTransport(Cassette.load("traffic.jsonl.gz"), speed=10)
+    npd = NPDTools(http_session=httpx.AsyncClient(transport=replay))
+    ```
+
+    Attributes:
+        cassette: Кассета
+        speed: Во сколько раз быстрее записанных задержек отвечать. ``None`` — без задержек
+        metrics: Количество ответов по отпечатку (``exact``) и по эндпоинту (``fallback``)
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        speed: float | None = 1.0,
+        codec: JSONCodec | str | None = None,
+    ):
+        super().__init__(self._respond)
+        self.cassette = cassette
+        self.speed = speed
+        self.codec = get_codec(codec)
+        self.metrics: dict[str, int] = {"exact": 0, "fallback": 0}
+
+        started_at = parse_time(cassette.started_at)
+        self._by_key: dict[str, list[dict]] = {}
+        self._by_endpoint: dict[tuple[str, str], list[dict]] = {}
+        self._cursors: dict[Any, int] = {}
+        self._token_lifetimes: dict[int, float] = {}
+        for entry in cassette.entries:
+            self._by_key.setdefault(entry["key"], []).append(entry)
+            self._by_endpoint.setdefault(
+                (entry["method"], entry["endpoint"]), []
+            ).append(entry)
+            if "tokenExpireIn" in (entry.get("json") or {}):
+                received = started_at + timedelta(seconds=entry["t"])
+                lifetime = parse_time(entry["json"]["tokenExpireIn"]) - received
+                self._token_lifetimes[id(entry)] = lifetime.total_seconds()
+
+    def _next(self, entries: list[dict], cursor_key: Any) -> dict:
+        cursor = self._cursors.get(cursor_key, 0)
+        self._cursors[cursor_key] = cursor + 1
+        return entries[cursor % len(entries)]
+
+    async def _respond(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request, self.codec)
+        if key in self._by_key:
+            entry = self._next(self._by_key[key], key)
+            self.metrics["exact"] += 1
+        else:
+            endpoint = (request.method, endpoint_of(request.url.path))
+            if endpoint not in self._by_endpoint:
+                raise LookupError(
+                    f"В кассете нет ответа на {request.method} {request.url.path}"
+                )
+            entry = self._next(self._by_endpoint[endpoint], endpoint)
+            self.metrics["fallback"] += 1
+
+        if self.speed:
+            await asyncio.sleep(entry["latency"] / self.speed)
+
+        if "json" in entry:
+            data = entry["json"]
+            lifetime = self._token_lifetimes.get(id(entry))
+            if lifetime is not None:
+                expires = now() + timedelta(seconds=lifetime)
+                data = data | {"tokenExpireIn": format_time(expires)}
+            content = self.codec.dumps(data)
+        else:
+            content = bytes(entry["size"])
+        return httpx.Response(
+            entry["status"], headers=entry["headers"], content=content
+        )
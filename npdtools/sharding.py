@@ -0,0 +1,385 @@
+import asyncio
+import inspect
+import multiprocessing
+import multiprocessing.connection
+import os
+import pickle
+import threading
+from itertools import count
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+)
+from zlib import crc32
+
+from npdtools.helpers import aiterate
+from npdtools.types.bulk import BulkResult
+
+if TYPE_CHECKING:
+    from npdtools.modules.client import NPDTools
+
+Job = str | Callable[..., Awaitable[Any]]
+
+# Вместо номера задачи в очереди результатов: процесс шарда завершился
+_WORKER_EXIT = "exit"
+
+
+def shard_of(inn: str, shards: int) -> int:
+    """
+    Returns:
+        int: Номер процесса, которому принадлежит ИНН. Не зависит от ``PYTHONHASHSEED``
+    """
+    return crc32(inn.encode()) % shards
+
+
+def _accepts_inn(func: Callable) -> bool:
+    try:
+        return "inn" in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _check_job(func: Callable) -> None:
+    if inspect.isasyncgenfunction(func):
+        raise TypeError(
+            f"{getattr(func, '__name__', func)} — асинхронный генератор,"
+            " его результат нельзя передать между процессами"
+        )
+
+
+async def _run_job(
+    npd: "NPDTools | Exception", job: tuple, results, semaphore
+) -> None:
+    job_id, func, inn, args, kwargs = job
+    try:
+        if isinstance(npd, Exception):
+            # client_factory не создала клиента: ошибка запуска уходит каждой задаче
+            raise npd
+        if isinstance(func, str):
+            method = getattr(npd, func)
+            _check_job(method)
+            if _accepts_inn(method):
+                kwargs = kwargs | {"inn": inn}
+            payload = (job_id, await method(*args, **kwargs), None)
+        else:
+            payload = (job_id, await func(npd, inn, *args, **kwargs), None)
+    except Exception as e:
+        payload = (job_id, None, e)
+    finally:
+        semaphore.release()
+
+    try:
+        data = pickle.dumps(payload)
+    except Exception as e:
+        # Результат или исключение не передать в родительский процесс как есть
+        error = RuntimeError(f"{payload[2]!r}" if payload[2] else repr(e))
+        data = pickle.dumps((job_id, None, error))
+    results.put((job_id, data))
+
+
+async def _serve(factory: Callable[[], "NPDTools"], jobs, results, concurrency: int):
+    try:
+        npd = factory()
+    except Exception as e:
+        npd = e
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks: set[asyncio.Task] = set()
+
+    while True:
+        await semaphore.acquire()
+        job = await loop.run_in_executor(None, jobs.get)
+        if job is None:
+            break
+        task = asyncio.create_task(_run_job(npd, job, results, semaphore))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    await asyncio.gather(*tasks)
+    if not isinstance(npd, Exception) and npd._http_session is not None:
+        await npd._http_session.aclose()
+
+
+def _worker(factory: Callable[[], "NPDTools"], jobs, results, concurrency: int):
+    asyncio.run(_serve(factory, jobs, results, concurrency))
+
+
+class ShardedRunner:
+    """
+    Распределяет работу с большим количеством ИНН по нескольким процессам.
+
+    Разбор JSON и валидация моделей упираются в одно ядро, поэтому при тысячах ИНН один цикл
+    событий не справляется. Каждый процесс создаёт свой клиент через ``client_factory``
+    с собственным пулом соединений, а ИНН закрепляются за процессами по хешу:
+    все вызовы одного ИНН выполняются в одном процессе, поэтому токен каждого ИНН
+    обновляет только один процесс.
+
+    Задача — имя метода ``NPDTools`` или асинхронная функция ``func(npd, inn, *args, **kwargs)``,
+    объявленная на уровне модуля. Аргументы и результаты передаются между процессами через ``pickle``.
+    Асинхронные генераторы, например, ``iter_incomes``, задачами быть не могут:
+    соберите результат в список в собственной функции.
+
+    Если процесс завершился, задачи его ИНН завершаются ``RuntimeError``, а новые задачи
+    этих ИНН сразу получают ту же ошибку. Ошибка ``client_factory`` возвращается каждой задаче процесса.
+
+    ```python
+    def make_client():
+        return NPDTools(token_manager=MyDBTokenManager)
+
+    async with ShardedRunner(make_client) as runner:
+        async for result in runner.stream("get_invoices", inns):
+            ...
+    ```
+
+    Warning: Менеджер токенов
+        Процессы не видят память друг друга. ``client_factory`` должна создавать клиента
+        с менеджером токенов, который загружает и сохраняет токены во внешнем хранилище.
+
+    Attributes:
+        client_factory: Функция уровня модуля, создающая клиента в процессе
+        processes: Количество процессов. По умолчанию количество ядер
+        concurrency: Количество одновременных задач в одном процессе
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], "NPDTools"],
+        processes: int | None = None,
+        concurrency: int = 10,
+        start_method: str = "spawn",
+    ):
+        self.client_factory = client_factory
+        self.processes = processes or os.cpu_count() or 1
+        self.concurrency = concurrency
+
+        self._context = multiprocessing.get_context(start_method)
+        self._job_queues: list = []
+        self._results = None
+        self._workers: list = []
+        self._reader: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._futures: dict[int, asyncio.Future] = {}
+        self._job_shards: dict[int, int] = {}
+        self._dead: dict[int, Exception] = {}
+        self._watcher: threading.Thread | None = None
+        self._ids = count()
+
+    def shard_of(self, inn: str) -> int:
+        return shard_of(inn, self.processes)
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._results = self._context.Queue()
+        self._job_queues = [self._context.Queue() for _ in range(self.processes)]
+        self._workers = [
+            self._context.Process(
+                target=_worker,
+                args=(self.client_factory, jobs, self._results, self.concurrency),
+                daemon=True,
+            )
+            for jobs in self._job_queues
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._reader = threading.Thread(target=self._read_results, daemon=True)
+        self._reader.start()
+        self._watcher = threading.Thread(target=self._watch_workers, daemon=True)
+        self._watcher.start()
+
+    def _watch_workers(self) -> None:
+        sentinels = {
+            worker.sentinel: shard for shard, worker in enumerate(self._workers)
+        }
+        while sentinels:
+            for sentinel in multiprocessing.connection.wait(list(sentinels)):
+                shard = sentinels.pop(sentinel)
+                self._workers[shard].join()
+                # Через очередь результатов: ответы, отправленные процессом до выхода, придут раньше
+                self._results.put((_WORKER_EXIT, shard))
+
+    def _read_results(self) -> None:
+        while True:
+            item = self._results.get()
+            if item is None:
+                return
+            try:
+                job_id, data = item
+            except (TypeError, ValueError):
+                # Не понять, к какой задаче относится ответ: ждать его бессмысленно всем
+                error = RuntimeError(f"Некорректный ответ процесса: {item!r:.200}")
+                self._loop.call_soon_threadsafe(self._fail_all, error)
+                continue
+            if job_id == _WORKER_EXIT:
+                error = RuntimeError(
+                    f"Процесс шарда {data} завершился"
+                    f" с кодом {self._workers[data].exitcode}"
+                )
+                self._loop.call_soon_threadsafe(self._fail_shard, data, error)
+                continue
+            try:
+                payload = pickle.loads(data)
+            except Exception as e:
+                error = RuntimeError(f"Не удалось разобрать результат задачи: {e!r}")
+                payload = (job_id, None, error)
+            self._loop.call_soon_threadsafe(self._resolve, payload)
+
+    def _fail_all(self, error: Exception) -> None:
+        futures = list(self._futures.values())
+        self._futures.clear()
+        self._job_shards.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    def _fail_shard(self, shard: int, error: Exception) -> None:
+        self._dead[shard] = error
+        for job_id in [i for i, s in self._job_shards.items() if s == shard]:
+            self._resolve((job_id, None, error))
+
+    def _resolve(self, payload: tuple) -> None:
+        job_id, result, error = payload
+        self._job_shards.pop(job_id, None)
+        future = self._futures.pop(job_id, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def submit(self, inn: str, job: Job, *args, **kwargs) -> asyncio.Future:
+        """
+        Отправляет задачу процессу, которому принадлежит ИНН.
+
+        Args:
+            inn: ИНН самозанятого
+            job: Имя метода ``NPDTools`` или асинхронная функция ``func(npd, inn, *args, **kwargs)``
+            *args: Аргументы задачи
+            **kwargs: Именованные аргументы задачи
+
+        Returns:
+            asyncio.Future: Результат задачи
+
+        Raises:
+            TypeError: Задача — асинхронный генератор
+        """
+        if not self._workers:
+            raise RuntimeError("Сначала нужно вызвать start()")
+        if isinstance(job, str):
+            from npdtools.modules.client import NPDTools
+
+            _check_job(getattr(NPDTools, job, None))
+        else:
+            _check_job(job)
+
+        shard = self.shard_of(inn)
+        future = self._loop.create_future()
+        if shard in self._dead:
+            future.set_exception(self._dead[shard])
+            return future
+        job_id = next(self._ids)
+        self._futures[job_id] = future
+        self._job_shards[job_id] = shard
+        self._job_queues[shard].put((job_id, job, inn, args, kwargs))
+        return future
+
+    async def run(self, inn: str, job: Job, *args, **kwargs) -> Any:
+        """
+        То же, что ``submit``, но ждёт результат.
+        """
+        return await self.submit(inn, job, *args, **kwargs)
+
+    async def stream(
+        self,
+        job: Job,
+        inns: Iterable[str] | AsyncIterable[str],
+        *args,
+        max_pending: int | None = None,
+        **kwargs,
+    ) -> AsyncIterator[BulkResult]:
+        """
+        Выполняет одну задачу для каждого ИНН и отдаёт результаты по мере готовности, а не по порядку.
+
+        Args:
+            job: Имя метода ``NPDTools`` или асинхронная функция ``func(npd, inn, *args, **kwargs)``
+            inns: ИНН, читаются по мере освобождения места
+            *args: Аргументы задачи, общие для всех ИНН
+            max_pending: Максимальное количество отправленных, но не завершённых задач.
+                По умолчанию ``processes * concurrency * 2``
+            **kwargs: Именованные аргументы задачи, общие для всех ИНН
+
+        Yields:
+            BulkResult: Результат по ИНН, в ``item`` ИНН
+        """
+        max_pending = max_pending or self.processes * self.concurrency * 2
+        pending: dict[asyncio.Future, tuple[int, str]] = {}
+
+        def collect(done: set[asyncio.Future]) -> list[BulkResult]:
+            results = []
+            for future in done:
+                index, inn = pending.pop(future)
+                if future.exception() is not None:
+                    results.append(
+                        BulkResult(index=index, item=inn, error=future.exception())
+                    )
+                else:
+                    results.append(
+                        BulkResult(index=index, item=inn, result=future.result())
+                    )
+            return results
+
+        try:
+            index = 0
+            async for inn in aiterate(inns):
+                if len(pending) >= max_pending:
+                    done, _ = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for result in collect(done):
+                        yield result
+                pending[self.submit(inn, job, *args, **kwargs)] = (index, inn)
+                index += 1
+
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for result in collect(done):
+                    yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def stop(self) -> None:
+        """
+        Дожидается уже отправленных задач и останавливает процессы.
+        """
+        if not self._workers:
+            return
+        for jobs in self._job_queues:
+            jobs.put(None)
+        # Наблюдатель сам дожидается завершения каждого процесса
+        await self._loop.run_in_executor(None, self._watcher.join)
+        self._results.put(None)
+        await self._loop.run_in_executor(None, self._reader.join)
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        self._job_shards.clear()
+        self._dead.clear()
+        self._workers = []
+        self._job_queues = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
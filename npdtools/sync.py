@@ -0,0 +1,239 @@
+import asyncio
+import functools
+import inspect
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterator,
+    TypeVar,
+)
+
+from npdtools.deadline import Deadline
+from npdtools.errors import DeadlineExceededError
+
+if TYPE_CHECKING:
+    from npdtools.modules.client import NPDTools
+
+T = TypeVar("T")
+
+# Срок блока ``SyncNPDTools.deadline`` в потоке вызывающего: момент по monotonic и исходный срок
+_deadline: ContextVar[tuple[float, float] | None] = ContextVar(
+    "npdtools_sync_deadline", default=None
+)
+
+
+class SyncNPDTools:
+    """
+    Синхронная обёртка над ``NPDTools`` для Django, Celery и других синхронных приложений.
+
+    Все вызовы выполняются в одном долгоживущем цикле событий в фоновом потоке,
+    поэтому ``http_session`` с пулом соединений и менеджер токенов общие для всех вызовов.
+    Вызывать методы можно из любого количества потоков одновременно: вызовы выполняются
+    в цикле параллельно, как при использовании асинхронного API.
+
+    Асинхронные методы ``NPDTools`` доступны под теми же именами и возвращают результат,
+    асинхронные генераторы, например, ``iter_incomes`` и ``iter_invoices``, возвращают
+    обычный итератор, а ``deadline`` — обычный контекстный менеджер.
+    Остальные атрибуты отдаются как есть.
+
+    ```python
+    npd = SyncNPDTools(default_inn="123456789012")
+    npd.auth(password="...")
+    with npd.deadline(5):
+        income = npd.declare_income(Service(name="Услуга", amount=100))
+    for income in npd.iter_incomes(from_date=30):
+        ...
+    npd.close()
+    ```
+
+    Warning: Атрибуты клиента
+        Менеджер токенов и другие объекты клиента используются фоновым циклом.
+        Изменять их из других потоков небезопасно, для этого есть ``call``.
+
+    Attributes:
+        npd: Асинхронный клиент
+        timeout: Таймаут ожидания результата по умолчанию в секундах
+    """
+
+    def __init__(
+        self, npd: "NPDTools | None" = None, timeout: float | None = None, **kwargs
+    ):
+        """
+        Args:
+            npd: Готовый клиент. По умолчанию создаётся ``NPDTools(**kwargs)``
+            timeout: Таймаут ожидания результата по умолчанию в секундах
+            **kwargs: Аргументы ``NPDTools``
+        """
+        if npd is None:
+            from npdtools.modules.client import NPDTools
+
+            npd = NPDTools(**kwargs)
+        self.npd = npd
+        self.timeout = timeout
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="npdtools-loop", daemon=True
+        )
+        self._thread.start()
+        self._methods: dict[str, Callable] = {}
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def run(self, awaitable: Awaitable[T], timeout: float | None = None) -> T:
+        """
+        Выполняет корутину в фоновом цикле и ждёт результат.
+
+        Args:
+            awaitable: Корутина
+            timeout: Таймаут ожидания в секундах. По умолчанию ``self.timeout``
+
+        Raises:
+            TimeoutError: Результат не получен за ``timeout``, корутина отменена
+            DeadlineExceededError: Вызов внутри ``deadline`` не уложился в срок блока
+        """
+        if self._loop.is_closed():
+            raise RuntimeError("Клиент закрыт")
+        deadline = _deadline.get()
+        if deadline is not None:
+            awaitable = self._bounded(awaitable, *deadline)
+        future = asyncio.run_coroutine_threadsafe(awaitable, self._loop)
+        try:
+            return future.result(timeout if timeout is not None else self.timeout)
+        except FutureTimeoutError:
+            if future.done():
+                # Ошибку, например, DeadlineExceededError, подняла сама корутина
+                raise
+            future.cancel()
+            raise TimeoutError("Вызов не уложился в таймаут") from None
+
+    @staticmethod
+    async def _bounded(awaitable: Awaitable[T], when: float, timeout: float) -> T:
+        try:
+            async with Deadline(when - monotonic()):
+                return await awaitable
+        except DeadlineExceededError as e:
+            raise DeadlineExceededError(timeout) from e.__cause__
+
+    @contextmanager
+    def deadline(self, timeout: float) -> Iterator[None]:
+        """
+        Задаёт общий срок для всех вызовов внутри блока в этом потоке, как ``NPDTools.deadline``.
+
+        ```python
+        with npd.deadline(1.5):
+            income = npd.declare_income(service)
+        ```
+
+        Args:
+            timeout: Срок в секундах
+
+        Raises:
+            DeadlineExceededError: Вызовы не уложились в срок
+        """
+        when = monotonic() + timeout
+        outer = _deadline.get()
+        if outer is not None and outer[0] < when:
+            when, timeout = outer
+        token = _deadline.set((when, timeout))
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
+    def iterate(
+        self, iterator: AsyncIterator[T], timeout: float | None = None
+    ) -> Iterator[T]:
+        """
+        Перебирает асинхронный итератор в фоновом цикле. Каждый элемент запрашивается
+        отдельным вызовом, поэтому ``timeout`` действует на получение одного элемента.
+
+        Args:
+            iterator: Асинхронный итератор, например, ``npd.npd.iter_incomes()``
+            timeout: Таймаут получения элемента в секундах. По умолчанию ``self.timeout``
+        """
+        try:
+            while True:
+                try:
+                    yield self.call(iterator.__anext__, timeout=timeout)
+                except StopAsyncIteration:
+                    return
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None and not self._loop.is_closed():
+                self.call(aclose)
+
+    def call(
+        self, func: Callable[..., Any], *args, timeout: float | None = None, **kwargs
+    ) -> Any:
+        """
+        Вызывает функцию в фоновом цикле. Если она вернула корутину, ждёт её результат.
+
+        ```python
+        npd.call(lambda: npd.npd.token_manager.get_tokens("123456789012"))
+        ```
+        """
+
+        async def wrapper():
+            result = func(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+        return self.run(wrapper(), timeout)
+
+    def __getattr__(self, name: str) -> Any:
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+
+        attr = getattr(self.npd, name)
+        if inspect.isasyncgenfunction(attr):
+
+            @functools.wraps(attr)
+            def method(*args, timeout: float | None = None, **kwargs):
+                return self.iterate(attr(*args, **kwargs), timeout)
+
+        elif inspect.iscoroutinefunction(attr):
+
+            @functools.wraps(attr)
+            def method(*args, timeout: float | None = None, **kwargs):
+                return self.run(attr(*args, **kwargs), timeout)
+
+        else:
+            return attr
+
+        self._methods[name] = method
+        return method
+
+    def close(self) -> None:
+        """
+        Закрывает ``http_session``, останавливает цикл и фоновый поток.
+        """
+        if self._loop.is_closed():
+            return
+        if self.npd._http_session is not None:
+            self.run(self.npd._http_session.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,322 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import TYPE_CHECKING, AsyncIterable, Iterable
+
+from npdtools._sqlite import SQLiteStore
+from npdtools.compact import CompactIncome
+from npdtools.helpers import aiterate
+from npdtools.timeutils import local_timezone
+from npdtools.types.entity import ClientType
+from npdtools.types.income import IncomeInfo
+
+if TYPE_CHECKING:
+    from npdtools.modules.income import NPDToolsIncome
+
+TAX_RATES: dict[str, Decimal] = {
+    ClientType.individual: Decimal("0.04"),
+    ClientType.legal: Decimal("0.06"),
+    ClientType.foreign: Decimal("0.06"),
+}
+CENT = Decimal("0.01")
+
+
+@dataclass(slots=True)
+class PeriodTotals:
+    """
+    Итоги налогового периода.
+
+    Attributes:
+        income: Сумма чеков периода
+        cancelled: Сумма аннулирований, отнесённых к периоду
+        tax: Налог по ставкам 4% и 6% без учёта налогового вычета
+        receipts: Количество чеков периода
+        cancellations: Количество аннулирований, отнесённых к периоду
+    """
+
+    income: Decimal = Decimal(0)
+    cancelled: Decimal = Decimal(0)
+    tax: Decimal = Decimal(0)
+    receipts: int = 0
+    cancellations: int = 0
+
+    @property
+    def net_income(self) -> Decimal:
+        """
+        Returns:
+            Decimal: Доход периода за вычетом аннулирований
+        """
+        return self.income - self.cancelled
+
+
+def _tax(amount: Decimal, client_type: str) -> Decimal:
+    rate = TAX_RATES.get(client_type, TAX_RATES[ClientType.legal])
+    return (amount * rate).quantize(CENT)
+
+
+ReceiptState = tuple[int, Decimal, Decimal, int | None]
+
+
+def _receipt_state(income: IncomeInfo | CompactIncome) -> ReceiptState:
+    if isinstance(income, CompactIncome):
+        cancelled = income.is_cancelled
+        cancel_tax_period = income.cancellation_tax_period
+    else:
+        cancelled = income.cancellation_info is not None
+        cancel_tax_period = cancelled and income.cancellation_info.tax_period
+    if income.tax_period is None:
+        raise ValueError(f"У чека {income.receipt_id} нет налогового периода")
+    return (
+        income.tax_period,
+        income.total_amount,
+        _tax(income.total_amount, str(income.client_info.type)),
+        (cancel_tax_period or income.tax_period) if cancelled else None,
+    )
+
+
+def period_range(tax_period: int) -> tuple[datetime, datetime]:
+    """
+    Args:
+        tax_period: Налоговый период в формате ``YYYYMM``
+
+    Returns:
+        tuple[datetime, datetime]: Начало и конец месяца периода
+    """
+    year, month = divmod(tax_period, 100)
+    start = datetime(year, month, 1, tzinfo=local_timezone())
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(microseconds=1)
+    return start, end
+
+
+class TaxPeriodStore(SQLiteStore):
+    """
+    Материализованные итоги доходов и налога по налоговым периодам каждого ИНН.
+
+    Чек учитывается в периоде ``IncomeInfo.tax_period``, аннулирование — в периоде
+    ``CancellationInfo.tax_period``. Итоги обновляются инкрементально при каждом ``apply``:
+    повторно переданный чек не учитывается дважды, а появившееся аннулирование
+    вычитается из своего периода. Запрос итогов периода выполняется за O(1).
+
+    Состояние чеков хранится в SQLite, итоги при открытии пересчитываются в памяти.
+
+    ```python
+    store = TaxPeriodStore()
+    await store.sync(npd, inn, from_date=31)
+    store.totals(inn, 202401).net_income
+    ```
+
+    Attributes:
+        path: Путь к файлу базы SQLite
+    """
+
+    def __init__(self, path: str = "npdtools_tax_periods.sqlite3"):
+        self.path = path
+
+        super().__init__(
+            path,
+            "CREATE TABLE IF NOT EXISTS tax_receipts ("
+            " inn TEXT NOT NULL,"
+            " receipt_id TEXT NOT NULL,"
+            " tax_period INTEGER NOT NULL,"
+            " amount TEXT NOT NULL,"
+            " tax TEXT NOT NULL,"
+            " cancel_period INTEGER,"
+            " PRIMARY KEY (inn, receipt_id));"
+            "CREATE INDEX IF NOT EXISTS tax_receipts_period"
+            " ON tax_receipts (inn, tax_period);",
+        )
+
+        self._totals: dict[tuple[str, int], PeriodTotals] = {}
+        self._states: dict[tuple[str, str], ReceiptState] = {}
+        self._period_receipts: dict[tuple[str, int], set[str]] = {}
+        for inn, receipt_id, period, amount, tax, cancel_period in self._db.execute(
+            "SELECT inn, receipt_id, tax_period, amount, tax, cancel_period"
+            " FROM tax_receipts"
+        ):
+            state = (period, Decimal(amount), Decimal(tax), cancel_period)
+            self._states[(inn, receipt_id)] = state
+            self._add(inn, receipt_id, state, 1)
+
+    def _period(self, inn: str, tax_period: int) -> PeriodTotals:
+        totals = self._totals.get((inn, tax_period))
+        if totals is None:
+            totals = self._totals[(inn, tax_period)] = PeriodTotals()
+        return totals
+
+    def _add(self, inn: str, receipt_id: str, state: ReceiptState, sign: int) -> None:
+        period, amount, tax, cancel_period = state
+        receipts = self._period_receipts.setdefault((inn, period), set())
+        if sign > 0:
+            receipts.add(receipt_id)
+        else:
+            receipts.discard(receipt_id)
+        totals = self._period(inn, period)
+        totals.income += sign * amount
+        totals.tax += sign * tax
+        totals.receipts += sign
+        if cancel_period is not None:
+            totals = self._period(inn, cancel_period)
+            totals.cancelled += sign * amount
+            totals.tax -= sign * tax
+            totals.cancellations += sign
+
+    def _apply_all(
+        self,
+        inn: str,
+        incomes: Iterable[IncomeInfo | CompactIncome],
+        drop_period: int | None = None,
+    ) -> set[int]:
+        """
+        Записывает чеки одной транзакцией, а итоги в памяти меняет только после её фиксации.
+        С ``drop_period`` в той же транзакции сначала удаляются все чеки этого периода.
+        """
+        changed = set()
+        with self._lock:
+            with self._transaction() as db:
+                dropped = set()
+                if drop_period is not None:
+                    dropped = {
+                        receipt_id
+                        for receipt_id, in db.execute(
+                            "DELETE FROM tax_receipts WHERE inn = ? AND tax_period = ?"
+                            " RETURNING receipt_id",
+                            (inn, drop_period),
+                        ).fetchall()
+                    }
+                pending: dict[str, ReceiptState] = {}
+                for income in incomes:
+                    receipt_id = income.receipt_id
+                    state = _receipt_state(income)
+                    if receipt_id in pending:
+                        old = pending[receipt_id]
+                    elif receipt_id in dropped:
+                        old = None
+                    else:
+                        old = self._states.get((inn, receipt_id))
+                    if old == state:
+                        continue
+                    period, amount, tax, cancel_period = state
+                    db.execute(
+                        "INSERT OR REPLACE INTO tax_receipts VALUES (?, ?, ?, ?, ?, ?)",
+                        (inn, receipt_id, period, str(amount), str(tax), cancel_period),
+                    )
+                    pending[receipt_id] = state
+
+            for receipt_id in dropped:
+                self._add(inn, receipt_id, self._states.pop((inn, receipt_id)), -1)
+            for receipt_id, state in pending.items():
+                old = self._states.get((inn, receipt_id))
+                if old is not None:
+                    self._add(inn, receipt_id, old, -1)
+                self._add(inn, receipt_id, state, 1)
+                self._states[(inn, receipt_id)] = state
+                changed.add(state[0])
+                if state[3] is not None:
+                    changed.add(state[3])
+        return changed
+
+    def apply(self, inn: str, income: IncomeInfo | CompactIncome) -> bool:
+        """
+        Учитывает новый чек или изменение известного, например, его аннулирование.
+
+        Args:
+            inn: ИНН самозанятого
+            income: Чек
+
+        Returns:
+            bool: Изменились ли итоги
+        """
+        return bool(self._apply_all(inn, [income]))
+
+    async def apply_many(
+        self,
+        inn: str,
+        incomes: Iterable[IncomeInfo | CompactIncome]
+        | AsyncIterable[IncomeInfo | CompactIncome],
+    ) -> set[int]:
+        """
+        Учитывает чеки одной транзакцией: чеки сначала читаются из источника целиком,
+        поэтому ошибка или отмена во время чтения ничего не меняет.
+
+        Returns:
+            set[int]: Периоды, итоги которых изменились
+        """
+        return self._apply_all(inn, [income async for income in aiterate(incomes)])
+
+    async def sync(
+        self,
+        npd: "NPDToolsIncome",
+        inn: str,
+        from_date: datetime | str | int = 7,
+        to_date: datetime | str | int | None = None,
+    ) -> set[int]:
+        """
+        Запрашивает чеки за период через ``iter_incomes`` и учитывает их.
+
+        Returns:
+            set[int]: Периоды, итоги которых изменились
+        """
+        return await self.apply_many(
+            inn, npd.iter_incomes(from_date=from_date, to_date=to_date, inn=inn)
+        )
+
+    def totals(self, inn: str, tax_period: int) -> PeriodTotals:
+        """
+        Args:
+            inn: ИНН самозанятого
+            tax_period: Налоговый период в формате ``YYYYMM``
+
+        Returns:
+            PeriodTotals: Итоги периода. Для неизвестного периода нулевые
+        """
+        totals = self._totals.get((inn, tax_period))
+        return totals if totals is not None else PeriodTotals()
+
+    def year_income(self, inn: str, year: int) -> Decimal:
+        """
+        Returns:
+            Decimal: Доход за календарный год за вычетом аннулирований
+        """
+        return sum(
+            (self.totals(inn, year * 100 + m).net_income for m in range(1, 13)),
+            Decimal(0),
+        )
+
+    async def rebuild(
+        self, npd: "NPDToolsIncome", inn: str, tax_periods: Iterable[int]
+    ) -> set[int]:
+        """
+        Сверяет периоды с ЛК НПД и пересчитывает только те, в которых нашлось расхождение:
+        чеки, которых нет в ЛК НПД, или изменённые чеки.
+
+        Args:
+            npd: Клиент
+            inn: ИНН самозанятого
+            tax_periods: Проверяемые периоды в формате ``YYYYMM``
+
+        Returns:
+            set[int]: Пересчитанные периоды
+        """
+        rebuilt = set()
+        for tax_period in tax_periods:
+            start, end = period_range(tax_period)
+            fresh = {
+                income.receipt_id: income
+                async for income in npd.iter_incomes(
+                    from_date=start, to_date=end, inn=inn
+                )
+                if income.tax_period == tax_period
+            }
+            known = {
+                receipt_id: self._states[(inn, receipt_id)]
+                for receipt_id in self._period_receipts.get((inn, tax_period), ())
+            }
+            if known.keys() == fresh.keys() and all(
+                known[receipt_id] == _receipt_state(income)
+                for receipt_id, income in fresh.items()
+            ):
+                continue
+            # Удаление и повторный учёт в одной транзакции: период не останется пустым
+            self._apply_all(inn, fresh.values(), drop_period=tax_period)
+            rebuilt.add(tax_period)
+        return rebuilt
@@ -0,0 +1,174 @@
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Callable
+
+_local_timezone: tzinfo | None = None
+_clock: Callable[[], datetime] | None = None
+
+
+def local_timezone() -> tzinfo:
+    """
+    Часовой пояс системы. Определяется один раз и кешируется, потому что ``astimezone()``
+    при каждом вызове заново запрашивает его у системы.
+
+    Warning: Переход на летнее время
+        Кешируется фиксированное смещение. В России переходов нет, но если система
+        живёт в поясе с летним временем, после перехода нужно вызвать ``reset_local_timezone()``.
+
+    Returns:
+        tzinfo: Часовой пояс с фиксированным смещением
+    """
+    global _local_timezone
+    if _local_timezone is None:
+        offset = datetime.now().astimezone().utcoffset()
+        _local_timezone = timezone(offset)
+    return _local_timezone
+
+
+def reset_local_timezone() -> None:
+    """
+    Сбрасывает кеш часового пояса, например, после смены ``TZ`` или перехода на летнее время.
+    """
+    global _local_timezone
+    _local_timezone = None
+
+
+def set_clock(clock: Callable[[], datetime] | None) -> None:
+    """
+    Подменяет источник текущего времени для всей библиотеки. Полезно в тестах.
+
+    ```python
+    set_clock(lambda: datetime(2023, 1, 1, 12, tzinfo=timezone.utc))
+    ...
+    set_clock(None)  # вернуть системные часы
+    ```
+
+    Args:
+        clock: Функция, возвращающая текущее время, или ``None`` для системных часов
+    """
+    global _clock
+    _clock = clock
+
+
+def now() -> datetime:
+    """
+    Returns:
+        datetime: Текущее время в часовом поясе системы
+    """
+    if _clock is not None:
+        return to_local(_clock())
+    return datetime.now(local_timezone())
+
+
+def to_local(value: datetime) -> datetime:
+    """
+    Переводит время в часовой пояс системы. Время без часового пояса считается локальным.
+
+    Args:
+        value: Время
+
+    Returns:
+        datetime: Время с часовым поясом системы
+    """
+    tz = local_timezone()
+    if value.tzinfo is None:
+        return value.replace(tzinfo=tz)
+    if value.tzinfo is tz:
+        return value
+    return value.astimezone(tz)
+
+
+def format_time(value: datetime | str, keep_microseconds: bool = False) -> str:
+    """
+    Форматирует время так, как его ожидает ЛК НПД: ISO 8601 с часовым поясом, по умолчанию без микросекунд.
+    Строки возвращаются без изменений.
+
+    Args:
+        value: Время или уже отформатированная строка
+        keep_microseconds: Оставить микросекунды
+
+    Returns:
+        str: Время в формате ``YYYY-MM-DDTHH:MM:SS+HH:MM``
+    """
+    if isinstance(value, str):
+        return value
+    value = to_local(value)
+    if not keep_microseconds:
+        value = value.replace(microsecond=0)
+    return value.isoformat()
+
+
+def parse_time(value: str | datetime) -> datetime:
+    """
+    Разбирает время из ответов ЛК НПД, например, ``2023-01-01T12:00:00.123Z`` или ``2023-01-01T15:00:00+03:00``.
+
+    Args:
+        value: Строка в формате ISO 8601
+
+    Returns:
+        datetime: Время с часовым поясом. Если в строке его нет, считается UTC
+    """
+    if isinstance(value, datetime):
+        result = value
+    else:
+        result = datetime.fromisoformat(value)
+    if result.tzinfo is None:
+        result = result.replace(tzinfo=timezone.utc)
+    return result
+
+
+def day_start(days_ago: int) -> datetime:
+    """
+    Args:
+        days_ago: Сколько дней назад
+
+    Returns:
+        datetime: Начало дня ``days_ago`` дней назад
+    """
+    return (now() - timedelta(days=days_ago)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def day_end(days_ago: int) -> datetime:
+    """
+    Args:
+        days_ago: Сколько дней назад
+
+    Returns:
+        datetime: Конец дня ``days_ago`` дней назад
+    """
+    return (now() - timedelta(days=days_ago)).replace(
+        hour=23, minute=59, second=59, microsecond=999999
+    )
+
+
+def period_bounds(
+    from_date: datetime | str | int | None, to_date: datetime | str | int | None
+) -> tuple[str, str]:
+    """
+    Переводит границы периода поиска в строки для ЛК НПД.
+
+    ``int`` означает "столько дней назад": для начала периода время ставится на ``0:00:00``,
+    для конца на ``23:59:59``. ``None`` означает текущее время.
+
+    Args:
+        from_date: Начало периода
+        to_date: Конец периода
+
+    Returns:
+        tuple[str, str]: Начало и конец периода
+    """
+    if from_date is None:
+        from_date = now()
+    elif isinstance(from_date, int):
+        from_date = day_start(from_date)
+
+    if to_date is None:
+        to_date = now()
+    elif isinstance(to_date, int):
+        to_date = day_end(to_date)
+
+    return (
+        format_time(from_date, keep_microseconds=True),
+        format_time(to_date, keep_microseconds=True),
+    )
@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta, timezone
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
 from typing import Callable
 
-import dateutil.parser
+from npdtools.codec import JSONCodec
+from npdtools.timeutils import now, parse_time
 
 
 class TokenField(str):
@@ -17,23 +19,27 @@ class TokenField(str):
         elif expires_in is None:
             self.expires = None
         else:
-            self.expires = datetime.now(timezone.utc) + timedelta(
-                seconds=expires_in - 10
-            )
+            self.expires = now() + timedelta(seconds=expires_in - 10)
 
     @property
     def is_alive(self) -> bool:
         if self.expires is None:
             return True
-        return datetime.now(timezone.utc) < self.expires
+        return now() < self.expires
 
 
 class TokenDescriptor:
     def __init__(self):
-        self.value = None
+        self.attr_name = None
+
+    def __set_name__(self, owner, name):
+        # Значение хранится в слоте экземпляра, иначе все Tokens делили бы одни токены
+        self.attr_name = f"_{name}"
 
     def __get__(self, instance, owner) -> TokenField | None:
-        return self.value
+        if instance is None:
+            return self
+        return getattr(instance, self.attr_name, None)
 
     def __set__(
         self, instance, value: tuple[str, int | datetime | None, datetime | None] | str
@@ -46,13 +52,19 @@ class TokenDescriptor:
             value = (value[0], None, value[1])
         elif len(value) == 2:
             value = value + (None,)
-        self.value = TokenField(value[0], expires_in=value[1], expires=value[2])
+        setattr(
+            instance,
+            self.attr_name,
+            TokenField(value[0], expires_in=value[1], expires=value[2])
+            if value[0] is not None
+            else None,
+        )
 
         instance.on_update(instance.inn, instance)
 
 
 class Tokens:
-    __slots__ = ("on_update", "inn")
+    __slots__ = ("on_update", "inn", "_device", "_access", "_refresh")
     token_fields = ("device", "access", "refresh")
     device: TokenField | None = TokenDescriptor()
     access: TokenField | None = TokenDescriptor()
@@ -88,11 +100,88 @@ class Tokens:
             value = field_data.get("value")
             expires = field_data.get("expires")
             if isinstance(expires, str):
-                expires = dateutil.parser.parse(expires)
+                expires = parse_time(expires)
             setattr(self, field_name, (value, None, expires))
 
+    def dumps(self, codec: JSONCodec) -> bytes:
+        """
+        Returns:
+            bytes: Токены в JSON для сохранения во внешнее хранилище
+        """
+        return codec.dumps(self.dump()[1])
+
+    def loads(self, inn: str, data: bytes | str, codec: JSONCodec) -> None:
+        """
+        Загружает токены из JSON, полученного из ``dumps``.
+        """
+        self.load(inn, codec.loads(data))
+
+
+class TokenExpiryIndex:
+    """
+    Упорядоченный по времени истечения access-токена список ИНН.
+
+    Позволяет найти токены, которые скоро истекут, не перебирая все ``Tokens``
+    и не вызывая ``TokenField.is_alive`` для каждого. В индекс попадают только ИНН,
+    у которых есть refresh-токен, то есть те, чей access-токен можно обновить.
+    """
+
+    def __init__(self):
+        self._entries: list[tuple[datetime, str]] = []
+        self._expires: dict[str, datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def update(self, tokens: Tokens) -> None:
+        """
+        Args:
+            tokens: Токены, у которых изменились значения
+        """
+        self.discard(tokens.inn)
+        if tokens.refresh is None or tokens.access is None:
+            return
+        expires = tokens.access.expires
+        if expires is None:
+            return
+        insort(self._entries, (expires, tokens.inn))
+        self._expires[tokens.inn] = expires
+
+    def discard(self, inn: str) -> None:
+        expires = self._expires.pop(inn, None)
+        if expires is None:
+            return
+        index = bisect_left(self._entries, (expires, inn))
+        if index < len(self._entries) and self._entries[index] == (expires, inn):
+            del self._entries[index]
+
+    def expiring_before(self, moment: datetime) -> list[tuple[datetime, str]]:
+        """
+        Args:
+            moment: Граница времени
+
+        Returns:
+            Пары ``(время истечения, ИНН)``, истекающие до ``moment``, начиная с самых ранних
+        """
+        return self._entries[: bisect_right(self._entries, (moment, "\uffff"))]
+
+    def next_expiry(self) -> datetime | None:
+        """
+        Returns:
+            datetime | None: Ближайшее время истечения access-токена среди всех ИНН
+        """
+        return self._entries[0][0] if self._entries else None
+
 
 class AbstractTokenManager(ABC):
+    """
+    Attributes:
+        codec: Кодек JSON для сохранения токенов через ``Tokens.dumps`` и ``Tokens.loads``.
+            Клиент подставляет сюда свой ``json_codec``
+    """
+
+    codec: JSONCodec = JSONCodec()
+
     def __init__(self, **kwargs):
         ...
 
@@ -108,14 +197,27 @@ class AbstractTokenManager(ABC):
     def load_tokens(self, **kwargs):
         ...
 
+    def save_tokens(self, tokens: list[Tokens]) -> None:
+        """
+        Сохраняет пачку токенов разом, например, одной транзакцией. Вызывается массовыми методами
+        вроде ``NPDTools.auth_bulk`` в дополнение к ``on_update``.
+
+        По умолчанию ничего не делает: менеджерам, сохраняющим токены в ``on_update``, переопределять не нужно.
+
+        Args:
+            tokens: Обновлённые токены
+        """
+        ...
+
 
 class InMemoryTokenManager(AbstractTokenManager):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.tokens_mapper: dict[str, Tokens] = {}
+        self.expiry_index = TokenExpiryIndex()
 
     def on_update(self, inn: str, tokens_data: Tokens) -> None:
-        pass
+        self.expiry_index.update(tokens_data)
 
     def get_tokens(self, inn: str, **kwargs) -> Tokens:
         return self.tokens_mapper.setdefault(inn, Tokens(inn, self.on_update))
@@ -0,0 +1,173 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+from zlib import crc32
+
+from npdtools.timeutils import now
+from npdtools.token_manager import TokenExpiryIndex, Tokens
+from npdtools.types.bulk import BulkResult
+
+if TYPE_CHECKING:
+    from npdtools.modules.base import NPDToolsBase
+
+
+class TokenRefresher:
+    """
+    Фоновое обновление access-токенов незадолго до их истечения.
+
+    Берёт ближайшие истечения из ``TokenExpiryIndex`` менеджера токенов и обновляет токены
+    небольшими параллельными пачками. Чтобы токены, полученные одновременно, не обновлялись
+    одним залпом, каждому ИНН назначается постоянный сдвиг в пределах ``spread``.
+
+    ```python
+    refresher = TokenRefresher(npd)
+    await refresher.start()
+    ...
+    await refresher.stop()
+    ```
+
+    Attributes:
+        npd: Клиент, через который обновляются токены
+        lead_time: За сколько до истечения токена его обновлять
+        spread: Максимальный дополнительный сдвиг обновления, распределяющий нагрузку
+        batch_size: Сколько токенов обновлять одновременно
+        batch_interval: Пауза между пачками в секундах
+        max_sleep: Максимальная пауза между проверками индекса в секундах
+    """
+
+    def __init__(
+        self,
+        npd: "NPDToolsBase",
+        lead_time: timedelta = timedelta(minutes=2),
+        spread: timedelta = timedelta(minutes=3),
+        batch_size: int = 5,
+        batch_interval: float = 1.0,
+        max_sleep: float = 60.0,
+    ):
+        self.npd = npd
+        self.lead_time = lead_time
+        self.spread = spread
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.max_sleep = max_sleep
+
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        self._retry_after: dict[str, datetime] = {}
+
+    @property
+    def index(self) -> TokenExpiryIndex:
+        index = getattr(self.npd.token_manager, "expiry_index", None)
+        if index is None:
+            raise TypeError("Менеджер токенов не ведёт индекс истечения токенов")
+        return index
+
+    def _offset(self, inn: str) -> timedelta:
+        seconds = self.spread.total_seconds()
+        if seconds <= 0:
+            return timedelta()
+        return timedelta(seconds=crc32(inn.encode()) % int(seconds * 1000) / 1000)
+
+    def refresh_at(self, inn: str, expires: datetime) -> datetime:
+        """
+        Returns:
+            datetime: Когда следует обновить токен этого ИНН
+        """
+        return expires - self.lead_time - self._offset(inn)
+
+    def due(self) -> list[str]:
+        """
+        Returns:
+            list[str]: ИНН, токены которых пора обновить, начиная с самых срочных
+        """
+        moment = now()
+        candidates = self.index.expiring_before(moment + self.lead_time + self.spread)
+        return [
+            inn
+            for expires, inn in candidates
+            if self.refresh_at(inn, expires) <= moment
+            and self._retry_after.get(inn, moment) <= moment
+        ]
+
+    async def _refresh(self, inn: str) -> Tokens:
+        # Через общее обновление клиента: запрос, получивший 401, не обновит токен параллельно
+        await self.npd._refresh_tokens(self.npd.token_manager.get_tokens(inn))
+        return self.npd.token_manager.get_tokens(inn)
+
+    async def refresh_due(self) -> list[BulkResult]:
+        """
+        Обновляет все токены, которые пора обновить, пачками по ``batch_size``.
+
+        Returns:
+            list[BulkResult]: Результаты по каждому ИНН, в ``item`` ИНН
+        """
+        inns = self.due()
+        results = []
+        for start in range(0, len(inns), self.batch_size):
+            if start:
+                await asyncio.sleep(self.batch_interval)
+            batch = await self.npd._run_bulk(
+                self._refresh, inns[start : start + self.batch_size], self.batch_size
+            )
+            for result in batch:
+                result.index += start
+                if result.ok:
+                    self._retry_after.pop(result.item, None)
+                else:
+                    # Неудачное обновление повторяется не чаще раза в max_sleep
+                    self._retry_after[result.item] = now() + timedelta(
+                        seconds=self.max_sleep
+                    )
+            results += batch
+        return results
+
+    def _sleep_time(self) -> float:
+        moment = now()
+        horizon = moment + timedelta(seconds=self.max_sleep)
+        # Токены, которые может понадобиться обновить раньше, чем через max_sleep
+        candidates = self.index.expiring_before(horizon + self.lead_time + self.spread)
+        wake = horizon
+        for expires, inn in candidates:
+            at = self.refresh_at(inn, expires)
+            retry_after = self._retry_after.get(inn)
+            if retry_after is not None:
+                at = max(at, retry_after)
+            wake = min(wake, at)
+        return min(max((wake - moment).total_seconds(), 0.0), self.max_sleep)
+
+    async def run(self) -> None:
+        """
+        Бесконечный цикл обновления токенов.
+        """
+        while True:
+            await self.refresh_due()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), max(self._sleep_time(), self.batch_interval)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def wakeup(self) -> None:
+        """
+        Заставляет цикл заново проверить индекс, например, после добавления новых ИНН.
+        """
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
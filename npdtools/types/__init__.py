@@ -1,19 +1,72 @@
-from .entity import (
-    AcquiringInfo,
-    BankAccount,
-    BankPhone,
-    ClientInfo,
-    ClientType,
-    EmployeeInfo,
-    PartnerInfo,
-)
-from .income import (
-    CanceledIncome,
-    IncomeInfo,
-    IncomesList,
-    NewIncome,
-    PaymentTypes,
-    SortTypes,
-)
-from .invoice import Invoice, InvoicesList, PaymentOption, PaymentOptions, PaymentTypes
-from .service import Service
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .auth import Credentials
+    from .bulk import BulkResult
+    from .entity import (
+        AcquiringInfo,
+        BankAccount,
+        BankPhone,
+        ClientInfo,
+        ClientType,
+        EmployeeInfo,
+        PartnerInfo,
+    )
+    from .income import (
+        CanceledIncome,
+        IncomeInfo,
+        IncomesList,
+        NewIncome,
+        PaymentTypes,
+        SortTypes,
+    )
+    from .invoice import (
+        Invoice,
+        InvoicesList,
+        InvoiceStatusChange,
+        NewInvoice,
+        PaymentOption,
+        PaymentOptions,
+    )
+    from .service import Service
+
+_LAZY: dict[str, str] = {
+    "Credentials": ".auth",
+    "BulkResult": ".bulk",
+    "AcquiringInfo": ".entity",
+    "BankAccount": ".entity",
+    "BankPhone": ".entity",
+    "ClientInfo": ".entity",
+    "ClientType": ".entity",
+    "EmployeeInfo": ".entity",
+    "PartnerInfo": ".entity",
+    "CanceledIncome": ".income",
+    "IncomeInfo": ".income",
+    "IncomesList": ".income",
+    "NewIncome": ".income",
+    "PaymentTypes": ".income",
+    "SortTypes": ".income",
+    "Invoice": ".invoice",
+    "InvoicesList": ".invoice",
+    "InvoiceStatusChange": ".invoice",
+    "NewInvoice": ".invoice",
+    "PaymentOption": ".invoice",
+    "PaymentOptions": ".invoice",
+    "Service": ".service",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    # Модели загружаются по первому обращению, чтобы не тянуть все модули сразу
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
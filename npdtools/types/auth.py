@@ -0,0 +1,26 @@
+from pydantic import model_validator
+
+from npdtools.types.base import NPDModel
+
+
+class Credentials(NPDModel):
+    """
+    Данные для входа одного самозанятого в ``NPDTools.auth_bulk``
+
+    Attributes:
+        inn: ИНН самозанятого
+        password: Пароль от ЛК НПД
+        refresh_token: Refresh-токен, если входить по нему, а не по паролю
+        device_id: Идентификатор устройства. Если не указан, берётся сохранённый или создаётся новый
+    """
+
+    inn: str
+    password: str | None = None
+    refresh_token: str | None = None
+    device_id: str | None = None
+
+    @model_validator(mode="after")
+    def check_secret(self) -> "Credentials":
+        if self.password is None and self.refresh_token is None:
+            raise ValueError("Нужен пароль или refresh-токен")
+        return self
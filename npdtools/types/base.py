@@ -0,0 +1,9 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class NPDModel(BaseModel):
+    """
+    Базовая модель библиотеки. Схема валидации строится при первом использовании модели, а не при импорте.
+    """
+
+    model_config = ConfigDict(defer_build=True)
@@ -0,0 +1,32 @@
+from typing import Any
+
+from pydantic import ConfigDict
+
+from npdtools.types.base import NPDModel
+
+
+class BulkResult(NPDModel):
+    """
+    Результат обработки одного элемента в массовой операции
+
+    Attributes:
+        index: Порядковый номер элемента во входных данных
+        item: Сам входной элемент
+        result: Результат, если операция прошла успешно
+        error: Исключение, если операция завершилась ошибкой
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: int
+    item: Any = None
+    result: Any = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        """
+        Returns:
+            bool: Успешно ли обработан элемент
+        """
+        return self.error is None
@@ -1,7 +1,9 @@
 from enum import StrEnum
 from typing import Any
 
-from pydantic import BaseModel, field_validator
+from pydantic import field_validator
+
+from npdtools.types.base import NPDModel
 
 
 class ClientType(StrEnum):
@@ -19,7 +21,7 @@ class ClientType(StrEnum):
     foreign: str = "FROM_FOREIGN_AGENCY"
 
 
-class PartnerInfo(BaseModel):
+class PartnerInfo(NPDModel):
     """
     Сведения о партнёре
 
@@ -36,7 +38,7 @@ class PartnerInfo(BaseModel):
     name: str | None = None
 
 
-class ClientInfo(BaseModel):
+class ClientInfo(NPDModel):
     """
     Сведения о клиенте
 
@@ -69,7 +71,7 @@ class ClientInfo(BaseModel):
         }
 
 
-class EmployeeInfo(BaseModel):
+class EmployeeInfo(NPDModel):
     """
     Сведения о самозанятом
 
@@ -104,20 +106,20 @@ class EmployeeInfo(BaseModel):
         return value
 
 
-class BankAccount(BaseModel):
+class BankAccount(NPDModel):
     name: str
     bik: str
     account: str
     corr: str
 
 
-class BankPhone(BaseModel):
+class BankPhone(NPDModel):
     name: str
     id: int | None = None
     phone: str
 
 
-class AcquiringInfo(BaseModel):
+class AcquiringInfo(NPDModel):
     merchant_id: Any = None
     acquirer_id: Any = None
     acquirer_name: Any = None
@@ -3,10 +3,17 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Any, Iterable
 
-from pydantic import BaseModel, Field, field_validator, model_validator
-
-from npdtools.helpers import amount_to_decimal
+from pydantic import (
+    Field,
+    SkipValidation,
+    ValidationInfo,
+    field_validator,
+    model_validator,
+)
+
+from npdtools.helpers import amount_to_decimal, with_raw
 from npdtools.settings import LKNPD_API_V1
+from npdtools.types.base import NPDModel
 from npdtools.types.entity import ClientInfo, ClientType, EmployeeInfo, PartnerInfo
 from npdtools.types.service import Service
 
@@ -35,7 +42,7 @@ class SortTypes(enum.StrEnum):
     amount: str = "total_amount"
 
 
-class NewIncome(BaseModel):
+class NewIncome(NPDModel):
     """
     Attributes:
         receipt_id: Номер чека
@@ -44,7 +51,7 @@ class NewIncome(BaseModel):
     receipt_id: str = Field(..., alias="approvedReceiptUuid")
 
 
-class CancellationInfo(BaseModel):
+class CancellationInfo(NPDModel):
     """
     Сведения об аннулировании дохода
 
@@ -53,24 +60,26 @@ class CancellationInfo(BaseModel):
         registered_at: Время регистрации аннулирования
         comment: Комментарий к аннулированию
         tax_period: Налоговый период в формате ``YYYYMM``
-        raw: JSON'подобный словарь, содержащий необработанный ответ ФНС
+        raw: JSON'подобный словарь, содержащий необработанный ответ ФНС. Хранится согласно ``RawPolicy`` клиента, по умолчанию ``None``
     """
 
     canceled_at: datetime = Field(..., alias="operationTime")
     registered_at: datetime = Field(..., alias="registerTime")
     comment: str | None = None
     tax_period: int | None = Field(None, alias="taxPeriodId")
-    raw: dict[str, Any]
+    raw: SkipValidation[dict[str, Any] | None] = None
 
     @model_validator(mode="before")
     @classmethod
-    def normalize(cls, values: dict[str, Any]) -> dict[str, Any]:
-        values["raw"] = values.copy()
+    def normalize(
+        cls, values: dict[str, Any], info: ValidationInfo
+    ) -> dict[str, Any]:
+        values = with_raw(values, info)
 
         return values
 
 
-class CanceledIncome(BaseModel):
+class CanceledIncome(NPDModel):
     """
     Сведения об аннулированном чеке
 
@@ -111,7 +120,7 @@ class CanceledIncome(BaseModel):
         return amount_to_decimal(value)
 
 
-class IncomeInfo(BaseModel):
+class IncomeInfo(NPDModel):
     """
     Сведения о задекларированном доходе.
 
@@ -130,7 +139,7 @@ class IncomeInfo(BaseModel):
         client_info: Сведения о клиенте
         employee_info: Сведения о самозанятом
         invoice_id: Номер связанного с доходом счёта
-        raw: JSON'подобный словарь, содержащий необработанный ответ ФНС
+        raw: JSON'подобный словарь, содержащий необработанный ответ ФНС. Хранится согласно ``RawPolicy`` клиента, по умолчанию ``None``
     """
 
     receipt_id: str = Field(..., alias="approvedReceiptUuid")
@@ -154,12 +163,14 @@ class IncomeInfo(BaseModel):
 
     invoice_id: int | None = Field(None, alias="invoiceId")
 
-    raw: dict[str, Any]
+    raw: SkipValidation[dict[str, Any] | None] = None
 
     @model_validator(mode="before")
     @classmethod
-    def model_normalize(cls, values: dict[str, Any]) -> dict[str, Any]:
-        values["raw"] = values.copy()
+    def model_normalize(
+        cls, values: dict[str, Any], info: ValidationInfo
+    ) -> dict[str, Any]:
+        values = with_raw(values, info)
 
         partner_info: PartnerInfo = PartnerInfo(
             code=values.get("partnerCode", None),
@@ -211,7 +222,7 @@ class IncomeInfo(BaseModel):
         return f"{LKNPD_API_V1}/receipt/{self.employee_info.inn}/{self.receipt_id}/json"
 
 
-class IncomesList(BaseModel):
+class IncomesList(NPDModel):
     """
     Содержит сведения о чеках и пагинации
 
@@ -2,8 +2,10 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Any, Iterable, Literal
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import Field, SkipValidation, ValidationInfo, model_validator
 
+from npdtools.helpers import with_raw
+from npdtools.types.base import NPDModel
 from npdtools.types.entity import (
     AcquiringInfo,
     BankAccount,
@@ -16,7 +18,7 @@ from npdtools.types.income import PaymentTypes
 from npdtools.types.service import Service
 
 
-class PaymentOption(BaseModel):
+class PaymentOption(NPDModel):
     """
     Объект со способом приёма денег по счёту
 
@@ -26,7 +28,7 @@ class PaymentOption(BaseModel):
         bank: Собственно, сами сведения о способе приёма
         is_favorite: Является ли способ приоритетным. Может быть один на каждый ``PaymentOption.type``
         is_for_pa: Хз, зачем и что такое
-        raw: JSON'подобный словарь, содержащий необработанный ответ ФНС
+        raw: JSON'подобный словарь, содержащий необработанный ответ ФНС. Хранится согласно ``RawPolicy`` клиента, по умолчанию ``None``
     """
 
     id: int
@@ -34,12 +36,14 @@ class PaymentOption(BaseModel):
     bank: BankAccount | BankPhone
     is_favorite: bool = Field(..., alias="favorite")
     is_for_pa: bool = Field(..., alias="availableForPa")  # Хз, зачем это
-    raw: dict[str, Any]
+    raw: SkipValidation[dict[str, Any] | None] = None
 
     @model_validator(mode="before")
     @classmethod
-    def normalize(cls, values: dict[str, Any]) -> dict[str, Any]:
-        values["raw"] = values.copy()
+    def normalize(
+        cls, values: dict[str, Any], info: ValidationInfo
+    ) -> dict[str, Any]:
+        values = with_raw(values, info)
         bank = {}
 
         if values.get("type") == "PHONE":
@@ -61,7 +65,7 @@ class PaymentOption(BaseModel):
         return values
 
 
-class PaymentOptions(BaseModel):
+class PaymentOptions(NPDModel):
     """
     Итерируемый список способов получения денег по счёту
 
@@ -81,7 +85,7 @@ class PaymentOptions(BaseModel):
         return len(self.options)
 
 
-class ReceiptTemplate(BaseModel):
+class ReceiptTemplate(NPDModel):
     """
     Настройки чека
 
@@ -107,7 +111,7 @@ class ReceiptTemplate(BaseModel):
     description: list[dict[str, Any]] | None = Field(None)
 
 
-class Invoice(BaseModel):
+class Invoice(NPDModel):
     """
     Attributes:
         invoice_id: Номер счёта
@@ -132,6 +136,7 @@ class Invoice(BaseModel):
 
         uuid: Технический идентификатор счёта в ФНС
         fid: Ещё один рандомный идентификатор
+        raw: JSON'подобный словарь, содержащий необработанный ответ ФНС. Хранится согласно ``RawPolicy`` клиента, по умолчанию ``None``
     """
 
     invoice_id: int = Field(..., alias="invoiceId")
@@ -166,6 +171,8 @@ class Invoice(BaseModel):
     type: Literal["MANUAL"]
     auto_create_receipt: bool | None = Field(None, alias="autoCreateReceipt")
 
+    raw: SkipValidation[dict[str, Any] | None] = None
+
     @property
     def is_paid(self) -> bool:
         """
@@ -184,8 +191,10 @@ class Invoice(BaseModel):
 
     @model_validator(mode="before")
     @classmethod
-    def normalize(cls, values: dict[str, Any]) -> dict[str, Any]:
-        values["raw"] = values.copy()
+    def normalize(
+        cls, values: dict[str, Any], info: ValidationInfo
+    ) -> dict[str, Any]:
+        values = with_raw(values, info)
 
         client_info: ClientInfo = ClientInfo(
             inn=values.get("clientInn", None),
@@ -233,7 +242,7 @@ class Invoice(BaseModel):
         return values
 
 
-class InvoicesList(BaseModel):
+class InvoicesList(NPDModel):
     """
     Содержит сведения о счетах и пагинации
 
@@ -254,3 +263,37 @@ class InvoicesList(BaseModel):
 
     def __getitem__(self, item) -> Invoice:
         return self.invoices[item]
+
+
+class InvoiceStatusChange(NPDModel):
+    """
+    Событие изменения статуса счёта
+
+    Attributes:
+        invoice: Актуальный объект счёта
+        old_status: Предыдущий известный статус
+        new_status: Новый статус
+    """
+
+    invoice: Invoice
+    old_status: str | None = None
+    new_status: str
+
+    @property
+    def invoice_id(self) -> int:
+        return self.invoice.invoice_id
+
+
+class NewInvoice(NPDModel):
+    """
+    Данные для выставления счёта в ``NPDTools.create_invoices_bulk``
+
+    Attributes:
+        services: Позиции в счёте
+        client: Сведения о клиенте
+        bank: Способ получения денег. Если не указан, берётся способ по умолчанию
+    """
+
+    services: list[Service]
+    client: ClientInfo
+    bank: BankAccount | BankPhone | None = None
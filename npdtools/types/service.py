@@ -1,10 +1,11 @@
 from _decimal import Decimal
-from pydantic import BaseModel, Field, field_validator
+from pydantic import Field, field_validator
 
 from npdtools.helpers import amount_to_decimal
+from npdtools.types.base import NPDModel
 
 
-class Service(BaseModel):
+class Service(NPDModel):
     """
     Объект позиции в чеке или счёте
 
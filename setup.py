@@ -24,6 +24,7 @@ setup(
     author_email="white@pfel.ru",
     description="tool for work with FNS API",
     install_requires=requirements(),
+    python_requires=">=3.11",
     project_urls={
         "Документация": "https://npd-tools.readthedocs.io/en/latest/",
         "Исходники": "https://gitlab.com/whiteapfel/npdtools/",
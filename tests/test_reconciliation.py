@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+from npdtools.reconciliation import LedgerPayment, Reconciler
+
+MOMENT = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+
+
+def receipt(receipt_id: str, amount: int, received_at: datetime = MOMENT):
+    return SimpleNamespace(
+        receipt_id=receipt_id,
+        total_amount=Decimal(amount),
+        received_at=received_at,
+        client_info=SimpleNamespace(inn=None),
+        cancellation_info=None,
+    )
+
+
+def reconcile(receipts, payments):
+    async def run():
+        reconciler = Reconciler()
+        await reconciler.add_receipts(receipts)
+        return await reconciler.reconcile(payments)
+
+    return asyncio.run(run())
+
+
+def test_two_payments_on_one_receipt_are_reported():
+    report = reconcile(
+        [receipt("r1", 100)],
+        [
+            LedgerPayment(1, Decimal(100), MOMENT, receipt_id="r1"),
+            LedgerPayment(2, Decimal(100), MOMENT, receipt_id="r1"),
+        ],
+    )
+    assert [payment.payment_id for payment, _ in report.matched] == [1]
+    assert [m.payment.payment_id for m in report.mismatched] == [2]
+    assert report.mismatched[0].reasons == ("receipt",)
+    assert not report.ok
+
+
+def test_direct_hit_on_receipt_taken_by_search_is_reported():
+    report = reconcile(
+        [receipt("r1", 100)],
+        [
+            LedgerPayment(1, Decimal(100), MOMENT + timedelta(minutes=1)),
+            LedgerPayment(2, Decimal(100), MOMENT, receipt_id="r1"),
+        ],
+    )
+    assert [payment.payment_id for payment, _ in report.matched] == [1]
+    assert [m.payment.payment_id for m in report.mismatched] == [2]
+    assert not report.ok